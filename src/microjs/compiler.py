@@ -1,6 +1,9 @@
 """Bytecode compiler - compiles AST to bytecode."""
 
-from typing import List, Dict, Any, Optional, Tuple
+import math
+import struct
+from bisect import bisect_right
+from typing import List, Dict, Any, Callable, Optional, Set, Tuple
 from dataclasses import dataclass, field
 from .ast_nodes import (
     Node,
@@ -50,7 +53,17 @@ from .ast_nodes import (
     ArrowFunctionExpression,
 )
 from .opcodes import OpCode
-from .values import UNDEFINED
+from .values import (
+    UNDEFINED,
+    NULL,
+    is_nan,
+    js_typeof,
+    to_boolean,
+    to_number,
+    to_string,
+    to_int32,
+    to_uint32,
+)
 
 
 @dataclass
@@ -84,6 +97,16 @@ class LoopContext:
     is_loop: bool = True  # False for switch statements (break only, no continue)
 
 
+@dataclass
+class FunctionAnalysis:
+    """Scope information gathered from a single function body."""
+
+    declared: Set[str]  # Names declared with var or function declarations
+    references: Set[str]  # Identifiers referenced directly in the body
+    inner_free: Set[str]  # Free variables of directly nested functions
+    free: Set[str]  # Names this function needs from enclosing scopes
+
+
 @dataclass
 class TryContext:
     """Context for try-finally blocks (for break/continue/return)."""
@@ -91,12 +114,436 @@ class TryContext:
     finalizer: Any = None  # The finally block AST node
 
 
+# Sentinel returned by the folding helpers when an expression can't be
+# evaluated at compile time.
+_NOT_CONSTANT = object()
+
+# Largest exponent folded for `a ** b`; bigger powers are left to the VM so
+# that huge integers are computed under the time limit, not during compile.
+_MAX_FOLD_EXPONENT = 64
+
+
+# Opcodes with a 16-bit (2 byte) little-endian argument: jumps and jump-like
+_JUMP_OPCODES = frozenset(
+    [OpCode.JUMP, OpCode.JUMP_IF_FALSE, OpCode.JUMP_IF_TRUE, OpCode.TRY_START]
+)
+
+# Packs an opcode and its 16-bit jump argument in one C-level call
+_JUMP_STRUCT = struct.Struct("<BH")
+# Packs just the 16-bit argument, for patching a jump in place
+_JUMP_ARG_STRUCT = struct.Struct("<H")
+
+# Opcodes with a 1 byte argument
+_BYTE_ARG_OPCODES = frozenset(
+    [
+        OpCode.LOAD_CONST,
+        OpCode.LOAD_SMALL_INT,
+        OpCode.LOAD_NAME,
+        OpCode.STORE_NAME,
+        OpCode.LOAD_LOCAL,
+        OpCode.STORE_LOCAL,
+        OpCode.LOAD_CLOSURE,
+        OpCode.STORE_CLOSURE,
+        OpCode.LOAD_CELL,
+        OpCode.STORE_CELL,
+        OpCode.CALL,
+        OpCode.CALL_METHOD,
+        OpCode.NEW,
+        OpCode.BUILD_ARRAY,
+        OpCode.BUILD_OBJECT,
+        OpCode.BUILD_REGEX,
+        OpCode.MAKE_CLOSURE,
+        OpCode.TYPEOF_NAME,
+    ]
+)
+
+# Constant types that _add_constant() shares between functions
+_INTERNED_TYPES = frozenset([bool, int, float, str])
+
+# Load/store opcodes for each kind of variable slot returned by _resolve_var()
+_LOAD_OPS = {
+    "cell": OpCode.LOAD_CELL,
+    "local": OpCode.LOAD_LOCAL,
+    "closure": OpCode.LOAD_CLOSURE,
+    "name": OpCode.LOAD_NAME,
+}
+_STORE_OPS = {
+    "cell": OpCode.STORE_CELL,
+    "local": OpCode.STORE_LOCAL,
+    "closure": OpCode.STORE_CLOSURE,
+    "name": OpCode.STORE_NAME,
+}
+_STORE_OPCODES = frozenset(_STORE_OPS.values())
+
+
+# Opcodes for binary, unary and compound assignment operators
+_BINARY_OP_MAP = {
+    "+": OpCode.ADD,
+    "-": OpCode.SUB,
+    "*": OpCode.MUL,
+    "/": OpCode.DIV,
+    "%": OpCode.MOD,
+    "**": OpCode.POW,
+    "&": OpCode.BAND,
+    "|": OpCode.BOR,
+    "^": OpCode.BXOR,
+    "<<": OpCode.SHL,
+    ">>": OpCode.SHR,
+    ">>>": OpCode.USHR,
+    "<": OpCode.LT,
+    "<=": OpCode.LE,
+    ">": OpCode.GT,
+    ">=": OpCode.GE,
+    "==": OpCode.EQ,
+    "!=": OpCode.NE,
+    "===": OpCode.SEQ,
+    "!==": OpCode.SNE,
+    "in": OpCode.IN,
+    "instanceof": OpCode.INSTANCEOF,
+}
+_UNARY_OP_MAP = {
+    "-": OpCode.NEG,
+    "+": OpCode.POS,
+    "!": OpCode.NOT,
+    "~": OpCode.BNOT,
+    "typeof": OpCode.TYPEOF,
+}
+_COMPOUND_OP_MAP = {
+    "+=": OpCode.ADD,
+    "-=": OpCode.SUB,
+    "*=": OpCode.MUL,
+    "/=": OpCode.DIV,
+    "%=": OpCode.MOD,
+    "&=": OpCode.BAND,
+    "|=": OpCode.BOR,
+    "^=": OpCode.BXOR,
+    "<<=": OpCode.SHL,
+    ">>=": OpCode.SHR,
+    ">>>=": OpCode.USHR,
+}
+
+
+# Expression types that _fold() can simplify. AST node classes are never
+# subclassed, so exact type checks are used on these hot paths.
+_FOLDABLE_TYPES = frozenset(
+    [BinaryExpression, UnaryExpression, LogicalExpression, ConditionalExpression]
+)
+_VALUE_LITERAL_TYPES = frozenset([NumericLiteral, StringLiteral, BooleanLiteral])
+
+
+def _index_names(names: List[str]) -> Dict[str, int]:
+    """Map each name to its first slot, matching list.index()."""
+    index: Dict[str, int] = {}
+    for i, name in enumerate(names):
+        index.setdefault(name, i)
+    return index
+
+
+def _literal_value(node: Node) -> Any:
+    """Return the JS value of a literal node, or _NOT_CONSTANT."""
+    node_type = type(node)
+    if node_type in _VALUE_LITERAL_TYPES:
+        return node.value
+    if node_type is NullLiteral:
+        return NULL
+    return _NOT_CONSTANT
+
+
+def _make_literal(value: Any, original: Node) -> Optional[Node]:
+    """Build a literal node for a folded value, or None if not representable."""
+    if value is _NOT_CONSTANT:
+        return None
+    if value is NULL:
+        literal = NullLiteral()
+    elif isinstance(value, bool):
+        literal = BooleanLiteral(value)
+    elif isinstance(value, (int, float)):
+        # -0 can't round-trip through the constant pool (it compares equal to 0)
+        if value == 0 and math.copysign(1, value) < 0:
+            return None
+        literal = NumericLiteral(value)
+    elif isinstance(value, str):
+        literal = StringLiteral(value)
+    else:
+        return None
+    literal.loc = original.loc
+    return literal
+
+
+def _fold_binary(op: str, a: Any, b: Any) -> Any:
+    """Evaluate a binary operator on two constants.
+
+    Mirrors the VM's runtime behaviour. Cases where the result depends on
+    details the VM handles specially (NaN operands, booleans in equality,
+    mixed-sign modulo, non-real powers) return _NOT_CONSTANT so they are
+    still evaluated at runtime.
+    """
+    if op == "+" and (isinstance(a, str) or isinstance(b, str)):
+        return to_string(a) + to_string(b)
+
+    if op in ("===", "!==", "==", "!="):
+        if isinstance(a, bool) or isinstance(b, bool):
+            return _NOT_CONSTANT
+        if op in ("===", "!=="):
+            if type(a) != type(b) and not (
+                isinstance(a, (int, float)) and isinstance(b, (int, float))
+            ):
+                equal = False
+            else:
+                equal = a == b
+        elif isinstance(a, str) and isinstance(b, (int, float)):
+            equal = to_number(a) == b
+        elif isinstance(a, (int, float)) and isinstance(b, str):
+            equal = a == to_number(b)
+        elif a is NULL or b is NULL:
+            equal = a is b
+        else:
+            equal = a == b
+        return equal if op in ("===", "==") else not equal
+
+    if op in ("<", "<=", ">", ">="):
+        if not (isinstance(a, str) and isinstance(b, str)):
+            a, b = to_number(a), to_number(b)
+            if is_nan(a) or is_nan(b):
+                return _NOT_CONSTANT
+        if op == "<":
+            return a < b
+        if op == "<=":
+            return a <= b
+        if op == ">":
+            return a > b
+        return a >= b
+
+    if op in ("&", "|", "^"):
+        a, b = to_int32(a), to_int32(b)
+        if op == "&":
+            return a & b
+        if op == "|":
+            return a | b
+        return a ^ b
+
+    if op in ("<<", ">>", ">>>"):
+        shift = to_uint32(b) & 0x1F
+        if op == ">>>":
+            return to_uint32(a) >> shift
+        if op == ">>":
+            return to_int32(a) >> shift
+        return to_int32(to_int32(a) << shift)
+
+    if op not in ("+", "-", "*", "/", "%", "**"):
+        return _NOT_CONSTANT
+
+    a, b = to_number(a), to_number(b)
+    if is_nan(a) or is_nan(b):
+        return _NOT_CONSTANT
+    try:
+        if op == "+":
+            return a + b
+        if op == "-":
+            return a - b
+        if op == "*":
+            return float(a) * float(b)
+        if op == "/":
+            if b == 0:
+                if a == 0:
+                    return math.nan
+                same_sign = (a > 0) == (math.copysign(1, b) > 0)
+                return math.inf if same_sign else -math.inf
+            return a / b
+        if op == "%":
+            if b == 0:
+                return math.nan
+            if (a < 0) != (b < 0):
+                return _NOT_CONSTANT
+            return a % b
+        # op == "**"
+        if abs(b) > _MAX_FOLD_EXPONENT or (a < 0 and b != int(b)):
+            return _NOT_CONSTANT
+        return a**b
+    except (ArithmeticError, ValueError):
+        return _NOT_CONSTANT
+
+
+def _fold_unary(op: str, a: Any) -> Any:
+    """Evaluate a unary operator on a constant, or return _NOT_CONSTANT."""
+    if op == "-":
+        n = to_number(a)
+        # The VM produces -0.0 for -0, which the constant pool can't hold
+        return _NOT_CONSTANT if n == 0 else -n
+    if op == "+":
+        return to_number(a)
+    if op == "!":
+        return not to_boolean(a)
+    if op == "~":
+        return ~to_int32(a)
+    if op == "typeof":
+        return js_typeof(a)
+    return _NOT_CONSTANT
+
+
+def _peephole(
+    bytecode: bytearray, source_map: Optional[Dict[int, Tuple[int, int]]] = None
+) -> bytearray:
+    """Remove redundant instruction sequences from finished bytecode.
+
+    - `DUP; STORE_x; POP` becomes `STORE_x` (stores leave the value on the stack)
+    - `LOAD_TRUE/LOAD_FALSE; JUMP_IF_x` becomes `JUMP` or nothing
+
+    A sequence is only rewritten if no jump lands inside it. Jump targets and
+    the source_map (updated in place) are moved to the new positions.
+    """
+    instrs = []
+    i = 0
+    while i < len(bytecode):
+        op = bytecode[i]
+        if op in _JUMP_OPCODES:
+            instrs.append((i, op, bytecode[i + 1] | bytecode[i + 2] << 8))
+            i += 3
+        elif op in _BYTE_ARG_OPCODES:
+            instrs.append((i, op, bytecode[i + 1]))
+            i += 2
+        else:
+            instrs.append((i, op, None))
+            i += 1
+    targets = {arg for _, op, arg in instrs if op in _JUMP_OPCODES}
+
+    # (old positions now at this instruction, opcode, arg)
+    kept: List[Tuple[List[int], int, Optional[int]]] = []
+    pending: List[int] = []  # Old positions of removed instructions
+    k = 0
+    while k < len(instrs):
+        pos, op, arg = instrs[k]
+        if (
+            op == OpCode.DUP
+            and k + 2 < len(instrs)
+            and instrs[k + 1][1] in _STORE_OPCODES
+            and instrs[k + 2][1] == OpCode.POP
+            and instrs[k + 1][0] not in targets
+            and instrs[k + 2][0] not in targets
+        ):
+            _, store_op, store_arg = instrs[k + 1]
+            pending += (pos, instrs[k + 1][0], instrs[k + 2][0])
+            kept.append((pending, store_op, store_arg))
+            pending = []
+            k += 3
+            continue
+        if (
+            op in (OpCode.LOAD_TRUE, OpCode.LOAD_FALSE)
+            and k + 1 < len(instrs)
+            and instrs[k + 1][1] in (OpCode.JUMP_IF_FALSE, OpCode.JUMP_IF_TRUE)
+            and instrs[k + 1][0] not in targets
+        ):
+            jump_pos, jump_op, target = instrs[k + 1]
+            pending += (pos, jump_pos)
+            if (op == OpCode.LOAD_TRUE) == (jump_op == OpCode.JUMP_IF_TRUE):
+                # Always taken
+                kept.append((pending, OpCode.JUMP, target))
+                pending = []
+            k += 2
+            continue
+        pending.append(pos)
+        kept.append((pending, op, arg))
+        pending = []
+        k += 1
+
+    if len(kept) == len(instrs):
+        return bytecode
+
+    # Work out where each old instruction ends up
+    new_pos: Dict[int, int] = {}
+    size = 0
+    for old_positions, op, arg in kept:
+        for old in old_positions:
+            new_pos[old] = size
+        size += 3 if op in _JUMP_OPCODES else 1 if arg is None else 2
+    for old in pending:
+        new_pos[old] = size
+    new_pos[len(bytecode)] = size
+
+    result = bytearray()
+    for _, op, arg in kept:
+        result.append(op)
+        if op in _JUMP_OPCODES:
+            result += _JUMP_ARG_STRUCT.pack(new_pos[arg])
+        elif arg is not None:
+            result.append(arg)
+
+    if source_map:
+        starts = [pos for pos, _, _ in instrs]
+        remapped: Dict[int, Tuple[int, int]] = {}
+        for old, loc in sorted(source_map.items()):
+            if old >= len(bytecode):
+                continue
+            start = starts[bisect_right(starts, old) - 1]
+            # Locations recorded at an instruction's own start take priority
+            if start == old or new_pos[start] not in remapped:
+                remapped[new_pos[start]] = loc
+        source_map.clear()
+        source_map.update(remapped)
+    return result
+
+
 class Compiler:
     """Compiles AST to bytecode."""
 
     def __init__(self):
-        self.bytecode: List[int] = []
+        self._reset()
+
+        # Node type -> compile method, used instead of an isinstance() ladder
+        self._statement_dispatch: Dict[type, Callable[[Any], None]] = {
+            ExpressionStatement: self._compile_ExpressionStatement,
+            BlockStatement: self._compile_BlockStatement,
+            EmptyStatement: self._compile_EmptyStatement,
+            VariableDeclaration: self._compile_VariableDeclaration,
+            IfStatement: self._compile_IfStatement,
+            WhileStatement: self._compile_WhileStatement,
+            DoWhileStatement: self._compile_DoWhileStatement,
+            ForStatement: self._compile_ForStatement,
+            ForInStatement: self._compile_ForInStatement,
+            ForOfStatement: self._compile_ForOfStatement,
+            BreakStatement: self._compile_BreakStatement,
+            ContinueStatement: self._compile_ContinueStatement,
+            ReturnStatement: self._compile_ReturnStatement,
+            ThrowStatement: self._compile_ThrowStatement,
+            TryStatement: self._compile_TryStatement,
+            SwitchStatement: self._compile_SwitchStatement,
+            FunctionDeclaration: self._compile_FunctionDeclaration,
+            LabeledStatement: self._compile_LabeledStatement,
+        }
+        self._expression_dispatch: Dict[type, Callable[[Any], None]] = {
+            NumericLiteral: self._compile_NumericLiteral,
+            StringLiteral: self._compile_StringLiteral,
+            BooleanLiteral: self._compile_BooleanLiteral,
+            NullLiteral: self._compile_NullLiteral,
+            RegexLiteral: self._compile_RegexLiteral,
+            Identifier: self._compile_Identifier,
+            ThisExpression: self._compile_ThisExpression,
+            ArrayExpression: self._compile_ArrayExpression,
+            ObjectExpression: self._compile_ObjectExpression,
+            UnaryExpression: self._compile_UnaryExpression,
+            UpdateExpression: self._compile_UpdateExpression,
+            LogicalExpression: self._compile_LogicalExpression,
+            ConditionalExpression: self._compile_ConditionalExpression,
+            AssignmentExpression: self._compile_AssignmentExpression,
+            SequenceExpression: self._compile_SequenceExpression,
+            MemberExpression: self._compile_MemberExpression,
+            CallExpression: self._compile_CallExpression,
+            NewExpression: self._compile_NewExpression,
+            FunctionExpression: self._compile_FunctionExpression,
+            ArrowFunctionExpression: self._compile_ArrowFunctionExpression,
+        }
+
+    def _reset(self) -> None:
+        """Start afresh, so one Compiler can compile any number of programs.
+
+        The lists handed to a CompiledFunction are replaced, not cleared.
+        """
+        self.bytecode = bytearray()
         self.constants: List[Any] = []
+        # (type, value) -> index in self.constants, for hashable constants
+        self._constant_index: Dict[Tuple[type, Any], int] = {}
+        # (type, value) -> the one object used for that constant program-wide
+        self._interned: Dict[Tuple[type, Any], Any] = {}
         self.names: List[str] = []
         self.locals: List[str] = []
         self.loop_stack: List[LoopContext] = []
@@ -108,13 +555,23 @@ class Compiler:
         self._outer_locals: List[List[str]] = []  # Stack of outer scope locals
         self._free_vars: List[str] = []  # Free variables captured from outer scopes
         self._cell_vars: List[str] = []  # Local variables captured by inner functions
+        # name -> slot lookups for locals, free_vars and cell_vars
+        self._local_index: Dict[str, int] = {}
+        self._free_index: Dict[str, int] = {}
+        self._cell_index: Dict[str, int] = {}
+        # name -> result of _resolve_var() in the function being compiled
+        self._var_cache: Dict[str, Tuple[str, int]] = {}
         self.source_map: Dict[int, Tuple[int, int]] = (
             {}
         )  # bytecode_pos -> (line, column)
         self._current_loc: Optional[Tuple[int, int]] = None  # Current source location
+        self._fold_cache: Dict[int, Node] = {}  # id(node) -> result of _fold()
+        # id(function body) -> FunctionAnalysis
+        self._analysis_cache: Dict[int, FunctionAnalysis] = {}
 
     def compile(self, node: Program) -> CompiledFunction:
         """Compile a program to bytecode."""
+        self._reset()
         body = node.body
 
         # Compile all statements except the last one
@@ -133,32 +590,26 @@ class Compiler:
         return CompiledFunction(
             name="<program>",
             params=[],
-            bytecode=bytes(self.bytecode),
+            bytecode=bytes(_peephole(self.bytecode, self.source_map)),
             constants=self.constants,
             locals=self.locals,
             num_locals=len(self.locals),
             source_map=self.source_map,
         )
 
-    # Opcodes that use 16-bit arguments (jumps and jump-like)
-    _JUMP_OPCODES = frozenset(
-        [OpCode.JUMP, OpCode.JUMP_IF_FALSE, OpCode.JUMP_IF_TRUE, OpCode.TRY_START]
-    )
-
     def _emit(self, opcode: OpCode, arg: Optional[int] = None) -> int:
         """Emit an opcode, return its position."""
         pos = len(self.bytecode)
         # Record source location for this bytecode position
         if self._current_loc is not None:
             self.source_map[pos] = self._current_loc
-        self.bytecode.append(opcode)
-        if arg is not None:
-            if opcode in self._JUMP_OPCODES:
-                # 16-bit little-endian for jump targets
-                self.bytecode.append(arg & 0xFF)
-                self.bytecode.append((arg >> 8) & 0xFF)
-            else:
-                self.bytecode.append(arg)
+        if arg is None:
+            self.bytecode.append(opcode)
+        elif opcode in _JUMP_OPCODES:
+            # 16-bit little-endian for jump targets
+            self.bytecode += _JUMP_STRUCT.pack(opcode, arg)
+        else:
+            self.bytecode += bytes((opcode, arg))
         return pos
 
     def _set_loc(self, node: Node) -> None:
@@ -172,9 +623,7 @@ class Compiler:
         Uses 16-bit (2 byte) little-endian offset.
         """
         pos = len(self.bytecode)
-        self.bytecode.append(opcode)
-        self.bytecode.append(0)  # Low byte placeholder
-        self.bytecode.append(0)  # High byte placeholder
+        self.bytecode += _JUMP_STRUCT.pack(opcode, 0)  # Target is a placeholder
         return pos
 
     def _patch_jump(self, pos: int, target: Optional[int] = None) -> None:
@@ -184,8 +633,7 @@ class Compiler:
         """
         if target is None:
             target = len(self.bytecode)
-        self.bytecode[pos + 1] = target & 0xFF  # Low byte
-        self.bytecode[pos + 2] = (target >> 8) & 0xFF  # High byte
+        _JUMP_ARG_STRUCT.pack_into(self.bytecode, pos + 1, target)
 
     def _emit_pending_finally_blocks(self) -> None:
         """Emit all pending finally blocks (for break/continue/return)."""
@@ -196,8 +644,21 @@ class Compiler:
 
     def _add_constant(self, value: Any) -> int:
         """Add a constant and return its index."""
-        if value in self.constants:
-            return self.constants.index(value)
+        # Key on the type too so that 1 and 1.0 (e.g. from folding) stay distinct
+        key: Optional[Tuple[type, Any]] = (type(value), value)
+        try:
+            return self._constant_index[key]
+        except KeyError:
+            pass
+        except TypeError:
+            # Unhashable, e.g. a CompiledFunction - always gets its own slot
+            key = None
+
+        if key is not None:
+            if key[0] in _INTERNED_TYPES:
+                # Share one object per value across all functions' constants
+                value = self._interned.setdefault(key, value)
+            self._constant_index[key] = len(self.constants)
         self.constants.append(value)
         return len(self.constants) - 1
 
@@ -208,27 +669,30 @@ class Compiler:
 
     def _add_local(self, name: str) -> int:
         """Add a local variable and return its slot."""
-        if name in self.locals:
-            return self.locals.index(name)
-        self.locals.append(name)
-        return len(self.locals) - 1
+        slot = self._local_index.get(name)
+        if slot is None:
+            slot = self._local_index[name] = len(self.locals)
+            self.locals.append(name)
+            # The name may have resolved to a global or closure variable before
+            self._var_cache.pop(name, None)
+        return slot
 
     def _get_local(self, name: str) -> Optional[int]:
         """Get local variable slot, or None if not local."""
-        if name in self.locals:
-            return self.locals.index(name)
-        return None
+        return self._local_index.get(name)
 
     def _get_free_var(self, name: str) -> Optional[int]:
         """Get free variable slot, or None if not in outer scope."""
-        if name in self._free_vars:
-            return self._free_vars.index(name)
+        slot = self._free_index.get(name)
+        if slot is not None:
+            return slot
         # Check if it's in any outer scope
         for outer_locals in reversed(self._outer_locals):
             if name in outer_locals:
                 # Add to free vars
+                slot = self._free_index[name] = len(self._free_vars)
                 self._free_vars.append(name)
-                return len(self._free_vars) - 1
+                return slot
         return None
 
     def _is_in_outer_scope(self, name: str) -> bool:
@@ -240,618 +704,584 @@ class Compiler:
 
     def _get_cell_var(self, name: str) -> Optional[int]:
         """Get cell variable slot, or None if not a cell var."""
-        if name in self._cell_vars:
-            return self._cell_vars.index(name)
-        return None
+        return self._cell_index.get(name)
 
-    def _find_captured_vars(self, body: Node, locals_set: set) -> set:
-        """Find all variables captured by inner functions."""
-        captured = set()
+    def _resolve_var(self, name: str) -> Tuple[str, int]:
+        """Resolve a variable to its kind of slot and index.
 
-        def visit(node):
-            if isinstance(
-                node, (FunctionDeclaration, FunctionExpression, ArrowFunctionExpression)
-            ):
-                # Found inner function - check what variables it uses
-                inner_captured = self._find_free_vars_in_function(node, locals_set)
-                captured.update(inner_captured)
-            elif isinstance(node, BlockStatement):
-                for stmt in node.body:
-                    visit(stmt)
-            elif isinstance(node, IfStatement):
-                visit(node.consequent)
-                if node.alternate:
-                    visit(node.alternate)
-            elif isinstance(node, WhileStatement):
-                visit(node.body)
-            elif isinstance(node, DoWhileStatement):
-                visit(node.body)
-            elif isinstance(node, ForStatement):
-                visit(node.body)
-            elif isinstance(node, ForInStatement):
-                visit(node.body)
-            elif isinstance(node, TryStatement):
-                visit(node.block)
-                if node.handler:
-                    visit(node.handler.body)
-                if node.finalizer:
-                    visit(node.finalizer)
-            elif isinstance(node, SwitchStatement):
-                for case in node.cases:
-                    for stmt in case.consequent:
-                        visit(stmt)
-            elif isinstance(node, LabeledStatement):
-                visit(node.body)
-            elif hasattr(node, "__dict__"):
-                # For expression nodes (e.g., arrow function expression body)
-                for value in node.__dict__.values():
-                    if isinstance(value, Node):
-                        visit(value)
-                    elif isinstance(value, list):
-                        for item in value:
-                            if isinstance(item, Node):
-                                visit(item)
-
-        if isinstance(body, BlockStatement):
-            for stmt in body.body:
-                visit(stmt)
+        The kind is "cell" (local captured by an inner function), "local",
+        "closure" (free variable from an outer scope) or "name" (global,
+        indexed in the constant pool), checked in that order. The answer is
+        cached per function until _add_local() adds the name.
+        """
+        resolved = self._var_cache.get(name)
+        if resolved is not None:
+            return resolved
+        cell_slot = self._get_cell_var(name)
+        if cell_slot is not None:
+            resolved = ("cell", cell_slot)
         else:
-            # Expression body (e.g., arrow function with expression)
-            visit(body)
-
-        return captured
-
-    def _find_free_vars_in_function(self, func_node, outer_locals: set) -> set:
-        """Find variables used in function that come from outer scope.
-
-        Also recursively checks nested functions - if a nested function needs
-        a variable from outer scope, this function needs to capture it too.
+            slot = self._get_local(name)
+            if slot is not None:
+                resolved = ("local", slot)
+            else:
+                closure_slot = self._get_free_var(name)
+                if closure_slot is not None:
+                    resolved = ("closure", closure_slot)
+                else:
+                    resolved = ("name", self._add_name(name))
+        self._var_cache[name] = resolved
+        return resolved
+
+    def _emit_load_var(self, name: str) -> None:
+        """Emit a load of a variable from wherever it lives."""
+        kind, idx = self._resolve_var(name)
+        self._emit(_LOAD_OPS[kind], idx)
+
+    def _emit_store_var(self, name: str) -> None:
+        """Emit a store of the top of stack to a variable (value stays on stack)."""
+        kind, idx = self._resolve_var(name)
+        self._emit(_STORE_OPS[kind], idx)
+
+    def _analyze_function_body(
+        self, body: Node, params: List[Identifier]
+    ) -> FunctionAnalysis:
+        """Collect the declarations and variable references of a function body.
+
+        This is a single walk over the body that doesn't descend into nested
+        functions; those are analysed separately and contribute their own free
+        variables. The result doesn't depend on the enclosing scope, so it is
+        cached by body identity and reused wherever the body is analysed again.
         """
-        free_vars = set()
-        # Get function's own locals (params and declared vars)
-        if isinstance(func_node, FunctionDeclaration):
-            params = {p.name for p in func_node.params}
-            body = func_node.body
-        else:  # FunctionExpression
-            params = {p.name for p in func_node.params}
-            body = func_node.body
-
-        local_vars = params.copy()
-        # Find var declarations in function
-        self._collect_var_decls(body, local_vars)
-
-        # Now find identifiers used that are not local but are in outer_locals
-        def visit_expr(node):
+        analysis = self._analysis_cache.get(id(body))
+        if analysis is not None:
+            return analysis
+
+        declared: Set[str] = set()
+        references: Set[str] = set()
+        inner_free: Set[str] = set()
+        work_stack = [body]
+        while work_stack:
+            node = work_stack.pop()
             if isinstance(node, Identifier):
-                if node.name in outer_locals and node.name not in local_vars:
-                    free_vars.add(node.name)
-            elif isinstance(
+                references.add(node.name)
+                continue
+            if isinstance(
                 node, (FunctionDeclaration, FunctionExpression, ArrowFunctionExpression)
             ):
-                # Recursively check nested functions - any outer variable they need
-                # must also be captured by this function (unless it's our local)
-                nested_free = self._find_free_vars_in_function(node, outer_locals)
-                for var in nested_free:
-                    if var not in local_vars:
-                        free_vars.add(var)
-            elif hasattr(node, "__dict__"):
-                for value in node.__dict__.values():
-                    if isinstance(value, Node):
-                        visit_expr(value)
-                    elif isinstance(value, list):
-                        for item in value:
-                            if isinstance(item, Node):
-                                visit_expr(item)
-
-        visit_expr(body)
-        return free_vars
-
-    def _collect_var_decls(self, node, var_set: set):
-        """Collect all var declarations in a node."""
-        if isinstance(node, VariableDeclaration):
-            for decl in node.declarations:
-                var_set.add(decl.id.name)
-        elif isinstance(node, FunctionDeclaration):
-            var_set.add(node.id.name)
-            # Don't recurse into function body
-        elif isinstance(node, BlockStatement):
-            for stmt in node.body:
-                self._collect_var_decls(stmt, var_set)
-        elif hasattr(node, "__dict__"):
-            for key, value in node.__dict__.items():
-                if isinstance(value, Node) and not isinstance(
-                    value,
-                    (FunctionDeclaration, FunctionExpression, ArrowFunctionExpression),
-                ):
-                    self._collect_var_decls(value, var_set)
+                if isinstance(node, FunctionDeclaration):
+                    declared.add(node.id.name)
+                inner = self._analyze_function_body(node.body, node.params)
+                inner_free |= inner.free
+                continue
+            if isinstance(node, VariableDeclaration):
+                for decl in node.declarations:
+                    declared.add(decl.id.name)
+            for value in node.__dict__.values():
+                if isinstance(value, Node):
+                    work_stack.append(value)
                 elif isinstance(value, list):
-                    for item in value:
-                        if isinstance(item, Node) and not isinstance(
-                            item,
-                            (
-                                FunctionDeclaration,
-                                FunctionExpression,
-                                ArrowFunctionExpression,
-                            ),
-                        ):
-                            self._collect_var_decls(item, var_set)
+                    work_stack.extend(item for item in value if isinstance(item, Node))
+
+        own_locals = {p.name for p in params} | {"arguments"} | declared
+        analysis = FunctionAnalysis(
+            declared=declared,
+            references=references,
+            inner_free=inner_free,
+            free=(references | inner_free) - own_locals,
+        )
+        self._analysis_cache[id(body)] = analysis
+        return analysis
+
+    def _resolve_scope(self, analysis: FunctionAnalysis, local_vars: set) -> None:
+        """Set cell and free variables for the function being compiled."""
+        # Locals that inner functions refer to must live in cells
+        self._cell_vars = list(analysis.inner_free & local_vars)
+        # Outer variables used here or passed through to inner functions
+        self._free_vars = [
+            name
+            for name in (analysis.references | analysis.inner_free) - local_vars
+            if self._is_in_outer_scope(name)
+        ]
+        self._cell_index = _index_names(self._cell_vars)
+        self._free_index = _index_names(self._free_vars)
+
+    def _find_handler(
+        self, dispatch: Dict[type, Callable[[Any], None]], node: Node, kind: str
+    ) -> Callable[[Any], None]:
+        """Find the compile method for a subclass of a known node type."""
+        for cls in type(node).__mro__[1:]:
+            if cls in dispatch:
+                return dispatch[cls]
+        raise NotImplementedError(f"Cannot compile {kind}: {type(node).__name__}")
 
     # ---- Statements ----
 
     def _compile_statement(self, node: Node) -> None:
         """Compile a statement."""
-        if isinstance(node, ExpressionStatement):
-            self._compile_expression(node.expression)
+        handler = self._statement_dispatch.get(type(node))
+        if handler is None:
+            handler = self._find_handler(self._statement_dispatch, node, "statement")
+        handler(node)
+
+    def _compile_ExpressionStatement(self, node: ExpressionStatement) -> None:
+        """Compile an expression statement."""
+        self._compile_expression(node.expression)
+        self._emit(OpCode.POP)
+
+    def _compile_BlockStatement(self, node: BlockStatement) -> None:
+        """Compile a block statement."""
+        # Handle nested blocks iteratively to avoid deep recursion
+        work_stack = [node]
+        while work_stack:
+            current = work_stack.pop()
+            if isinstance(current, BlockStatement):
+                # Push body statements in reverse order
+                for stmt in reversed(current.body):
+                    work_stack.append(stmt)
+            else:
+                self._compile_statement(current)
+
+    def _compile_EmptyStatement(self, node: EmptyStatement) -> None:
+        """Compile an empty statement."""
+        pass
+
+    def _compile_VariableDeclaration(self, node: VariableDeclaration) -> None:
+        """Compile a variable declaration."""
+        for decl in node.declarations:
+            name = decl.id.name
+            if decl.init:
+                self._compile_expression(decl.init)
+            else:
+                self._emit(OpCode.LOAD_UNDEFINED)
+
+            if self._in_function:
+                # Inside function: use local (or cell) variable
+                self._add_local(name)
+                self._emit_store_var(name)
+            else:
+                # At program level: use global variable
+                idx = self._add_name(name)
+                self._emit(OpCode.STORE_NAME, idx)
             self._emit(OpCode.POP)
 
-        elif isinstance(node, BlockStatement):
-            # Handle nested blocks iteratively to avoid deep recursion
-            work_stack = [node]
-            while work_stack:
-                current = work_stack.pop()
-                if isinstance(current, BlockStatement):
-                    # Push body statements in reverse order
-                    for stmt in reversed(current.body):
-                        work_stack.append(stmt)
-                else:
-                    self._compile_statement(current)
+    def _compile_IfStatement(self, node: IfStatement) -> None:
+        """Compile an if statement."""
+        self._compile_expression(node.test)
+        jump_false = self._emit_jump(OpCode.JUMP_IF_FALSE)
 
-        elif isinstance(node, EmptyStatement):
-            pass
+        self._compile_statement(node.consequent)
 
-        elif isinstance(node, VariableDeclaration):
-            for decl in node.declarations:
-                name = decl.id.name
-                if decl.init:
-                    self._compile_expression(decl.init)
-                else:
-                    self._emit(OpCode.LOAD_UNDEFINED)
+        if node.alternate:
+            jump_end = self._emit_jump(OpCode.JUMP)
+            self._patch_jump(jump_false)
+            self._compile_statement(node.alternate)
+            self._patch_jump(jump_end)
+        else:
+            self._patch_jump(jump_false)
 
-                if self._in_function:
-                    # Inside function: use local variable
-                    self._add_local(name)
-                    # Check if it's a cell var (captured by inner function)
-                    cell_slot = self._get_cell_var(name)
-                    if cell_slot is not None:
-                        self._emit(OpCode.STORE_CELL, cell_slot)
-                    else:
-                        slot = self._get_local(name)
-                        self._emit(OpCode.STORE_LOCAL, slot)
-                else:
-                    # At program level: use global variable
-                    idx = self._add_name(name)
-                    self._emit(OpCode.STORE_NAME, idx)
-                self._emit(OpCode.POP)
+    def _compile_WhileStatement(self, node: WhileStatement) -> None:
+        """Compile a while statement."""
+        loop_ctx = LoopContext()
+        self.loop_stack.append(loop_ctx)
 
-        elif isinstance(node, IfStatement):
-            self._compile_expression(node.test)
-            jump_false = self._emit_jump(OpCode.JUMP_IF_FALSE)
+        loop_start = len(self.bytecode)
 
-            self._compile_statement(node.consequent)
+        self._compile_expression(node.test)
+        jump_false = self._emit_jump(OpCode.JUMP_IF_FALSE)
 
-            if node.alternate:
-                jump_end = self._emit_jump(OpCode.JUMP)
-                self._patch_jump(jump_false)
-                self._compile_statement(node.alternate)
-                self._patch_jump(jump_end)
-            else:
-                self._patch_jump(jump_false)
+        self._compile_statement(node.body)
 
-        elif isinstance(node, WhileStatement):
-            loop_ctx = LoopContext()
-            self.loop_stack.append(loop_ctx)
+        self._emit(OpCode.JUMP, loop_start)
+        self._patch_jump(jump_false)
 
-            loop_start = len(self.bytecode)
+        # Patch break jumps
+        for pos in loop_ctx.break_jumps:
+            self._patch_jump(pos)
+        # Patch continue jumps
+        for pos in loop_ctx.continue_jumps:
+            self._patch_jump(pos, loop_start)
 
-            self._compile_expression(node.test)
-            jump_false = self._emit_jump(OpCode.JUMP_IF_FALSE)
+        self.loop_stack.pop()
 
-            self._compile_statement(node.body)
+    def _compile_DoWhileStatement(self, node: DoWhileStatement) -> None:
+        """Compile a do while statement."""
+        loop_ctx = LoopContext()
+        self.loop_stack.append(loop_ctx)
 
-            self._emit(OpCode.JUMP, loop_start)
-            self._patch_jump(jump_false)
+        loop_start = len(self.bytecode)
 
-            # Patch break jumps
-            for pos in loop_ctx.break_jumps:
-                self._patch_jump(pos)
-            # Patch continue jumps
-            for pos in loop_ctx.continue_jumps:
-                self._patch_jump(pos, loop_start)
+        self._compile_statement(node.body)
 
-            self.loop_stack.pop()
+        continue_target = len(self.bytecode)
+        self._compile_expression(node.test)
+        self._emit(OpCode.JUMP_IF_TRUE, loop_start)
 
-        elif isinstance(node, DoWhileStatement):
-            loop_ctx = LoopContext()
-            self.loop_stack.append(loop_ctx)
+        # Patch break jumps
+        for pos in loop_ctx.break_jumps:
+            self._patch_jump(pos)
+        # Patch continue jumps
+        for pos in loop_ctx.continue_jumps:
+            self._patch_jump(pos, continue_target)
 
-            loop_start = len(self.bytecode)
+        self.loop_stack.pop()
 
-            self._compile_statement(node.body)
+    def _compile_ForStatement(self, node: ForStatement) -> None:
+        """Compile a for statement."""
+        loop_ctx = LoopContext()
+        self.loop_stack.append(loop_ctx)
 
-            continue_target = len(self.bytecode)
-            self._compile_expression(node.test)
-            self._emit(OpCode.JUMP_IF_TRUE, loop_start)
+        # Init
+        if node.init:
+            if isinstance(node.init, VariableDeclaration):
+                self._compile_statement(node.init)
+            else:
+                self._compile_expression(node.init)
+                self._emit(OpCode.POP)
 
-            # Patch break jumps
-            for pos in loop_ctx.break_jumps:
-                self._patch_jump(pos)
-            # Patch continue jumps
-            for pos in loop_ctx.continue_jumps:
-                self._patch_jump(pos, continue_target)
+        loop_start = len(self.bytecode)
 
-            self.loop_stack.pop()
+        # Test
+        jump_false = None
+        if node.test:
+            self._compile_expression(node.test)
+            jump_false = self._emit_jump(OpCode.JUMP_IF_FALSE)
 
-        elif isinstance(node, ForStatement):
-            loop_ctx = LoopContext()
-            self.loop_stack.append(loop_ctx)
+        # Body
+        self._compile_statement(node.body)
 
-            # Init
-            if node.init:
-                if isinstance(node.init, VariableDeclaration):
-                    self._compile_statement(node.init)
-                else:
-                    self._compile_expression(node.init)
-                    self._emit(OpCode.POP)
+        # Update
+        continue_target = len(self.bytecode)
+        if node.update:
+            self._compile_expression(node.update)
+            self._emit(OpCode.POP)
 
-            loop_start = len(self.bytecode)
+        self._emit(OpCode.JUMP, loop_start)
 
-            # Test
-            jump_false = None
-            if node.test:
-                self._compile_expression(node.test)
-                jump_false = self._emit_jump(OpCode.JUMP_IF_FALSE)
+        if jump_false:
+            self._patch_jump(jump_false)
 
-            # Body
-            self._compile_statement(node.body)
+        # Patch break/continue
+        for pos in loop_ctx.break_jumps:
+            self._patch_jump(pos)
+        for pos in loop_ctx.continue_jumps:
+            self._patch_jump(pos, continue_target)
 
-            # Update
-            continue_target = len(self.bytecode)
-            if node.update:
-                self._compile_expression(node.update)
-                self._emit(OpCode.POP)
+        self.loop_stack.pop()
 
-            self._emit(OpCode.JUMP, loop_start)
+    def _compile_ForInStatement(self, node: ForInStatement) -> None:
+        """Compile a for in statement."""
+        loop_ctx = LoopContext()
+        self.loop_stack.append(loop_ctx)
 
-            if jump_false:
-                self._patch_jump(jump_false)
+        # Compile object expression
+        self._compile_expression(node.right)
+        self._emit(OpCode.FOR_IN_INIT)
 
-            # Patch break/continue
-            for pos in loop_ctx.break_jumps:
-                self._patch_jump(pos)
-            for pos in loop_ctx.continue_jumps:
-                self._patch_jump(pos, continue_target)
+        loop_start = len(self.bytecode)
+        self._emit(OpCode.FOR_IN_NEXT)
+        jump_done = self._emit_jump(OpCode.JUMP_IF_TRUE)
 
-            self.loop_stack.pop()
+        # Store key in variable
+        if isinstance(node.left, VariableDeclaration):
+            decl = node.left.declarations[0]
+            name = decl.id.name
+            if self._in_function:
+                self._add_local(name)
+                self._emit_store_var(name)
+            else:
+                idx = self._add_name(name)
+                self._emit(OpCode.STORE_NAME, idx)
+            self._emit(OpCode.POP)
+        elif isinstance(node.left, Identifier):
+            self._emit_store_var(node.left.name)
+            self._emit(OpCode.POP)
+        elif isinstance(node.left, MemberExpression):
+            # for (obj.prop in ...) or for (obj[key] in ...)
+            # After FOR_IN_NEXT: stack has [..., iterator, key]
+            # We need for SET_PROP: obj, prop, key -> value (leaves value on stack)
+            # Compile obj and prop first, then rotate key to top
+            self._compile_expression(node.left.object)
+            if node.left.computed:
+                self._compile_expression(node.left.property)
+            else:
+                idx = self._add_constant(node.left.property.name)
+                self._emit(OpCode.LOAD_CONST, idx)
+            # Stack is now: [..., iterator, key, obj, prop]
+            # We need: [..., iterator, obj, prop, key]
+            # ROT3 on (key, obj, prop) gives (obj, prop, key)
+            self._emit(OpCode.ROT3)
+            self._emit(OpCode.SET_PROP)
+            self._emit(OpCode.POP)  # Pop the result of SET_PROP
+        else:
+            raise NotImplementedError(
+                f"Unsupported for-in left: {type(node.left).__name__}"
+            )
 
-        elif isinstance(node, ForInStatement):
-            loop_ctx = LoopContext()
-            self.loop_stack.append(loop_ctx)
+        self._compile_statement(node.body)
 
-            # Compile object expression
-            self._compile_expression(node.right)
-            self._emit(OpCode.FOR_IN_INIT)
-
-            loop_start = len(self.bytecode)
-            self._emit(OpCode.FOR_IN_NEXT)
-            jump_done = self._emit_jump(OpCode.JUMP_IF_TRUE)
-
-            # Store key in variable
-            if isinstance(node.left, VariableDeclaration):
-                decl = node.left.declarations[0]
-                name = decl.id.name
-                if self._in_function:
-                    self._add_local(name)
-                    slot = self._get_local(name)
-                    self._emit(OpCode.STORE_LOCAL, slot)
-                else:
-                    idx = self._add_name(name)
-                    self._emit(OpCode.STORE_NAME, idx)
-                self._emit(OpCode.POP)
-            elif isinstance(node.left, Identifier):
-                name = node.left.name
-                slot = self._get_local(name)
-                if slot is not None:
-                    self._emit(OpCode.STORE_LOCAL, slot)
-                else:
-                    idx = self._add_name(name)
-                    self._emit(OpCode.STORE_NAME, idx)
-                self._emit(OpCode.POP)
-            elif isinstance(node.left, MemberExpression):
-                # for (obj.prop in ...) or for (obj[key] in ...)
-                # After FOR_IN_NEXT: stack has [..., iterator, key]
-                # We need for SET_PROP: obj, prop, key -> value (leaves value on stack)
-                # Compile obj and prop first, then rotate key to top
-                self._compile_expression(node.left.object)
-                if node.left.computed:
-                    self._compile_expression(node.left.property)
-                else:
-                    idx = self._add_constant(node.left.property.name)
-                    self._emit(OpCode.LOAD_CONST, idx)
-                # Stack is now: [..., iterator, key, obj, prop]
-                # We need: [..., iterator, obj, prop, key]
-                # ROT3 on (key, obj, prop) gives (obj, prop, key)
-                self._emit(OpCode.ROT3)
-                self._emit(OpCode.SET_PROP)
-                self._emit(OpCode.POP)  # Pop the result of SET_PROP
-            else:
-                raise NotImplementedError(
-                    f"Unsupported for-in left: {type(node.left).__name__}"
-                )
+        self._emit(OpCode.JUMP, loop_start)
+        self._patch_jump(jump_done)
+        self._emit(OpCode.POP)  # Pop iterator
 
-            self._compile_statement(node.body)
+        # Patch break and continue jumps
+        for pos in loop_ctx.break_jumps:
+            self._patch_jump(pos)
+        for pos in loop_ctx.continue_jumps:
+            self._patch_jump(pos, loop_start)
 
-            self._emit(OpCode.JUMP, loop_start)
-            self._patch_jump(jump_done)
-            self._emit(OpCode.POP)  # Pop iterator
+        self.loop_stack.pop()
 
-            # Patch break and continue jumps
-            for pos in loop_ctx.break_jumps:
-                self._patch_jump(pos)
-            for pos in loop_ctx.continue_jumps:
-                self._patch_jump(pos, loop_start)
+    def _compile_ForOfStatement(self, node: ForOfStatement) -> None:
+        """Compile a for of statement."""
+        loop_ctx = LoopContext()
+        self.loop_stack.append(loop_ctx)
 
-            self.loop_stack.pop()
+        # Compile iterable expression
+        self._compile_expression(node.right)
+        self._emit(OpCode.FOR_OF_INIT)
 
-        elif isinstance(node, ForOfStatement):
-            loop_ctx = LoopContext()
-            self.loop_stack.append(loop_ctx)
+        loop_start = len(self.bytecode)
+        self._emit(OpCode.FOR_OF_NEXT)
+        jump_done = self._emit_jump(OpCode.JUMP_IF_TRUE)
 
-            # Compile iterable expression
-            self._compile_expression(node.right)
-            self._emit(OpCode.FOR_OF_INIT)
-
-            loop_start = len(self.bytecode)
-            self._emit(OpCode.FOR_OF_NEXT)
-            jump_done = self._emit_jump(OpCode.JUMP_IF_TRUE)
-
-            # Store value in variable
-            if isinstance(node.left, VariableDeclaration):
-                decl = node.left.declarations[0]
-                name = decl.id.name
-                if self._in_function:
-                    self._add_local(name)
-                    slot = self._get_local(name)
-                    self._emit(OpCode.STORE_LOCAL, slot)
-                else:
-                    idx = self._add_name(name)
-                    self._emit(OpCode.STORE_NAME, idx)
-                self._emit(OpCode.POP)
-            elif isinstance(node.left, Identifier):
-                name = node.left.name
-                slot = self._get_local(name)
-                if slot is not None:
-                    self._emit(OpCode.STORE_LOCAL, slot)
-                else:
-                    idx = self._add_name(name)
-                    self._emit(OpCode.STORE_NAME, idx)
-                self._emit(OpCode.POP)
+        # Store value in variable
+        if isinstance(node.left, VariableDeclaration):
+            decl = node.left.declarations[0]
+            name = decl.id.name
+            if self._in_function:
+                self._add_local(name)
+                self._emit_store_var(name)
             else:
-                raise NotImplementedError(
-                    f"Unsupported for-of left: {type(node.left).__name__}"
-                )
+                idx = self._add_name(name)
+                self._emit(OpCode.STORE_NAME, idx)
+            self._emit(OpCode.POP)
+        elif isinstance(node.left, Identifier):
+            self._emit_store_var(node.left.name)
+            self._emit(OpCode.POP)
+        else:
+            raise NotImplementedError(
+                f"Unsupported for-of left: {type(node.left).__name__}"
+            )
 
-            self._compile_statement(node.body)
+        self._compile_statement(node.body)
 
-            self._emit(OpCode.JUMP, loop_start)
-            self._patch_jump(jump_done)
-            self._emit(OpCode.POP)  # Pop iterator
+        self._emit(OpCode.JUMP, loop_start)
+        self._patch_jump(jump_done)
+        self._emit(OpCode.POP)  # Pop iterator
 
-            # Patch break and continue jumps
-            for pos in loop_ctx.break_jumps:
-                self._patch_jump(pos)
-            for pos in loop_ctx.continue_jumps:
-                self._patch_jump(pos, loop_start)
+        # Patch break and continue jumps
+        for pos in loop_ctx.break_jumps:
+            self._patch_jump(pos)
+        for pos in loop_ctx.continue_jumps:
+            self._patch_jump(pos, loop_start)
 
-            self.loop_stack.pop()
+        self.loop_stack.pop()
 
-        elif isinstance(node, BreakStatement):
-            if not self.loop_stack:
-                raise SyntaxError("'break' outside of loop")
+    def _compile_BreakStatement(self, node: BreakStatement) -> None:
+        """Compile a break statement."""
+        if not self.loop_stack:
+            raise SyntaxError("'break' outside of loop")
 
-            # Find the right loop context (labeled or innermost loop/switch)
-            target_label = node.label.name if node.label else None
-            ctx = None
-            for loop_ctx in reversed(self.loop_stack):
-                if target_label is not None:
-                    # Labeled break - find the matching label
-                    if loop_ctx.label == target_label:
-                        ctx = loop_ctx
-                        break
-                else:
-                    # Unlabeled break - find innermost loop or switch
-                    # is_loop=True means it's a loop, is_loop=False with no label means switch
-                    # Skip labeled statements (is_loop=False with label) for unlabeled break
-                    if loop_ctx.is_loop or loop_ctx.label is None:
-                        ctx = loop_ctx
-                        break
-
-            if ctx is None:
-                if target_label:
-                    raise SyntaxError(f"label '{target_label}' not found")
-                else:
-                    raise SyntaxError("'break' outside of loop")
-
-            # Emit pending finally blocks before the break
-            self._emit_pending_finally_blocks()
-
-            pos = self._emit_jump(OpCode.JUMP)
-            ctx.break_jumps.append(pos)
-
-        elif isinstance(node, ContinueStatement):
-            if not self.loop_stack:
-                raise SyntaxError("'continue' outside of loop")
-
-            # Find the right loop context (labeled or innermost loop, not switch)
-            target_label = node.label.name if node.label else None
-            ctx = None
-            for loop_ctx in reversed(self.loop_stack):
-                # Skip non-loop contexts (like switch) unless specifically labeled
-                if not loop_ctx.is_loop and target_label is None:
-                    continue
-                if target_label is None or loop_ctx.label == target_label:
+        # Find the right loop context (labeled or innermost loop/switch)
+        target_label = node.label.name if node.label else None
+        ctx = None
+        for loop_ctx in reversed(self.loop_stack):
+            if target_label is not None:
+                # Labeled break - find the matching label
+                if loop_ctx.label == target_label:
+                    ctx = loop_ctx
+                    break
+            else:
+                # Unlabeled break - find innermost loop or switch
+                # is_loop=True means it's a loop, is_loop=False with no label means switch
+                # Skip labeled statements (is_loop=False with label) for unlabeled break
+                if loop_ctx.is_loop or loop_ctx.label is None:
                     ctx = loop_ctx
                     break
 
-            if ctx is None:
+        if ctx is None:
+            if target_label:
                 raise SyntaxError(f"label '{target_label}' not found")
+            else:
+                raise SyntaxError("'break' outside of loop")
 
-            # Emit pending finally blocks before the continue
-            self._emit_pending_finally_blocks()
+        # Emit pending finally blocks before the break
+        self._emit_pending_finally_blocks()
 
-            pos = self._emit_jump(OpCode.JUMP)
-            ctx.continue_jumps.append(pos)
+        pos = self._emit_jump(OpCode.JUMP)
+        ctx.break_jumps.append(pos)
 
-        elif isinstance(node, ReturnStatement):
-            # Emit pending finally blocks before the return
-            self._emit_pending_finally_blocks()
+    def _compile_ContinueStatement(self, node: ContinueStatement) -> None:
+        """Compile a continue statement."""
+        if not self.loop_stack:
+            raise SyntaxError("'continue' outside of loop")
 
-            if node.argument:
-                self._compile_expression(node.argument)
-                self._emit(OpCode.RETURN)
-            else:
-                self._emit(OpCode.RETURN_UNDEFINED)
+        # Find the right loop context (labeled or innermost loop, not switch)
+        target_label = node.label.name if node.label else None
+        ctx = None
+        for loop_ctx in reversed(self.loop_stack):
+            # Skip non-loop contexts (like switch) unless specifically labeled
+            if not loop_ctx.is_loop and target_label is None:
+                continue
+            if target_label is None or loop_ctx.label == target_label:
+                ctx = loop_ctx
+                break
 
-        elif isinstance(node, ThrowStatement):
-            self._set_loc(node)  # Record location of throw statement
-            self._compile_expression(node.argument)
-            self._emit(OpCode.THROW)
-
-        elif isinstance(node, TryStatement):
-            # Push TryContext if there's a finally block so break/continue/return
-            # can inline the finally code
-            if node.finalizer:
-                self.try_stack.append(TryContext(finalizer=node.finalizer))
-
-            # Try block
-            try_start = self._emit_jump(OpCode.TRY_START)
-
-            self._compile_statement(node.block)
-            self._emit(OpCode.TRY_END)
-
-            # Jump past exception handler to normal finally
-            jump_to_finally = self._emit_jump(OpCode.JUMP)
-
-            # Exception handler
-            self._patch_jump(try_start)
-            if node.handler:
-                # Has catch block
-                self._emit(OpCode.CATCH)
-                # Store exception in catch variable
-                name = node.handler.param.name
-                self._add_local(name)
-                slot = self._get_local(name)
-                self._emit(OpCode.STORE_LOCAL, slot)
-                self._emit(OpCode.POP)
-                self._compile_statement(node.handler.body)
-                # Fall through to finally
-            elif node.finalizer:
-                # No catch, only finally - exception is on stack
-                # Run finally then rethrow
-                self._compile_statement(node.finalizer)
-                self._emit(OpCode.THROW)  # Rethrow the exception
-
-            # Pop TryContext before compiling normal finally
-            if node.finalizer:
-                self.try_stack.pop()
-
-            # Normal finally block (after try completes normally or after catch)
-            self._patch_jump(jump_to_finally)
-            if node.finalizer:
-                self._compile_statement(node.finalizer)
-
-        elif isinstance(node, SwitchStatement):
-            self._compile_expression(node.discriminant)
-
-            jump_to_body: List[Tuple[int, int]] = []
-            default_jump = None
-
-            # Compile case tests
-            for i, case in enumerate(node.cases):
-                if case.test:
-                    self._emit(OpCode.DUP)
-                    self._compile_expression(case.test)
-                    self._emit(OpCode.SEQ)
-                    pos = self._emit_jump(OpCode.JUMP_IF_TRUE)
-                    jump_to_body.append((pos, i))
-                else:
-                    default_jump = (self._emit_jump(OpCode.JUMP), i)
+        if ctx is None:
+            raise SyntaxError(f"label '{target_label}' not found")
 
-            # Jump to end if no match
-            jump_end = self._emit_jump(OpCode.JUMP)
+        # Emit pending finally blocks before the continue
+        self._emit_pending_finally_blocks()
 
-            # Case bodies
-            case_positions = []
-            loop_ctx = LoopContext(is_loop=False)  # For break statements only
-            self.loop_stack.append(loop_ctx)
+        pos = self._emit_jump(OpCode.JUMP)
+        ctx.continue_jumps.append(pos)
 
-            for i, case in enumerate(node.cases):
-                case_positions.append(len(self.bytecode))
-                for stmt in case.consequent:
-                    self._compile_statement(stmt)
+    def _compile_ReturnStatement(self, node: ReturnStatement) -> None:
+        """Compile a return statement."""
+        # Emit pending finally blocks before the return
+        self._emit_pending_finally_blocks()
 
-            self._patch_jump(jump_end)
-            self._emit(OpCode.POP)  # Pop discriminant
+        if node.argument:
+            self._compile_expression(node.argument)
+            self._emit(OpCode.RETURN)
+        else:
+            self._emit(OpCode.RETURN_UNDEFINED)
 
-            # Patch jumps to case bodies
-            for pos, idx in jump_to_body:
-                self._patch_jump(pos, case_positions[idx])
-            if default_jump:
-                pos, idx = default_jump
-                self._patch_jump(pos, case_positions[idx])
+    def _compile_ThrowStatement(self, node: ThrowStatement) -> None:
+        """Compile a throw statement."""
+        self._set_loc(node)  # Record location of throw statement
+        self._compile_expression(node.argument)
+        self._emit(OpCode.THROW)
+
+    def _compile_TryStatement(self, node: TryStatement) -> None:
+        """Compile a try statement."""
+        # Push TryContext if there's a finally block so break/continue/return
+        # can inline the finally code
+        if node.finalizer:
+            self.try_stack.append(TryContext(finalizer=node.finalizer))
+
+        # Try block
+        try_start = self._emit_jump(OpCode.TRY_START)
+
+        self._compile_statement(node.block)
+        self._emit(OpCode.TRY_END)
+
+        # Jump past exception handler to normal finally
+        jump_to_finally = self._emit_jump(OpCode.JUMP)
+
+        # Exception handler
+        self._patch_jump(try_start)
+        if node.handler:
+            # Has catch block
+            self._emit(OpCode.CATCH)
+            # Store exception in catch variable
+            name = node.handler.param.name
+            self._add_local(name)
+            slot = self._get_local(name)
+            self._emit(OpCode.STORE_LOCAL, slot)
+            self._emit(OpCode.POP)
+            self._compile_statement(node.handler.body)
+            # Fall through to finally
+        elif node.finalizer:
+            # No catch, only finally - exception is on stack
+            # Run finally then rethrow
+            self._compile_statement(node.finalizer)
+            self._emit(OpCode.THROW)  # Rethrow the exception
+
+        # Pop TryContext before compiling normal finally
+        if node.finalizer:
+            self.try_stack.pop()
+
+        # Normal finally block (after try completes normally or after catch)
+        self._patch_jump(jump_to_finally)
+        if node.finalizer:
+            self._compile_statement(node.finalizer)
+
+    def _compile_SwitchStatement(self, node: SwitchStatement) -> None:
+        """Compile a switch statement."""
+        self._compile_expression(node.discriminant)
+
+        jump_to_body: List[Tuple[int, int]] = []
+        default_jump = None
+
+        # Compile case tests
+        for i, case in enumerate(node.cases):
+            if case.test:
+                self._emit(OpCode.DUP)
+                self._compile_expression(case.test)
+                self._emit(OpCode.SEQ)
+                pos = self._emit_jump(OpCode.JUMP_IF_TRUE)
+                jump_to_body.append((pos, i))
+            else:
+                default_jump = (self._emit_jump(OpCode.JUMP), i)
 
-            # Patch break jumps
-            for pos in loop_ctx.break_jumps:
-                self._patch_jump(pos)
+        # Jump to end if no match
+        jump_end = self._emit_jump(OpCode.JUMP)
 
-            self.loop_stack.pop()
+        # Case bodies
+        case_positions = []
+        loop_ctx = LoopContext(is_loop=False)  # For break statements only
+        self.loop_stack.append(loop_ctx)
 
-        elif isinstance(node, FunctionDeclaration):
-            # Compile function
-            func = self._compile_function(node.id.name, node.params, node.body)
-            func_idx = len(self.functions)
-            self.functions.append(func)
+        for i, case in enumerate(node.cases):
+            case_positions.append(len(self.bytecode))
+            for stmt in case.consequent:
+                self._compile_statement(stmt)
 
-            const_idx = self._add_constant(func)
-            self._emit(OpCode.LOAD_CONST, const_idx)
-            self._emit(OpCode.MAKE_CLOSURE, func_idx)
+        self._patch_jump(jump_end)
+        self._emit(OpCode.POP)  # Pop discriminant
 
-            name = node.id.name
-            if self._in_function:
-                # Inside function: use local or cell variable
-                cell_idx = self._get_cell_var(name)
-                if cell_idx is not None:
-                    # Variable is captured - store in cell
-                    self._emit(OpCode.STORE_CELL, cell_idx)
-                else:
-                    # Regular local
-                    self._add_local(name)
-                    slot = self._get_local(name)
-                    self._emit(OpCode.STORE_LOCAL, slot)
-            else:
-                # At program level: use global variable
-                idx = self._add_name(name)
-                self._emit(OpCode.STORE_NAME, idx)
-            self._emit(OpCode.POP)
+        # Patch jumps to case bodies
+        for pos, idx in jump_to_body:
+            self._patch_jump(pos, case_positions[idx])
+        if default_jump:
+            pos, idx = default_jump
+            self._patch_jump(pos, case_positions[idx])
 
-        elif isinstance(node, LabeledStatement):
-            # Create a loop context for the label
-            # is_loop=False so unlabeled break/continue skip this context
-            loop_ctx = LoopContext(label=node.label.name, is_loop=False)
-            self.loop_stack.append(loop_ctx)
+        # Patch break jumps
+        for pos in loop_ctx.break_jumps:
+            self._patch_jump(pos)
 
-            # Compile the labeled body
-            self._compile_statement(node.body)
+        self.loop_stack.pop()
 
-            # Patch break jumps that target this label
-            for pos in loop_ctx.break_jumps:
-                self._patch_jump(pos)
+    def _compile_FunctionDeclaration(self, node: FunctionDeclaration) -> None:
+        """Compile a function declaration."""
+        # Compile function
+        func = self._compile_function(node.id.name, node.params, node.body)
+        func_idx = len(self.functions)
+        self.functions.append(func)
 
-            self.loop_stack.pop()
+        const_idx = self._add_constant(func)
+        self._emit(OpCode.LOAD_CONST, const_idx)
+        self._emit(OpCode.MAKE_CLOSURE, func_idx)
 
+        name = node.id.name
+        if self._in_function:
+            # Inside function: use local or cell variable
+            self._add_local(name)
+            self._emit_store_var(name)
         else:
-            raise NotImplementedError(
-                f"Cannot compile statement: {type(node).__name__}"
-            )
+            # At program level: use global variable
+            idx = self._add_name(name)
+            self._emit(OpCode.STORE_NAME, idx)
+        self._emit(OpCode.POP)
+
+    def _compile_LabeledStatement(self, node: LabeledStatement) -> None:
+        """Compile a labeled statement."""
+        # Create a loop context for the label
+        # is_loop=False so unlabeled break/continue skip this context
+        loop_ctx = LoopContext(label=node.label.name, is_loop=False)
+        self.loop_stack.append(loop_ctx)
+
+        # Compile the labeled body
+        self._compile_statement(node.body)
+
+        # Patch break jumps that target this label
+        for pos in loop_ctx.break_jumps:
+            self._patch_jump(pos)
+
+        self.loop_stack.pop()
 
     def _compile_statement_for_value(self, node: Node) -> None:
         """Compile a statement leaving its completion value on the stack.
@@ -915,54 +1345,6 @@ class Compiler:
             self._compile_statement(node)
             self._emit(OpCode.LOAD_UNDEFINED)
 
-    def _find_required_free_vars(self, body: Node, local_vars: set) -> set:
-        """Find all free variables required by this function including pass-through.
-
-        This scans the function body for:
-        1. Direct identifier references to outer scope variables
-        2. Nested functions that need outer scope variables (pass-through)
-        """
-        free_vars = set()
-
-        def visit(node):
-            if isinstance(node, Identifier):
-                if node.name not in local_vars and self._is_in_outer_scope(node.name):
-                    free_vars.add(node.name)
-            elif isinstance(
-                node, (FunctionDeclaration, FunctionExpression, ArrowFunctionExpression)
-            ):
-                # Check nested function's free vars - we need to pass through
-                # any outer scope vars that aren't our locals
-                nested_params = {p.name for p in node.params}
-                nested_locals = nested_params.copy()
-                nested_locals.add("arguments")
-                if isinstance(node.body, BlockStatement):
-                    self._collect_var_decls(node.body, nested_locals)
-                nested_free = self._find_required_free_vars(node.body, nested_locals)
-                for var in nested_free:
-                    if var not in local_vars and self._is_in_outer_scope(var):
-                        free_vars.add(var)
-            elif isinstance(node, BlockStatement):
-                for stmt in node.body:
-                    visit(stmt)
-            elif hasattr(node, "__dict__"):
-                for value in node.__dict__.values():
-                    if isinstance(value, Node):
-                        visit(value)
-                    elif isinstance(value, list):
-                        for item in value:
-                            if isinstance(item, Node):
-                                visit(item)
-
-        if isinstance(body, BlockStatement):
-            for stmt in body.body:
-                visit(stmt)
-        else:
-            # Expression body
-            visit(body)
-
-        return free_vars
-
     def _compile_arrow_function(
         self, node: ArrowFunctionExpression
     ) -> CompiledFunction:
@@ -970,35 +1352,37 @@ class Compiler:
         # Save current state
         old_bytecode = self.bytecode
         old_constants = self.constants
+        old_constant_index = self._constant_index
         old_locals = self.locals
         old_loop_stack = self.loop_stack
         old_in_function = self._in_function
         old_free_vars = self._free_vars
         old_cell_vars = self._cell_vars
+        old_local_index = self._local_index
+        old_free_index = self._free_index
+        old_cell_index = self._cell_index
+        old_var_cache = self._var_cache
 
-        # Push current locals to outer scope stack (for closure resolution)
-        if self._in_function:
-            self._outer_locals.append(old_locals[:])
+        # Work out locals, captured (cell) and free variables in one pass
+        analysis = self._analyze_function_body(node.body, node.params)
+
+        # Push current locals to outer scope stack (for closure resolution).
+        # A function with no free variables never looks outside itself.
+        pushed_outer = self._in_function and bool(analysis.free)
+        if pushed_outer:
+            self._outer_locals.append(old_locals)
 
         # New state for function
-        self.bytecode = []
+        self.bytecode = bytearray()
         self.constants = []
+        self._constant_index = {}
+        self._var_cache = {}
         self.locals = [p.name for p in node.params] + ["arguments"]
+        self._local_index = _index_names(self.locals)
         self.loop_stack = []
         self._in_function = True
 
-        # Collect all var declarations to know the full locals set
-        local_vars_set = set(self.locals)
-        if isinstance(node.body, BlockStatement):
-            self._collect_var_decls(node.body, local_vars_set)
-
-        # Find variables captured by inner functions
-        captured = self._find_captured_vars(node.body, local_vars_set)
-        self._cell_vars = list(captured)
-
-        # Find all free variables needed
-        required_free = self._find_required_free_vars(node.body, local_vars_set)
-        self._free_vars = list(required_free)
+        self._resolve_scope(analysis, set(self.locals) | analysis.declared)
 
         if node.expression:
             # Expression body: compile expression and return it
@@ -1014,26 +1398,31 @@ class Compiler:
         func = CompiledFunction(
             name="",  # Arrow functions are anonymous
             params=[p.name for p in node.params],
-            bytecode=bytes(self.bytecode),
+            bytecode=bytes(_peephole(self.bytecode)),
             constants=self.constants,
             locals=self.locals,
             num_locals=len(self.locals),
-            free_vars=self._free_vars[:],
-            cell_vars=self._cell_vars[:],
+            free_vars=self._free_vars,
+            cell_vars=self._cell_vars,
         )
 
         # Pop outer scope if we pushed it
-        if old_in_function:
+        if pushed_outer:
             self._outer_locals.pop()
 
         # Restore state
         self.bytecode = old_bytecode
         self.constants = old_constants
+        self._constant_index = old_constant_index
         self.locals = old_locals
         self.loop_stack = old_loop_stack
         self._in_function = old_in_function
         self._free_vars = old_free_vars
         self._cell_vars = old_cell_vars
+        self._local_index = old_local_index
+        self._free_index = old_free_index
+        self._cell_index = old_cell_index
+        self._var_cache = old_var_cache
 
         return func
 
@@ -1055,20 +1444,32 @@ class Compiler:
         # Save current state
         old_bytecode = self.bytecode
         old_constants = self.constants
+        old_constant_index = self._constant_index
         old_locals = self.locals
         old_loop_stack = self.loop_stack
         old_in_function = self._in_function
         old_free_vars = self._free_vars
         old_cell_vars = self._cell_vars
+        old_local_index = self._local_index
+        old_free_index = self._free_index
+        old_cell_index = self._cell_index
+        old_var_cache = self._var_cache
 
-        # Push current locals to outer scope stack (for closure resolution)
-        if self._in_function:
-            self._outer_locals.append(old_locals[:])
+        # Work out locals, captured (cell) and free variables in one pass
+        analysis = self._analyze_function_body(body, params)
+
+        # Push current locals to outer scope stack (for closure resolution).
+        # A function with no free variables never looks outside itself.
+        pushed_outer = self._in_function and bool(analysis.free)
+        if pushed_outer:
+            self._outer_locals.append(old_locals)
 
         # New state for function
         # Locals: params first, then 'arguments' reserved slot
-        self.bytecode = []
+        self.bytecode = bytearray()
         self.constants = []
+        self._constant_index = {}
+        self._var_cache = {}
         self.locals = [p.name for p in params] + ["arguments"]
 
         # For named function expressions, add the function name as a local
@@ -1079,28 +1480,13 @@ class Compiler:
         self.loop_stack = []
         self._in_function = True
 
-        # Collect all var declarations to know the full locals set
-        local_vars_set = set(self.locals)
-        self._collect_var_decls(body, local_vars_set)
+        local_vars_set = set(self.locals) | analysis.declared
         # Update locals list with collected vars
-        for var in local_vars_set:
+        for var in sorted(analysis.declared):
             if var not in self.locals:
                 self.locals.append(var)
-
-        # Push current locals to outer scope stack BEFORE finding free vars
-        # This is needed so nested functions can find their outer variables
-        self._outer_locals.append(self.locals[:])
-
-        # Find variables captured by inner functions
-        captured = self._find_captured_vars(body, local_vars_set)
-        self._cell_vars = list(captured)
-
-        # Find all free variables needed (including pass-through for nested functions)
-        required_free = self._find_required_free_vars(body, local_vars_set)
-        self._free_vars = list(required_free)
-
-        # Pop the outer scope we pushed
-        self._outer_locals.pop()
+        self._local_index = _index_names(self.locals)
+        self._resolve_scope(analysis, local_vars_set)
 
         # Compile function body
         for stmt in body.body:
@@ -1112,481 +1498,462 @@ class Compiler:
         func = CompiledFunction(
             name=name,
             params=[p.name for p in params],
-            bytecode=bytes(self.bytecode),
+            bytecode=bytes(_peephole(self.bytecode)),
             constants=self.constants,
             locals=self.locals,
             num_locals=len(self.locals),
-            free_vars=self._free_vars[:],
-            cell_vars=self._cell_vars[:],
+            free_vars=self._free_vars,
+            cell_vars=self._cell_vars,
         )
 
         # Pop outer scope if we pushed it
-        if old_in_function:
+        if pushed_outer:
             self._outer_locals.pop()
 
         # Restore state
         self.bytecode = old_bytecode
         self.constants = old_constants
+        self._constant_index = old_constant_index
         self.locals = old_locals
         self.loop_stack = old_loop_stack
         self._in_function = old_in_function
         self._free_vars = old_free_vars
         self._cell_vars = old_cell_vars
+        self._local_index = old_local_index
+        self._free_index = old_free_index
+        self._cell_index = old_cell_index
+        self._var_cache = old_var_cache
 
         return func
 
-    # ---- Expressions ----
+    # ---- Constant folding ----
 
-    def _compile_expression(self, node: Node) -> None:
-        """Compile an expression."""
-        if isinstance(node, NumericLiteral):
-            idx = self._add_constant(node.value)
-            self._emit(OpCode.LOAD_CONST, idx)
+    def _fold(self, node: Node) -> Node:
+        """Fold constant sub-expressions of node at compile time.
 
-        elif isinstance(node, StringLiteral):
-            idx = self._add_constant(node.value)
-            self._emit(OpCode.LOAD_CONST, idx)
+        Returns a literal node when the expression only involves literals,
+        the surviving branch of a logical/conditional expression whose test
+        is a literal, or node itself when nothing can be folded.
+        """
+        node_type = type(node)
+        if node_type not in _FOLDABLE_TYPES:
+            return node
+        # Results are cached so that folding a chain like a + b + c and then
+        # compiling each level of it doesn't re-walk the whole chain each time
+        cached = self._fold_cache.get(id(node))
+        if cached is not None:
+            return cached
+
+        result = node
+        if node_type is BinaryExpression:
+            # Fold a left-nested chain (a + b + c + ...) from the bottom up so
+            # that each level finds its left operand already in the cache
+            # instead of recursing down the whole chain
+            spine = []
+            current = node.left
+            while (
+                type(current) is BinaryExpression
+                and id(current) not in self._fold_cache
+            ):
+                spine.append(current)
+                current = current.left
+            for binary in reversed(spine):
+                self._fold(binary)
+
+            left = _literal_value(self._fold(node.left))
+            right = _literal_value(self._fold(node.right))
+            if left is not _NOT_CONSTANT and right is not _NOT_CONSTANT:
+                value = _fold_binary(node.operator, left, right)
+                result = _make_literal(value, node) or node
+
+        elif node_type is UnaryExpression:
+            value = _literal_value(self._fold(node.argument))
+            if value is not _NOT_CONSTANT:
+                value = _fold_unary(node.operator, value)
+                result = _make_literal(value, node) or node
+
+        elif node_type is LogicalExpression:
+            left = self._fold(node.left)
+            value = _literal_value(left)
+            if value is not _NOT_CONSTANT:
+                # Only one side can ever be evaluated - drop the other
+                if to_boolean(value) == (node.operator == "&&"):
+                    result = self._fold(node.right)
+                else:
+                    result = left
 
-        elif isinstance(node, BooleanLiteral):
-            if node.value:
-                self._emit(OpCode.LOAD_TRUE)
-            else:
-                self._emit(OpCode.LOAD_FALSE)
-
-        elif isinstance(node, NullLiteral):
-            self._emit(OpCode.LOAD_NULL)
-
-        elif isinstance(node, RegexLiteral):
-            # Store (pattern, flags) tuple as constant
-            idx = self._add_constant((node.pattern, node.flags))
-            self._emit(OpCode.BUILD_REGEX, idx)
-
-        elif isinstance(node, Identifier):
-            name = node.name
-            # Check if it's a cell var (local that's captured by inner function)
-            cell_slot = self._get_cell_var(name)
-            if cell_slot is not None:
-                self._emit(OpCode.LOAD_CELL, cell_slot)
-            else:
-                slot = self._get_local(name)
-                if slot is not None:
-                    self._emit(OpCode.LOAD_LOCAL, slot)
+        else:  # ConditionalExpression
+            value = _literal_value(self._fold(node.test))
+            if value is not _NOT_CONSTANT:
+                if to_boolean(value):
+                    result = self._fold(node.consequent)
                 else:
-                    # Check if it's a free variable (from outer scope)
-                    closure_slot = self._get_free_var(name)
-                    if closure_slot is not None:
-                        self._emit(OpCode.LOAD_CLOSURE, closure_slot)
-                    else:
-                        idx = self._add_name(name)
-                        self._emit(OpCode.LOAD_NAME, idx)
+                    result = self._fold(node.alternate)
 
-        elif isinstance(node, ThisExpression):
-            self._emit(OpCode.THIS)
+        self._fold_cache[id(node)] = result
+        return result
 
-        elif isinstance(node, ArrayExpression):
-            # Handle arrays using a stack-based approach to avoid deep recursion
-            # Stack entries: ('ARRAY', array_node, elem_index) or ('BUILD', num_elements)
-            work_stack = [("ARRAY", node, 0)]
+    # ---- Expressions ----
 
-            while work_stack:
-                entry = work_stack.pop()
+    def _compile_expression(self, node: Node) -> None:
+        """Compile an expression.
 
-                if entry[0] == "BUILD":
-                    # Build an array with the given number of elements
-                    self._emit(OpCode.BUILD_ARRAY, entry[1])
+        Binary and plain unary operators are compiled from a worklist rather
+        than by recursion: the operands are pushed as nodes to visit, on top
+        of the opcode to emit once they have been compiled. Everything else
+        goes to its _compile_<Type> method.
+        """
+        worklist: List[Any] = [node]
+        while worklist:
+            item = worklist.pop()
+            if type(item) is OpCode:
+                self._emit(item)
+                continue
+
+            item = self._fold(item)
+            item_type = type(item)
+            if item_type is BinaryExpression:
+                opcode = _BINARY_OP_MAP.get(item.operator)
+                if opcode is None:
+                    raise NotImplementedError(f"Binary operator: {item.operator}")
+                worklist += (opcode, item.right, item.left)
+                continue
+            if (
+                item_type is UnaryExpression
+                and item.operator in _UNARY_OP_MAP
+                and not (
+                    item.operator == "typeof" and type(item.argument) is Identifier
+                )
+            ):
+                worklist += (_UNARY_OP_MAP[item.operator], item.argument)
+                continue
 
-                elif entry[0] == "ARRAY":
-                    array_node, idx = entry[1], entry[2]
-                    elements = array_node.elements
+            handler = self._expression_dispatch.get(item_type)
+            if handler is None:
+                handler = self._find_handler(
+                    self._expression_dispatch, item, "expression"
+                )
+            handler(item)
+
+    def _compile_NumericLiteral(self, node: NumericLiteral) -> None:
+        """Compile a numeric literal."""
+        value = node.value
+        if type(value) is int and -128 <= value <= 127:
+            # Small ints are stored in the instruction, not the constant pool
+            self._emit(OpCode.LOAD_SMALL_INT, value & 0xFF)
+        else:
+            idx = self._add_constant(value)
+            self._emit(OpCode.LOAD_CONST, idx)
 
-                    if idx >= len(elements):
-                        # All elements compiled, build the array
-                        self._emit(OpCode.BUILD_ARRAY, len(elements))
-                    else:
-                        elem = elements[idx]
-                        # Schedule next element
-                        work_stack.append(("ARRAY", array_node, idx + 1))
-
-                        if isinstance(elem, ArrayExpression):
-                            # Process nested array first
-                            work_stack.append(("ARRAY", elem, 0))
-                        else:
-                            # Compile non-array element directly
-                            self._compile_expression(elem)
-
-        elif isinstance(node, ObjectExpression):
-            for prop in node.properties:
-                # Key
-                if isinstance(prop.key, Identifier):
-                    idx = self._add_constant(prop.key.name)
-                    self._emit(OpCode.LOAD_CONST, idx)
-                else:
-                    self._compile_expression(prop.key)
-                # Kind (for getters/setters)
-                kind_idx = self._add_constant(prop.kind)
-                self._emit(OpCode.LOAD_CONST, kind_idx)
-                # Value
-                self._compile_expression(prop.value)
-            self._emit(OpCode.BUILD_OBJECT, len(node.properties))
-
-        elif isinstance(node, UnaryExpression):
-            # Special case for typeof with identifier - must not throw for undeclared vars
-            if node.operator == "typeof" and isinstance(node.argument, Identifier):
-                name = node.argument.name
-                # Check for local, cell, or closure vars first
-                local_slot = self._get_local(name)
-                cell_slot = self._get_cell_var(name)
-                closure_slot = self._get_free_var(name)
-                if local_slot is not None:
-                    self._emit(OpCode.LOAD_LOCAL, local_slot)
-                    self._emit(OpCode.TYPEOF)
-                elif cell_slot is not None:
-                    self._emit(OpCode.LOAD_CELL, cell_slot)
-                    self._emit(OpCode.TYPEOF)
-                elif closure_slot is not None:
-                    self._emit(OpCode.LOAD_CLOSURE, closure_slot)
-                    self._emit(OpCode.TYPEOF)
+    def _compile_StringLiteral(self, node: StringLiteral) -> None:
+        """Compile a string literal."""
+        idx = self._add_constant(node.value)
+        self._emit(OpCode.LOAD_CONST, idx)
+
+    def _compile_BooleanLiteral(self, node: BooleanLiteral) -> None:
+        """Compile a boolean literal."""
+        if node.value:
+            self._emit(OpCode.LOAD_TRUE)
+        else:
+            self._emit(OpCode.LOAD_FALSE)
+
+    def _compile_NullLiteral(self, node: NullLiteral) -> None:
+        """Compile a null literal."""
+        self._emit(OpCode.LOAD_NULL)
+
+    def _compile_RegexLiteral(self, node: RegexLiteral) -> None:
+        """Compile a regex literal."""
+        # Store (pattern, flags) tuple as constant
+        idx = self._add_constant((node.pattern, node.flags))
+        self._emit(OpCode.BUILD_REGEX, idx)
+
+    def _compile_Identifier(self, node: Identifier) -> None:
+        """Compile an identifier."""
+        self._emit_load_var(node.name)
+
+    def _compile_ThisExpression(self, node: ThisExpression) -> None:
+        """Compile a this expression."""
+        self._emit(OpCode.THIS)
+
+    def _compile_ArrayExpression(self, node: ArrayExpression) -> None:
+        """Compile an array expression."""
+        # Handle arrays using a stack-based approach to avoid deep recursion
+        # Stack entries: ('ARRAY', array_node, elem_index) or ('BUILD', num_elements)
+        work_stack = [("ARRAY", node, 0)]
+
+        while work_stack:
+            entry = work_stack.pop()
+
+            if entry[0] == "BUILD":
+                # Build an array with the given number of elements
+                self._emit(OpCode.BUILD_ARRAY, entry[1])
+
+            elif entry[0] == "ARRAY":
+                array_node, idx = entry[1], entry[2]
+                elements = array_node.elements
+
+                if idx >= len(elements):
+                    # All elements compiled, build the array
+                    self._emit(OpCode.BUILD_ARRAY, len(elements))
                 else:
-                    # Use TYPEOF_NAME for global lookup - won't throw if undefined
-                    idx = self._add_constant(name)
-                    self._emit(OpCode.TYPEOF_NAME, idx)
-            elif node.operator == "delete":
-                # Handle delete specially - don't compile argument normally
-                if isinstance(node.argument, MemberExpression):
-                    # Compile as delete operation
-                    self._compile_expression(node.argument.object)
-                    if node.argument.computed:
-                        self._compile_expression(node.argument.property)
+                    elem = elements[idx]
+                    # Schedule next element
+                    work_stack.append(("ARRAY", array_node, idx + 1))
+
+                    if isinstance(elem, ArrayExpression):
+                        # Process nested array first
+                        work_stack.append(("ARRAY", elem, 0))
                     else:
-                        idx = self._add_constant(node.argument.property.name)
-                        self._emit(OpCode.LOAD_CONST, idx)
-                    self._emit(OpCode.DELETE_PROP)
-                else:
-                    self._emit(OpCode.LOAD_TRUE)  # delete on non-property returns true
-            elif node.operator == "void":
-                # void evaluates argument for side effects, returns undefined
-                self._compile_expression(node.argument)
-                self._emit(OpCode.POP)  # Discard the argument value
-                self._emit(OpCode.LOAD_UNDEFINED)
+                        # Compile non-array element directly
+                        self._compile_expression(elem)
+
+    def _compile_ObjectExpression(self, node: ObjectExpression) -> None:
+        """Compile an object expression."""
+        for prop in node.properties:
+            # Key
+            if isinstance(prop.key, Identifier):
+                idx = self._add_constant(prop.key.name)
+                self._emit(OpCode.LOAD_CONST, idx)
             else:
-                self._compile_expression(node.argument)
-                op_map = {
-                    "-": OpCode.NEG,
-                    "+": OpCode.POS,
-                    "!": OpCode.NOT,
-                    "~": OpCode.BNOT,
-                    "typeof": OpCode.TYPEOF,
-                }
-                if node.operator in op_map:
-                    self._emit(op_map[node.operator])
-                else:
-                    raise NotImplementedError(f"Unary operator: {node.operator}")
-
-        elif isinstance(node, UpdateExpression):
-            # ++x or x++
-            if isinstance(node.argument, Identifier):
-                name = node.argument.name
-                inc_op = OpCode.INC if node.operator == "++" else OpCode.DEC
-
-                # Check if it's a cell var (local that's captured by inner function)
-                cell_slot = self._get_cell_var(name)
-                if cell_slot is not None:
-                    self._emit(OpCode.LOAD_CELL, cell_slot)
-                    if node.prefix:
-                        self._emit(inc_op)
-                        self._emit(OpCode.DUP)
-                        self._emit(OpCode.STORE_CELL, cell_slot)
-                        self._emit(OpCode.POP)
-                    else:
-                        self._emit(OpCode.DUP)
-                        self._emit(inc_op)
-                        self._emit(OpCode.STORE_CELL, cell_slot)
-                        self._emit(OpCode.POP)
-                else:
-                    slot = self._get_local(name)
-                    if slot is not None:
-                        self._emit(OpCode.LOAD_LOCAL, slot)
-                        if node.prefix:
-                            self._emit(inc_op)
-                            self._emit(OpCode.DUP)
-                            self._emit(OpCode.STORE_LOCAL, slot)
-                            self._emit(OpCode.POP)
-                        else:
-                            self._emit(OpCode.DUP)
-                            self._emit(inc_op)
-                            self._emit(OpCode.STORE_LOCAL, slot)
-                            self._emit(OpCode.POP)
-                    else:
-                        # Check if it's a free variable (from outer scope)
-                        closure_slot = self._get_free_var(name)
-                        if closure_slot is not None:
-                            self._emit(OpCode.LOAD_CLOSURE, closure_slot)
-                            if node.prefix:
-                                self._emit(inc_op)
-                                self._emit(OpCode.DUP)
-                                self._emit(OpCode.STORE_CLOSURE, closure_slot)
-                                self._emit(OpCode.POP)
-                            else:
-                                self._emit(OpCode.DUP)
-                                self._emit(inc_op)
-                                self._emit(OpCode.STORE_CLOSURE, closure_slot)
-                                self._emit(OpCode.POP)
-                        else:
-                            idx = self._add_name(name)
-                            self._emit(OpCode.LOAD_NAME, idx)
-                            if node.prefix:
-                                self._emit(inc_op)
-                                self._emit(OpCode.DUP)
-                                self._emit(OpCode.STORE_NAME, idx)
-                                self._emit(OpCode.POP)
-                            else:
-                                self._emit(OpCode.DUP)
-                                self._emit(inc_op)
-                                self._emit(OpCode.STORE_NAME, idx)
-                                self._emit(OpCode.POP)
-            elif isinstance(node.argument, MemberExpression):
-                # a.x++ or arr[i]++
-                inc_op = OpCode.INC if node.operator == "++" else OpCode.DEC
-
-                # Compile object
+                self._compile_expression(prop.key)
+            # Kind (for getters/setters)
+            kind_idx = self._add_constant(prop.kind)
+            self._emit(OpCode.LOAD_CONST, kind_idx)
+            # Value
+            self._compile_expression(prop.value)
+        self._emit(OpCode.BUILD_OBJECT, len(node.properties))
+
+    def _compile_UnaryExpression(self, node: UnaryExpression) -> None:
+        """Compile a unary expression."""
+        # Special case for typeof with identifier - must not throw for undeclared vars
+        if node.operator == "typeof" and isinstance(node.argument, Identifier):
+            kind, idx = self._resolve_var(node.argument.name)
+            if kind == "name":
+                # Use TYPEOF_NAME for global lookup - won't throw if undefined
+                self._emit(OpCode.TYPEOF_NAME, idx)
+            else:
+                self._emit(_LOAD_OPS[kind], idx)
+                self._emit(OpCode.TYPEOF)
+        elif node.operator == "delete":
+            # Handle delete specially - don't compile argument normally
+            if isinstance(node.argument, MemberExpression):
+                # Compile as delete operation
                 self._compile_expression(node.argument.object)
-                # Compile property (or load constant)
                 if node.argument.computed:
                     self._compile_expression(node.argument.property)
                 else:
                     idx = self._add_constant(node.argument.property.name)
                     self._emit(OpCode.LOAD_CONST, idx)
-
-                # Stack: [obj, prop]
-                self._emit(OpCode.DUP2)  # [obj, prop, obj, prop]
-                self._emit(OpCode.GET_PROP)  # [obj, prop, old_value]
-
-                if node.prefix:
-                    # ++a.x: return new value
-                    self._emit(inc_op)  # [obj, prop, new_value]
-                    self._emit(OpCode.DUP)  # [obj, prop, new_value, new_value]
-                    # Rearrange: [obj, prop, nv, nv] -> [nv, obj, prop, nv]
-                    self._emit(OpCode.ROT4)  # [prop, nv, nv, obj]
-                    self._emit(OpCode.ROT4)  # [nv, nv, obj, prop]
-                    self._emit(OpCode.ROT4)  # [nv, obj, prop, nv]
-                    self._emit(OpCode.SET_PROP)  # [nv, nv]
-                    self._emit(OpCode.POP)  # [nv]
-                else:
-                    # a.x++: return old value
-                    self._emit(OpCode.DUP)  # [obj, prop, old_value, old_value]
-                    self._emit(inc_op)  # [obj, prop, old_value, new_value]
-                    # Rearrange: [obj, prop, old_value, new_value] -> [old_value, obj, prop, new_value]
-                    self._emit(OpCode.SWAP)  # [obj, prop, new_value, old_value]
-                    self._emit(OpCode.ROT4)  # [prop, new_value, old_value, obj]
-                    self._emit(OpCode.ROT4)  # [new_value, old_value, obj, prop]
-                    self._emit(OpCode.ROT4)  # [old_value, obj, prop, new_value]
-                    self._emit(OpCode.SET_PROP)  # [old_value, new_value]
-                    self._emit(OpCode.POP)  # [old_value]
+                self._emit(OpCode.DELETE_PROP)
             else:
-                raise NotImplementedError("Update expression on non-identifier")
-
-        elif isinstance(node, BinaryExpression):
-            self._compile_expression(node.left)
-            self._compile_expression(node.right)
-            op_map = {
-                "+": OpCode.ADD,
-                "-": OpCode.SUB,
-                "*": OpCode.MUL,
-                "/": OpCode.DIV,
-                "%": OpCode.MOD,
-                "**": OpCode.POW,
-                "&": OpCode.BAND,
-                "|": OpCode.BOR,
-                "^": OpCode.BXOR,
-                "<<": OpCode.SHL,
-                ">>": OpCode.SHR,
-                ">>>": OpCode.USHR,
-                "<": OpCode.LT,
-                "<=": OpCode.LE,
-                ">": OpCode.GT,
-                ">=": OpCode.GE,
-                "==": OpCode.EQ,
-                "!=": OpCode.NE,
-                "===": OpCode.SEQ,
-                "!==": OpCode.SNE,
-                "in": OpCode.IN,
-                "instanceof": OpCode.INSTANCEOF,
-            }
-            if node.operator in op_map:
-                self._emit(op_map[node.operator])
+                self._emit(OpCode.LOAD_TRUE)  # delete on non-property returns true
+        elif node.operator == "void":
+            # void evaluates argument for side effects, returns undefined
+            self._compile_expression(node.argument)
+            self._emit(OpCode.POP)  # Discard the argument value
+            self._emit(OpCode.LOAD_UNDEFINED)
+        else:
+            self._compile_expression(node.argument)
+            opcode = _UNARY_OP_MAP.get(node.operator)
+            if opcode is None:
+                raise NotImplementedError(f"Unary operator: {node.operator}")
+            self._emit(opcode)
+
+    def _compile_UpdateExpression(self, node: UpdateExpression) -> None:
+        """Compile an update expression."""
+        # ++x or x++
+        if isinstance(node.argument, Identifier):
+            name = node.argument.name
+            inc_op = OpCode.INC if node.operator == "++" else OpCode.DEC
+            kind, idx = self._resolve_var(name)
+            self._emit(_LOAD_OPS[kind], idx)
+            if node.prefix:
+                self._emit(inc_op)
+                self._emit(OpCode.DUP)
             else:
-                raise NotImplementedError(f"Binary operator: {node.operator}")
-
-        elif isinstance(node, LogicalExpression):
-            self._compile_expression(node.left)
-            if node.operator == "&&":
-                # Short-circuit AND
+                # x++ evaluates to the old value converted to a number
+                self._emit(OpCode.POS)
                 self._emit(OpCode.DUP)
-                jump_false = self._emit_jump(OpCode.JUMP_IF_FALSE)
-                self._emit(OpCode.POP)
+                self._emit(inc_op)
+            self._emit(_STORE_OPS[kind], idx)
+            self._emit(OpCode.POP)
+        elif isinstance(node.argument, MemberExpression):
+            # a.x++ or arr[i]++
+            inc_op = OpCode.INC if node.operator == "++" else OpCode.DEC
+
+            # Compile object
+            self._compile_expression(node.argument.object)
+            # Compile property (or load constant)
+            if node.argument.computed:
+                self._compile_expression(node.argument.property)
+            else:
+                idx = self._add_constant(node.argument.property.name)
+                self._emit(OpCode.LOAD_CONST, idx)
+
+            # Stack: [obj, prop]
+            self._emit(OpCode.DUP2)  # [obj, prop, obj, prop]
+            self._emit(OpCode.GET_PROP)  # [obj, prop, old_value]
+
+            if node.prefix:
+                # ++a.x: return new value
+                self._emit(inc_op)  # [obj, prop, new_value]
+                self._emit(OpCode.DUP)  # [obj, prop, new_value, new_value]
+                # Rearrange: [obj, prop, nv, nv] -> [nv, obj, prop, nv]
+                self._emit(OpCode.ROT4)  # [prop, nv, nv, obj]
+                self._emit(OpCode.ROT4)  # [nv, nv, obj, prop]
+                self._emit(OpCode.ROT4)  # [nv, obj, prop, nv]
+                self._emit(OpCode.SET_PROP)  # [nv, nv]
+                self._emit(OpCode.POP)  # [nv]
+            else:
+                # a.x++: return old value, converted to a number
+                self._emit(OpCode.POS)  # [obj, prop, old_value]
+                self._emit(OpCode.DUP)  # [obj, prop, old_value, old_value]
+                self._emit(inc_op)  # [obj, prop, old_value, new_value]
+                # Rearrange: [obj, prop, old_value, new_value] -> [old_value, obj, prop, new_value]
+                self._emit(OpCode.SWAP)  # [obj, prop, new_value, old_value]
+                self._emit(OpCode.ROT4)  # [prop, new_value, old_value, obj]
+                self._emit(OpCode.ROT4)  # [new_value, old_value, obj, prop]
+                self._emit(OpCode.ROT4)  # [old_value, obj, prop, new_value]
+                self._emit(OpCode.SET_PROP)  # [old_value, new_value]
+                self._emit(OpCode.POP)  # [old_value]
+        else:
+            raise NotImplementedError("Update expression on non-identifier")
+
+    def _compile_LogicalExpression(self, node: LogicalExpression) -> None:
+        """Compile a logical expression."""
+        self._compile_expression(node.left)
+        if node.operator == "&&":
+            # Short-circuit AND
+            self._emit(OpCode.DUP)
+            jump_false = self._emit_jump(OpCode.JUMP_IF_FALSE)
+            self._emit(OpCode.POP)
+            self._compile_expression(node.right)
+            self._patch_jump(jump_false)
+        elif node.operator == "||":
+            # Short-circuit OR
+            self._emit(OpCode.DUP)
+            jump_true = self._emit_jump(OpCode.JUMP_IF_TRUE)
+            self._emit(OpCode.POP)
+            self._compile_expression(node.right)
+            self._patch_jump(jump_true)
+
+    def _compile_ConditionalExpression(self, node: ConditionalExpression) -> None:
+        """Compile a conditional expression."""
+        self._compile_expression(node.test)
+        jump_false = self._emit_jump(OpCode.JUMP_IF_FALSE)
+        self._compile_expression(node.consequent)
+        jump_end = self._emit_jump(OpCode.JUMP)
+        self._patch_jump(jump_false)
+        self._compile_expression(node.alternate)
+        self._patch_jump(jump_end)
+
+    def _compile_AssignmentExpression(self, node: AssignmentExpression) -> None:
+        """Compile an assignment expression."""
+        if isinstance(node.left, Identifier):
+            name = node.left.name
+            if node.operator == "=":
                 self._compile_expression(node.right)
-                self._patch_jump(jump_false)
-            elif node.operator == "||":
-                # Short-circuit OR
-                self._emit(OpCode.DUP)
-                jump_true = self._emit_jump(OpCode.JUMP_IF_TRUE)
-                self._emit(OpCode.POP)
+            else:
+                # Compound assignment - load current value first
+                self._emit_load_var(name)
                 self._compile_expression(node.right)
-                self._patch_jump(jump_true)
+                opcode = _COMPOUND_OP_MAP.get(node.operator)
+                if opcode is None:
+                    raise NotImplementedError(f"Assignment operator: {node.operator}")
+                self._emit(opcode)
 
-        elif isinstance(node, ConditionalExpression):
-            self._compile_expression(node.test)
-            jump_false = self._emit_jump(OpCode.JUMP_IF_FALSE)
-            self._compile_expression(node.consequent)
-            jump_end = self._emit_jump(OpCode.JUMP)
-            self._patch_jump(jump_false)
-            self._compile_expression(node.alternate)
-            self._patch_jump(jump_end)
+            self._emit(OpCode.DUP)
+            self._emit_store_var(name)
+            self._emit(OpCode.POP)
 
-        elif isinstance(node, AssignmentExpression):
-            if isinstance(node.left, Identifier):
-                name = node.left.name
-                if node.operator == "=":
-                    self._compile_expression(node.right)
-                else:
-                    # Compound assignment - load current value first
-                    cell_slot = self._get_cell_var(name)
-                    if cell_slot is not None:
-                        self._emit(OpCode.LOAD_CELL, cell_slot)
-                    else:
-                        slot = self._get_local(name)
-                        if slot is not None:
-                            self._emit(OpCode.LOAD_LOCAL, slot)
-                        else:
-                            closure_slot = self._get_free_var(name)
-                            if closure_slot is not None:
-                                self._emit(OpCode.LOAD_CLOSURE, closure_slot)
-                            else:
-                                idx = self._add_name(name)
-                                self._emit(OpCode.LOAD_NAME, idx)
-                    self._compile_expression(node.right)
-                    op = node.operator[:-1]  # Remove '='
-                    op_map = {
-                        "+": OpCode.ADD,
-                        "-": OpCode.SUB,
-                        "*": OpCode.MUL,
-                        "/": OpCode.DIV,
-                        "%": OpCode.MOD,
-                        "&": OpCode.BAND,
-                        "|": OpCode.BOR,
-                        "^": OpCode.BXOR,
-                        "<<": OpCode.SHL,
-                        ">>": OpCode.SHR,
-                        ">>>": OpCode.USHR,
-                    }
-                    self._emit(op_map[op])
+        elif isinstance(node.left, MemberExpression):
+            # obj.prop = value or obj[key] = value
+            self._compile_expression(node.left.object)
+            if node.left.computed:
+                self._compile_expression(node.left.property)
+            else:
+                idx = self._add_constant(node.left.property.name)
+                self._emit(OpCode.LOAD_CONST, idx)
+            self._compile_expression(node.right)
+            self._emit(OpCode.SET_PROP)
 
-                self._emit(OpCode.DUP)
-                cell_slot = self._get_cell_var(name)
-                if cell_slot is not None:
-                    self._emit(OpCode.STORE_CELL, cell_slot)
-                else:
-                    slot = self._get_local(name)
-                    if slot is not None:
-                        self._emit(OpCode.STORE_LOCAL, slot)
-                    else:
-                        closure_slot = self._get_free_var(name)
-                        if closure_slot is not None:
-                            self._emit(OpCode.STORE_CLOSURE, closure_slot)
-                        else:
-                            idx = self._add_name(name)
-                            self._emit(OpCode.STORE_NAME, idx)
+    def _compile_SequenceExpression(self, node: SequenceExpression) -> None:
+        """Compile a sequence expression."""
+        for i, expr in enumerate(node.expressions):
+            self._compile_expression(expr)
+            if i < len(node.expressions) - 1:
                 self._emit(OpCode.POP)
 
-            elif isinstance(node.left, MemberExpression):
-                # obj.prop = value or obj[key] = value
-                self._compile_expression(node.left.object)
-                if node.left.computed:
-                    self._compile_expression(node.left.property)
-                else:
-                    idx = self._add_constant(node.left.property.name)
-                    self._emit(OpCode.LOAD_CONST, idx)
-                self._compile_expression(node.right)
-                self._emit(OpCode.SET_PROP)
-
-        elif isinstance(node, SequenceExpression):
-            for i, expr in enumerate(node.expressions):
-                self._compile_expression(expr)
-                if i < len(node.expressions) - 1:
-                    self._emit(OpCode.POP)
-
-        elif isinstance(node, MemberExpression):
-            # Handle chained member access iteratively to avoid deep recursion
-            # e.g., a[0][0][0][0] creates a chain of MemberExpression nodes
-            access_chain = []
-            current = node
-
-            # Collect the chain of member accesses
-            while isinstance(current, MemberExpression):
-                access_chain.append((current.computed, current.property))
-                current = current.object
-
-            # Compile the base object
-            self._compile_expression(current)
-
-            # Apply each member access in order (chain is reversed)
-            for computed, prop in reversed(access_chain):
-                if computed:
-                    self._compile_expression(prop)
-                else:
-                    idx = self._add_constant(prop.name)
-                    self._emit(OpCode.LOAD_CONST, idx)
-                self._emit(OpCode.GET_PROP)
-
-        elif isinstance(node, CallExpression):
-            if isinstance(node.callee, MemberExpression):
-                # Method call: obj.method(args)
-                self._compile_expression(node.callee.object)
-                self._emit(OpCode.DUP)  # For 'this'
-                if node.callee.computed:
-                    self._compile_expression(node.callee.property)
-                else:
-                    idx = self._add_constant(node.callee.property.name)
-                    self._emit(OpCode.LOAD_CONST, idx)
-                self._emit(OpCode.GET_PROP)
-                for arg in node.arguments:
-                    self._compile_expression(arg)
-                self._emit(OpCode.CALL_METHOD, len(node.arguments))
+    def _compile_MemberExpression(self, node: MemberExpression) -> None:
+        """Compile a member expression."""
+        # Handle chained member access iteratively to avoid deep recursion
+        # e.g., a[0][0][0][0] creates a chain of MemberExpression nodes
+        access_chain = []
+        current = node
+
+        # Collect the chain of member accesses
+        while isinstance(current, MemberExpression):
+            access_chain.append((current.computed, current.property))
+            current = current.object
+
+        # Compile the base object
+        self._compile_expression(current)
+
+        # Apply each member access in order (chain is reversed)
+        for computed, prop in reversed(access_chain):
+            if computed:
+                self._compile_expression(prop)
             else:
-                # Regular call: f(args)
-                self._compile_expression(node.callee)
-                for arg in node.arguments:
-                    self._compile_expression(arg)
-                self._emit(OpCode.CALL, len(node.arguments))
-
-        elif isinstance(node, NewExpression):
-            self._compile_expression(node.callee)
+                idx = self._add_constant(prop.name)
+                self._emit(OpCode.LOAD_CONST, idx)
+            self._emit(OpCode.GET_PROP)
+
+    def _compile_CallExpression(self, node: CallExpression) -> None:
+        """Compile a call expression."""
+        if isinstance(node.callee, MemberExpression):
+            # Method call: obj.method(args)
+            self._compile_expression(node.callee.object)
+            self._emit(OpCode.DUP)  # For 'this'
+            if node.callee.computed:
+                self._compile_expression(node.callee.property)
+            else:
+                idx = self._add_constant(node.callee.property.name)
+                self._emit(OpCode.LOAD_CONST, idx)
+            self._emit(OpCode.GET_PROP)
             for arg in node.arguments:
                 self._compile_expression(arg)
-            self._emit(OpCode.NEW, len(node.arguments))
-
-        elif isinstance(node, FunctionExpression):
-            name = node.id.name if node.id else ""
-            func = self._compile_function(
-                name, node.params, node.body, is_expression=True
-            )
-            func_idx = len(self.functions)
-            self.functions.append(func)
-
-            const_idx = self._add_constant(func)
-            self._emit(OpCode.LOAD_CONST, const_idx)
-            self._emit(OpCode.MAKE_CLOSURE, func_idx)
-
-        elif isinstance(node, ArrowFunctionExpression):
-            func = self._compile_arrow_function(node)
-            func_idx = len(self.functions)
-            self.functions.append(func)
-
-            const_idx = self._add_constant(func)
-            self._emit(OpCode.LOAD_CONST, const_idx)
-            self._emit(OpCode.MAKE_CLOSURE, func_idx)
-
+            self._emit(OpCode.CALL_METHOD, len(node.arguments))
         else:
-            raise NotImplementedError(
-                f"Cannot compile expression: {type(node).__name__}"
-            )
+            # Regular call: f(args)
+            self._compile_expression(node.callee)
+            for arg in node.arguments:
+                self._compile_expression(arg)
+            self._emit(OpCode.CALL, len(node.arguments))
+
+    def _compile_NewExpression(self, node: NewExpression) -> None:
+        """Compile a new expression."""
+        self._compile_expression(node.callee)
+        for arg in node.arguments:
+            self._compile_expression(arg)
+        self._emit(OpCode.NEW, len(node.arguments))
+
+    def _compile_FunctionExpression(self, node: FunctionExpression) -> None:
+        """Compile a function expression."""
+        name = node.id.name if node.id else ""
+        func = self._compile_function(name, node.params, node.body, is_expression=True)
+        func_idx = len(self.functions)
+        self.functions.append(func)
+
+        const_idx = self._add_constant(func)
+        self._emit(OpCode.LOAD_CONST, const_idx)
+        self._emit(OpCode.MAKE_CLOSURE, func_idx)
+
+    def _compile_ArrowFunctionExpression(self, node: ArrowFunctionExpression) -> None:
+        """Compile an arrow function expression."""
+        func = self._compile_arrow_function(node)
+        func_idx = len(self.functions)
+        self.functions.append(func)
+
+        const_idx = self._add_constant(func)
+        self._emit(OpCode.LOAD_CONST, const_idx)
+        self._emit(OpCode.MAKE_CLOSURE, func_idx)
@@ -3,12 +3,17 @@
 import json
 import math
 import random
+import re
+import string
+import struct
 import time
-from typing import Any, Dict, Optional
+from collections import OrderedDict
+from functools import cmp_to_key, partial
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 from .parser import Parser
-from .compiler import Compiler
-from .vm import VM
+from .compiler import CompiledFunction, Compiler
+from .vm import VM, numeric_sort_order
 from .values import (
     UNDEFINED,
     NULL,
@@ -19,10 +24,760 @@ from .values import (
     JSFunction,
     JSRegExp,
     JSBoundMethod,
+    JSArrayBuffer,
+    JSInt32Array,
+    JSUint32Array,
+    JSFloat64Array,
+    JSFloat32Array,
+    JSUint8Array,
+    JSInt8Array,
+    JSInt16Array,
+    JSUint16Array,
+    JSUint8ClampedArray,
     to_string,
     to_number,
+    to_int32,
+    to_uint32,
+    _NUMBER_TYPES,
 )
-from .errors import JSError, MemoryLimitError, TimeLimitError
+from .errors import (
+    JSError,
+    JSRangeError,
+    JSSyntaxError,
+    JSTypeError,
+    MemoryLimitError,
+    TimeLimitError,
+)
+
+# Number of compiled programs kept by each context's eval() cache
+_COMPILE_CACHE_SIZE = 128
+# Sources longer than this (in characters) are compiled without being cached
+_COMPILE_CACHE_MAX_SOURCE = 64 * 1024
+
+# Values of these exact types are the same in Python and JavaScript
+_PRIMITIVE_TYPES = frozenset([bool, int, float, str])
+
+_NAN = math.nan
+_INF = math.inf
+_NEG_INF = -math.inf
+
+# Packs and unpacks a 32-bit float, for Math.fround
+_FLOAT32_STRUCT = struct.Struct("f")
+
+# Value of each ASCII digit and letter in bases up to 36, for parseInt
+_DIGIT_VALUES = {ch: int(ch, 36) for ch in string.digits + string.ascii_letters}
+
+# Runs of valid digits in the most common parseInt bases
+_INT_DIGITS_RES = {
+    2: re.compile("[01]+"),
+    8: re.compile("[0-7]+"),
+    10: re.compile("[0-9]+"),
+    16: re.compile("[0-9a-fA-F]+"),
+}
+
+# Prefixes int() accepts along with an explicit base
+_INT_BASE_PREFIXES = ("0x", "0X", "0o", "0O", "0b", "0B")
+
+# The prefix of a string that parseFloat understands
+_FLOAT_PREFIX_RE = re.compile(
+    r"[+-]?(?:Infinity|(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][+-]?[0-9]+)?)"
+)
+
+
+def _fast_num(value: JSValue, _tn=to_number) -> Union[int, float]:
+    """Return a number as-is and convert anything else with to_number."""
+    return value if type(value) in _NUMBER_TYPES else _tn(value)
+
+
+def _fast_str(value: JSValue, _ts=to_string) -> str:
+    """Return a string as-is and convert anything else with to_string."""
+    return value if type(value) is str else _ts(value)
+
+
+def _unary_math(fn: Callable[[Any], Any]) -> Callable[..., Any]:
+    """Wrap a one-argument Python math function as a Math method.
+
+    Arguments fn rejects give the JavaScript result instead: NaN for
+    domain errors, and infinities passed through or produced on overflow.
+    """
+
+    def method(*args, _tn=_fast_num, _isinf=math.isinf):
+        x = _tn(args[0]) if args else _NAN
+        try:
+            return fn(x)
+        except ValueError:
+            # NaN into floor() and friends, or e.g. sqrt(-1) or sin(Infinity)
+            return _NAN
+        except OverflowError:
+            # Infinity into floor() and friends, or e.g. exp(1000)
+            return x if _isinf(x) else _INF
+
+    return method
+
+
+def _js_round(x):
+    # JavaScript-style round (round half towards positive infinity)
+    return math.floor(x + 0.5)
+
+
+if hasattr(math, "cbrt"):
+    _approx_cbrt = math.cbrt
+else:  # Python < 3.11
+
+    def _approx_cbrt(x, _copysign=math.copysign, _third=1 / 3):
+        return _copysign(abs(x) ** _third, x)
+
+
+def _cbrt(x, _approx=_approx_cbrt, _isfinite=math.isfinite):
+    # Neither approximation is correctly rounded (glibc's cbrt(27) is
+    # 3.0000000000000004), so perfect cubes are snapped to their exact root.
+    # A zero root is left alone to keep the sign of -0
+    r = _approx(x)
+    if _isfinite(r):
+        n = round(r)
+        if n and n * n * n == x:
+            return float(n)
+    return r
+
+
+# Math constants, computed once at import
+_MATH_CONSTANTS = {
+    "PI": math.pi,
+    "E": math.e,
+    "LN2": math.log(2),
+    "LN10": math.log(10),
+    "LOG2E": 1 / math.log(2),
+    "LOG10E": 1 / math.log(10),
+    "SQRT2": math.sqrt(2),
+    "SQRT1_2": math.sqrt(0.5),
+}
+
+# Math methods that apply one function to one number, built from one wrapper
+_UNARY_MATH_METHODS = {
+    name: _unary_math(fn)
+    for name, fn in [
+        ("abs", abs),
+        ("floor", math.floor),
+        ("ceil", math.ceil),
+        ("round", _js_round),
+        ("trunc", math.trunc),
+        ("sqrt", math.sqrt),
+        ("sin", math.sin),
+        ("cos", math.cos),
+        ("tan", math.tan),
+        ("asin", math.asin),
+        ("acos", math.acos),
+        ("atan", math.atan),
+        ("exp", math.exp),
+        ("expm1", math.expm1),
+        ("cbrt", _cbrt),
+    ]
+}
+
+
+# The other Math methods, shared by every Context. They take their helpers as
+# default arguments so hot calls read them as fast locals rather than globals
+def _math_min(*args, _tn=_fast_num):
+    # A running minimum, so Math.min(...bigArray) builds no second list
+    best = _INF
+    for arg in args:
+        x = _tn(arg)
+        if x != x:
+            return _NAN
+        if x < best:
+            best = x
+    return best
+
+
+def _math_max(*args, _tn=_fast_num):
+    best = _NEG_INF
+    for arg in args:
+        x = _tn(arg)
+        if x != x:
+            return _NAN
+        if x > best:
+            best = x
+    return best
+
+
+def _math_pow(*args, _tn=_fast_num, _pow=math.pow):
+    x = _tn(args[0]) if args else _NAN
+    y = _tn(args[1]) if len(args) > 1 else _NAN
+    return _pow(x, y)
+
+
+def _math_atan2(*args, _tn=_fast_num, _atan2=math.atan2):
+    y = _tn(args[0]) if args else _NAN
+    x = _tn(args[1]) if len(args) > 1 else _NAN
+    return _atan2(y, x)
+
+
+def _math_log(*args, _tn=_fast_num, _log=math.log):
+    x = _tn(args[0]) if args else _NAN
+    if x <= 0:
+        return _NEG_INF if x == 0 else _NAN
+    return _log(x)
+
+
+def _math_random(*args):
+    return random.random()
+
+
+def _math_sign(*args, _tn=_fast_num, _isnan=math.isnan):
+    x = _tn(args[0]) if args else _NAN
+    if _isnan(x):
+        return _NAN
+    if x > 0:
+        return 1
+    if x < 0:
+        return -1
+    return 0
+
+
+def _math_imul(*args, _u32=to_uint32):
+    # 32-bit integer multiplication. The low 32 bits of the product are the
+    # same whether the operands are read as signed or unsigned
+    a = _u32(args[0]) if args else 0
+    b = _u32(args[1]) if len(args) > 1 else 0
+    result = (a * b) & 0xFFFFFFFF
+    return result - 0x100000000 if result & 0x80000000 else result
+
+
+def _math_fround(*args, _tn=_fast_num, _f32=_FLOAT32_STRUCT):
+    # Convert to 32-bit float
+    x = _tn(args[0]) if args else _NAN
+    # Pack as 32-bit float and unpack as 64-bit
+    try:
+        return _f32.unpack(_f32.pack(x))[0]
+    except OverflowError:
+        # Too large for a 32-bit float, which rounds to infinity
+        return math.copysign(_INF, x)
+
+
+def _math_clz32(*args):
+    # Count leading zeros in 32-bit integer
+    x = to_uint32(args[0]) if args else 0
+    return 32 - x.bit_length()
+
+
+def _math_hypot(*args, _tn=_fast_num, _hypot=math.hypot):
+    if not args:
+        return 0
+    # math.hypot avoids the overflow of summing squares, and map() converts
+    # the arguments without a Python-level loop
+    return _hypot(*map(_tn, args))
+
+
+def _math_log2(*args, _tn=_fast_num, _log2=math.log2):
+    x = _tn(args[0]) if args else _NAN
+    if x <= 0:
+        return _NEG_INF if x == 0 else _NAN
+    return _log2(x)
+
+
+def _math_log10(*args, _tn=_fast_num, _log10=math.log10):
+    x = _tn(args[0]) if args else _NAN
+    if x <= 0:
+        return _NEG_INF if x == 0 else _NAN
+    return _log10(x)
+
+
+def _math_log1p(*args, _tn=_fast_num, _log1p=math.log1p):
+    x = _tn(args[0]) if args else _NAN
+    if x <= -1:
+        return _NEG_INF if x == -1 else _NAN
+    return _log1p(x)
+
+
+# Properties of the Math object. Each context's Math copies this dict, so
+# scripts can change their own Math without affecting other contexts
+_MATH_PROPERTIES = {
+    **_MATH_CONSTANTS,
+    **_UNARY_MATH_METHODS,
+    "min": _math_min,
+    "max": _math_max,
+    "pow": _math_pow,
+    "atan2": _math_atan2,
+    "log": _math_log,
+    "random": _math_random,
+    "sign": _math_sign,
+    "imul": _math_imul,
+    "fround": _math_fround,
+    "clz32": _math_clz32,
+    "hypot": _math_hypot,
+    "log2": _math_log2,
+    "log10": _math_log10,
+    "log1p": _math_log1p,
+}
+
+
+# JSON methods, shared by every Context
+class _JSONEncoder(json.JSONEncoder):
+    """Encode JavaScript values directly, without a Python copy of the tree.
+
+    The C encoder calls default() for each value it doesn't know, so
+    containers are unwrapped one at a time as the encoder reaches them.
+    """
+
+    def default(self, o: Any) -> Any:
+        if isinstance(o, JSArray):
+            # undefined elements come back through default() as null
+            return o._elements
+        if isinstance(o, JSObject):
+            # For objects, skip undefined values
+            return {k: val for k, val in o._properties.items() if val is not UNDEFINED}
+        # undefined, null and functions
+        return None
+
+
+# json.dumps() builds a new encoder whenever it is given options, so
+# JSON.stringify keeps one around instead
+_JSON_ENCODER = _JSONEncoder(separators=(",", ":"))
+
+
+def _json_parse(*args):
+    text = _fast_str(args[0]) if args else ""
+    try:
+        py_value = json.loads(text)
+        return _to_js(py_value)
+    except json.JSONDecodeError as e:
+        raise JSSyntaxError(f"JSON.parse: {e}")
+
+
+def _json_stringify(*args):
+    value = args[0] if args else UNDEFINED
+    if value is UNDEFINED:
+        return UNDEFINED
+    try:
+        return _JSON_ENCODER.encode(value)
+    except (TypeError, ValueError) as e:
+        raise JSTypeError(f"JSON.stringify: {e}")
+
+
+_JSON_PROPERTIES = {"parse": _json_parse, "stringify": _json_stringify}
+
+
+# Number constructor and static methods, shared by every Context
+def _number_call(*args):
+    """Convert argument to a number."""
+    if not args:
+        return 0
+    return _fast_num(args[0])
+
+
+def _number_is_nan(*args):
+    x = args[0] if args else UNDEFINED
+    # Number.isNaN only returns true for actual NaN
+    if type(x) not in _NUMBER_TYPES:
+        return False
+    return math.isnan(x)
+
+
+def _number_is_finite(*args):
+    x = args[0] if args else UNDEFINED
+    if type(x) not in _NUMBER_TYPES:
+        return False
+    return not (math.isnan(x) or math.isinf(x))
+
+
+def _number_is_integer(*args):
+    x = args[0] if args else UNDEFINED
+    if type(x) not in _NUMBER_TYPES:
+        return False
+    if math.isnan(x) or math.isinf(x):
+        return False
+    return x == int(x)
+
+
+def _parse_int(s: str, radix: int) -> Union[int, float]:
+    """Parse the integer at the start of s, as parseInt does.
+
+    A radix of 0 means none was given.
+    """
+    s = s.strip()
+    if not s:
+        return _NAN
+    # Handle leading sign, with one test for the usual unsigned case
+    sign = 1
+    if s[0] in "+-":
+        if s[0] == "-":
+            sign = -1
+        s = s[1:]
+    # Handle 0x prefix for hex, unless another radix was asked for
+    if (radix == 0 or radix == 16) and s[:2] in ("0x", "0X"):
+        radix = 16
+        s = s[2:]
+    elif radix == 0:
+        radix = 10
+    if not 2 <= radix <= 36:
+        return _NAN
+    # A string of nothing but ASCII letters and digits is usually all valid
+    # digits, and then int() can convert it without a scan. int() would
+    # also accept a base prefix, which parseInt treats as the end of digits
+    if s.isascii() and s.isalnum() and not s.startswith(_INT_BASE_PREFIXES):
+        try:
+            return sign * int(s, radix)
+        except ValueError:
+            pass
+    # Find the run of valid digits, then let int() convert it in one go
+    digits_re = _INT_DIGITS_RES.get(radix)
+    if digits_re is not None:
+        m = digits_re.match(s)
+        return sign * int(m.group(0), radix) if m else _NAN
+    end = 0
+    for ch in s:
+        if _DIGIT_VALUES.get(ch, 36) >= radix:
+            break
+        end += 1
+    if not end:
+        return _NAN
+    return sign * int(s[:end], radix)
+
+
+def _number_parse_int(*args):
+    s = _fast_str(args[0]) if args else ""
+    return _parse_int(s, to_int32(args[1]) if len(args) > 1 else 0)
+
+
+def _parse_float(s: str) -> float:
+    """Parse the longest decimal literal at the start of s, as parseFloat does."""
+    m = _FLOAT_PREFIX_RE.match(s.strip())
+    return float(m.group(0)) if m else _NAN
+
+
+def _number_parse_float(*args):
+    return _parse_float(_fast_str(args[0]) if args else "")
+
+
+_NUMBER_PROPERTIES = {
+    "isNaN": _number_is_nan,
+    "isFinite": _number_is_finite,
+    "isInteger": _number_is_integer,
+    "parseInt": _number_parse_int,
+    "parseFloat": _number_parse_float,
+}
+
+
+# Boolean constructor, shared by every Context
+
+# The falsy primitives other than NaN. 0.0 and -0.0 are equal to 0, so
+# they are found too
+_FALSY_PRIMITIVES = frozenset([False, 0, ""])
+
+
+def _boolean_call(*args):
+    """Convert argument to a boolean."""
+    if not args:
+        return False
+    val = args[0]
+    if type(val) in _PRIMITIVE_TYPES:
+        # NaN is the only value not equal to itself
+        return val == val and val not in _FALSY_PRIMITIVES
+    # undefined and null are falsy, and objects are always truthy
+    return val is not UNDEFINED and val is not NULL
+
+
+# Typed array classes by constructor name
+_TYPED_ARRAY_CLASSES = {
+    "Int32Array": JSInt32Array,
+    "Uint32Array": JSUint32Array,
+    "Float64Array": JSFloat64Array,
+    "Float32Array": JSFloat32Array,
+    "Uint8Array": JSUint8Array,
+    "Int8Array": JSInt8Array,
+    "Int16Array": JSInt16Array,
+    "Uint16Array": JSUint16Array,
+    "Uint8ClampedArray": JSUint8ClampedArray,
+}
+
+
+# One-character strings for the ASCII codes, prebuilt for String.fromCharCode
+_ASCII_CHARS = tuple(chr(code) for code in range(128))
+
+
+def _string_from_char_code(*args, _ascii=_ASCII_CHARS, _u32=to_uint32):
+    """String.fromCharCode - create string from char codes."""
+    # Codes are taken modulo 2**16, as JavaScript strings hold 16-bit units
+    return "".join(
+        [
+            (
+                _ascii[code]
+                if type(code) is int and 0 <= code < 128
+                else chr(_u32(code) & 0xFFFF)
+            )
+            for code in args
+        ]
+    )
+
+
+# String, Date and ArrayBuffer constructors and static methods, shared by
+# every Context. Each context still builds its own constructor objects, so
+# that changes a script makes to them stay in that context
+def _string_call(*args):
+    """Convert argument to a string."""
+    if not args:
+        return ""
+    return _fast_str(args[0])
+
+
+_STRING_PROPERTIES = {"fromCharCode": _string_from_char_code}
+
+
+def _date_now(*args):
+    return int(time.time() * 1000)
+
+
+_DATE_PROPERTIES = {"now": _date_now}
+
+
+def _arraybuffer_call(*args):
+    length = int(args[0]) if args else 0
+    return JSArrayBuffer(length)
+
+
+# Object.prototype and Object static methods, shared by every Context
+def _object_proto_to_string(this_val, *args):
+    # Get the [[Class]] internal property
+    if this_val is UNDEFINED:
+        return "[object Undefined]"
+    if this_val is NULL:
+        return "[object Null]"
+    if isinstance(this_val, bool):
+        return "[object Boolean]"
+    if type(this_val) in _NUMBER_TYPES:
+        return "[object Number]"
+    if isinstance(this_val, str):
+        return "[object String]"
+    if isinstance(this_val, JSArray):
+        return "[object Array]"
+    if callable(this_val) or isinstance(this_val, JSCallableObject):
+        return "[object Function]"
+    return "[object Object]"
+
+
+def _object_proto_has_own_property(this_val, *args):
+    prop = _fast_str(args[0]) if args else ""
+    if isinstance(this_val, JSArray):
+        # For arrays, check both properties and array indices
+        try:
+            idx = int(prop)
+            if 0 <= idx < len(this_val._elements):
+                return True
+        except (ValueError, TypeError):
+            pass
+        return (
+            this_val.has(prop) or prop in this_val._getters or prop in this_val._setters
+        )
+    if isinstance(this_val, JSObject):
+        return (
+            this_val.has(prop) or prop in this_val._getters or prop in this_val._setters
+        )
+    return False
+
+
+def _object_proto_value_of(this_val, *args):
+    return this_val
+
+
+def _object_proto_is_prototype_of(this_val, *args):
+    obj = args[0] if args else UNDEFINED
+    if not isinstance(obj, JSObject):
+        return False
+    proto = getattr(obj, "_prototype", None)
+    while proto is not None:
+        if proto is this_val:
+            return True
+        proto = getattr(proto, "_prototype", None)
+    return False
+
+
+def _object_keys(*args):
+    obj = args[0] if args else UNDEFINED
+    if not isinstance(obj, JSObject):
+        return JSArray()
+    arr = JSArray()
+    arr._elements = list(obj._properties)
+    return arr
+
+
+def _object_values(*args):
+    obj = args[0] if args else UNDEFINED
+    if not isinstance(obj, JSObject):
+        return JSArray()
+    arr = JSArray()
+    arr._elements = list(obj._properties.values())
+    return arr
+
+
+def _object_entries(*args):
+    obj = args[0] if args else UNDEFINED
+    if not isinstance(obj, JSObject):
+        return JSArray()
+    arr = JSArray()
+    # Walk the own properties directly, rather than looking each
+    # key up again with obj.get()
+    elements = arr._elements
+    for item in obj._properties.items():
+        entry = JSArray()
+        entry._elements = list(item)
+        elements.append(entry)
+    return arr
+
+
+def _object_assign(*args):
+    if not args:
+        return JSObject()
+    target = args[0]
+    if not isinstance(target, JSObject):
+        return target
+    properties = target._properties
+    for source in args[1:]:
+        if isinstance(source, JSObject):
+            # Same as set() for each own key, in one dict update
+            properties.update(source._properties)
+    return target
+
+
+def _object_get_prototype_of(*args):
+    obj = args[0] if args else UNDEFINED
+    if not isinstance(obj, JSObject):
+        return NULL
+    return getattr(obj, "_prototype", NULL) or NULL
+
+
+def _object_set_prototype_of(*args):
+    if len(args) < 2:
+        return UNDEFINED
+    obj, proto = args[0], args[1]
+    if not isinstance(obj, JSObject):
+        return obj
+    if proto is NULL or proto is None:
+        obj._prototype = None
+    elif isinstance(proto, JSObject):
+        obj._prototype = proto
+    return obj
+
+
+def _object_define_property(*args):
+    """Object.defineProperty(obj, prop, descriptor)."""
+    if len(args) < 3:
+        return UNDEFINED
+    obj, prop, descriptor = args[0], args[1], args[2]
+    if not isinstance(obj, JSObject):
+        return obj
+    prop_name = to_string(prop)
+
+    if isinstance(descriptor, JSObject):
+        # Check for getter/setter
+        getter = descriptor.get("get")
+        setter = descriptor.get("set")
+
+        if getter is not UNDEFINED and getter is not NULL:
+            obj.define_getter(prop_name, getter)
+        if setter is not UNDEFINED and setter is not NULL:
+            obj.define_setter(prop_name, setter)
+
+        # Check for value (only if no getter/setter)
+        if getter is UNDEFINED and setter is UNDEFINED:
+            value = descriptor.get("value")
+            if value is not UNDEFINED:
+                obj.set(prop_name, value)
+
+    return obj
+
+
+def _object_define_properties(*args):
+    """Object.defineProperties(obj, props)."""
+    if len(args) < 2:
+        return UNDEFINED
+    obj, props = args[0], args[1]
+    if not isinstance(obj, JSObject) or not isinstance(props, JSObject):
+        return obj
+
+    for key in props.keys():
+        descriptor = props.get(key)
+        _object_define_property(obj, key, descriptor)
+
+    return obj
+
+
+def _object_create(*args):
+    """Object.create(proto, properties)."""
+    proto = args[0] if args else NULL
+    properties = args[1] if len(args) > 1 else UNDEFINED
+
+    obj = JSObject()
+    if proto is NULL or proto is None:
+        obj._prototype = None
+    elif isinstance(proto, JSObject):
+        obj._prototype = proto
+
+    if properties is not UNDEFINED and isinstance(properties, JSObject):
+        _object_define_properties(obj, properties)
+
+    return obj
+
+
+def _object_get_own_property_descriptor(*args):
+    """Object.getOwnPropertyDescriptor(obj, prop)."""
+    if len(args) < 2:
+        return UNDEFINED
+    obj, prop = args[0], args[1]
+    if not isinstance(obj, JSObject):
+        return UNDEFINED
+    prop_name = to_string(prop)
+
+    if (
+        not obj.has(prop_name)
+        and prop_name not in obj._getters
+        and prop_name not in obj._setters
+    ):
+        return UNDEFINED
+
+    descriptor = JSObject()
+
+    getter = obj._getters.get(prop_name)
+    setter = obj._setters.get(prop_name)
+
+    if getter or setter:
+        descriptor.set("get", getter if getter else UNDEFINED)
+        descriptor.set("set", setter if setter else UNDEFINED)
+    else:
+        descriptor.set("value", obj.get(prop_name))
+        descriptor.set("writable", True)
+
+    descriptor.set("enumerable", True)
+    descriptor.set("configurable", True)
+
+    return descriptor
+
+
+# The prototype methods take 'this' as their first argument. JSBoundMethod
+# holds no state scripts can change, so every Context shares these
+_OBJECT_PROTO_TO_STRING = JSBoundMethod(_object_proto_to_string)
+_OBJECT_PROTO_HAS_OWN_PROPERTY = JSBoundMethod(_object_proto_has_own_property)
+_OBJECT_PROTO_VALUE_OF = JSBoundMethod(_object_proto_value_of)
+_OBJECT_PROTO_IS_PROTOTYPE_OF = JSBoundMethod(_object_proto_is_prototype_of)
+
+
+class _LazyGlobals(dict):
+    """Global variables, with some builtins built on first lookup.
+
+    factories maps a global name to a function that creates its value. Only
+    globals[name] builds a value, so "in" and get() don't see lazy names
+    until they have been looked up that way.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.factories: Dict[str, Callable[[], JSValue]] = {}
+
+    def __missing__(self, name: str) -> JSValue:
+        factory = self.factories.pop(name, None)
+        if factory is None:
+            raise KeyError(name)
+        value = self[name] = factory()
+        return value
 
 
 class Context:
@@ -41,8 +796,17 @@ class Context:
         """
         self.memory_limit = memory_limit
         self.time_limit = time_limit
-        self._globals: Dict[str, JSValue] = {}
+        self._globals: Dict[str, JSValue] = _LazyGlobals()
         self._current_vm = None  # Set during eval() for timeout checking
+        # Source string -> compiled program, least recently used first
+        self._compile_cache: "OrderedDict[str, CompiledFunction]" = OrderedDict()
+        # Reused for every compile, which resets its per-program state
+        self._compiler = Compiler()
+        # Reused by eval() whenever it isn't already running something
+        self._vm = VM(memory_limit=memory_limit, time_limit=time_limit)
+        # Idle VMs for runs that start while self._vm is busy, such as the
+        # global eval() or new Function() called from a running script
+        self._spare_vms: List[VM] = []
         self._setup_globals()
 
     def _setup_globals(self) -> None:
@@ -53,8 +817,8 @@ class Context:
         self._globals["console"] = console
 
         # Infinity and NaN
-        self._globals["Infinity"] = float("inf")
-        self._globals["NaN"] = float("nan")
+        self._globals["Infinity"] = _INF
+        self._globals["NaN"] = _NAN
         self._globals["undefined"] = UNDEFINED
 
         # Basic type constructors (minimal implementations)
@@ -70,66 +834,65 @@ class Context:
         self._globals["URIError"] = self._create_error_constructor("URIError")
         self._globals["EvalError"] = self._create_error_constructor("EvalError")
 
+        # The remaining builtins are only built when a script first uses them
+        lazy = self._globals.factories
+
         # Math object
-        self._globals["Math"] = self._create_math_object()
+        lazy["Math"] = self._create_math_object
 
         # JSON object
-        self._globals["JSON"] = self._create_json_object()
+        lazy["JSON"] = self._create_json_object
 
         # Number constructor and methods
-        self._globals["Number"] = self._create_number_constructor()
+        lazy["Number"] = self._create_number_constructor
 
         # String constructor and methods
-        self._globals["String"] = self._create_string_constructor()
+        lazy["String"] = self._create_string_constructor
 
         # Boolean constructor
-        self._globals["Boolean"] = self._create_boolean_constructor()
+        lazy["Boolean"] = self._create_boolean_constructor
 
         # Date constructor
-        self._globals["Date"] = self._create_date_constructor()
+        lazy["Date"] = self._create_date_constructor
 
         # RegExp constructor
-        self._globals["RegExp"] = self._create_regexp_constructor()
+        lazy["RegExp"] = self._create_regexp_constructor
 
         # Function constructor
-        self._globals["Function"] = self._create_function_constructor()
+        lazy["Function"] = self._create_function_constructor
 
         # Typed array constructors
-        self._globals["Int32Array"] = self._create_typed_array_constructor("Int32Array")
-        self._globals["Uint32Array"] = self._create_typed_array_constructor(
-            "Uint32Array"
-        )
-        self._globals["Float64Array"] = self._create_typed_array_constructor(
-            "Float64Array"
-        )
-        self._globals["Float32Array"] = self._create_typed_array_constructor(
-            "Float32Array"
-        )
-        self._globals["Uint8Array"] = self._create_typed_array_constructor("Uint8Array")
-        self._globals["Int8Array"] = self._create_typed_array_constructor("Int8Array")
-        self._globals["Int16Array"] = self._create_typed_array_constructor("Int16Array")
-        self._globals["Uint16Array"] = self._create_typed_array_constructor(
-            "Uint16Array"
-        )
-        self._globals["Uint8ClampedArray"] = self._create_typed_array_constructor(
-            "Uint8ClampedArray"
-        )
+        for name in _TYPED_ARRAY_CLASSES:
+            lazy[name] = partial(self._create_typed_array_constructor, name)
 
         # ArrayBuffer constructor
-        self._globals["ArrayBuffer"] = self._create_arraybuffer_constructor()
+        lazy["ArrayBuffer"] = self._create_arraybuffer_constructor
 
         # Global number functions
         self._globals["isNaN"] = self._global_isnan
         self._globals["isFinite"] = self._global_isfinite
-        self._globals["parseInt"] = self._global_parseint
-        self._globals["parseFloat"] = self._global_parsefloat
+        # These are the same function objects as Number.parseInt/parseFloat
+        self._globals["parseInt"] = _number_parse_int
+        self._globals["parseFloat"] = _number_parse_float
 
         # eval function
-        self._globals["eval"] = self._create_eval_function()
+        lazy["eval"] = self._create_eval_function
 
     def _console_log(self, *args: JSValue) -> None:
         """Console.log implementation."""
-        print(" ".join(to_string(arg) for arg in args))
+        parts = []
+        append = parts.append
+        for arg in args:
+            # Strings and ints print as themselves; everything else (including
+            # floats and bools) needs JS formatting
+            arg_type = type(arg)
+            if arg_type is str:
+                append(arg)
+            elif arg_type is int:
+                append(str(arg))
+            else:
+                append(to_string(arg))
+        print(" ".join(parts))
 
     def _create_object_constructor(self) -> JSCallableObject:
         """Create the Object constructor with static methods."""
@@ -148,231 +911,26 @@ class Context:
         object_prototype.set("constructor", obj_constructor)
 
         # Add Object.prototype methods
-        def proto_toString(this_val, *args):
-            # Get the [[Class]] internal property
-            if this_val is UNDEFINED:
-                return "[object Undefined]"
-            if this_val is NULL:
-                return "[object Null]"
-            if isinstance(this_val, bool):
-                return "[object Boolean]"
-            if isinstance(this_val, (int, float)):
-                return "[object Number]"
-            if isinstance(this_val, str):
-                return "[object String]"
-            if isinstance(this_val, JSArray):
-                return "[object Array]"
-            if callable(this_val) or isinstance(this_val, JSCallableObject):
-                return "[object Function]"
-            return "[object Object]"
-
-        def proto_hasOwnProperty(this_val, *args):
-            prop = to_string(args[0]) if args else ""
-            if isinstance(this_val, JSArray):
-                # For arrays, check both properties and array indices
-                try:
-                    idx = int(prop)
-                    if 0 <= idx < len(this_val._elements):
-                        return True
-                except (ValueError, TypeError):
-                    pass
-                return (
-                    this_val.has(prop)
-                    or prop in this_val._getters
-                    or prop in this_val._setters
-                )
-            if isinstance(this_val, JSObject):
-                return (
-                    this_val.has(prop)
-                    or prop in this_val._getters
-                    or prop in this_val._setters
-                )
-            return False
-
-        def proto_valueOf(this_val, *args):
-            return this_val
-
-        def proto_isPrototypeOf(this_val, *args):
-            obj = args[0] if args else UNDEFINED
-            if not isinstance(obj, JSObject):
-                return False
-            proto = getattr(obj, "_prototype", None)
-            while proto is not None:
-                if proto is this_val:
-                    return True
-                proto = getattr(proto, "_prototype", None)
-            return False
-
-        # These methods need special handling for 'this'
-        from .values import JSBoundMethod
-
-        object_prototype.set("toString", JSBoundMethod(proto_toString))
-        object_prototype.set("hasOwnProperty", JSBoundMethod(proto_hasOwnProperty))
-        object_prototype.set("valueOf", JSBoundMethod(proto_valueOf))
-        object_prototype.set("isPrototypeOf", JSBoundMethod(proto_isPrototypeOf))
+        object_prototype.set("toString", _OBJECT_PROTO_TO_STRING)
+        object_prototype.set("hasOwnProperty", _OBJECT_PROTO_HAS_OWN_PROPERTY)
+        object_prototype.set("valueOf", _OBJECT_PROTO_VALUE_OF)
+        object_prototype.set("isPrototypeOf", _OBJECT_PROTO_IS_PROTOTYPE_OF)
 
         # Store for other constructors to use
         self._object_prototype = object_prototype
 
-        def keys_fn(*args):
-            obj = args[0] if args else UNDEFINED
-            if not isinstance(obj, JSObject):
-                return JSArray()
-            arr = JSArray()
-            arr._elements = list(obj.keys())
-            return arr
-
-        def values_fn(*args):
-            obj = args[0] if args else UNDEFINED
-            if not isinstance(obj, JSObject):
-                return JSArray()
-            arr = JSArray()
-            arr._elements = [obj.get(k) for k in obj.keys()]
-            return arr
-
-        def entries_fn(*args):
-            obj = args[0] if args else UNDEFINED
-            if not isinstance(obj, JSObject):
-                return JSArray()
-            arr = JSArray()
-            arr._elements = []
-            for k in obj.keys():
-                entry = JSArray()
-                entry._elements = [k, obj.get(k)]
-                arr._elements.append(entry)
-            return arr
-
-        def assign_fn(*args):
-            if not args:
-                return JSObject()
-            target = args[0]
-            if not isinstance(target, JSObject):
-                return target
-            for i in range(1, len(args)):
-                source = args[i]
-                if isinstance(source, JSObject):
-                    for k in source.keys():
-                        target.set(k, source.get(k))
-            return target
-
-        def get_prototype_of(*args):
-            obj = args[0] if args else UNDEFINED
-            if not isinstance(obj, JSObject):
-                return NULL
-            return getattr(obj, "_prototype", NULL) or NULL
-
-        def set_prototype_of(*args):
-            if len(args) < 2:
-                return UNDEFINED
-            obj, proto = args[0], args[1]
-            if not isinstance(obj, JSObject):
-                return obj
-            if proto is NULL or proto is None:
-                obj._prototype = None
-            elif isinstance(proto, JSObject):
-                obj._prototype = proto
-            return obj
-
-        def define_property(*args):
-            """Object.defineProperty(obj, prop, descriptor)."""
-            if len(args) < 3:
-                return UNDEFINED
-            obj, prop, descriptor = args[0], args[1], args[2]
-            if not isinstance(obj, JSObject):
-                return obj
-            prop_name = to_string(prop)
-
-            if isinstance(descriptor, JSObject):
-                # Check for getter/setter
-                getter = descriptor.get("get")
-                setter = descriptor.get("set")
-
-                if getter is not UNDEFINED and getter is not NULL:
-                    obj.define_getter(prop_name, getter)
-                if setter is not UNDEFINED and setter is not NULL:
-                    obj.define_setter(prop_name, setter)
-
-                # Check for value (only if no getter/setter)
-                if getter is UNDEFINED and setter is UNDEFINED:
-                    value = descriptor.get("value")
-                    if value is not UNDEFINED:
-                        obj.set(prop_name, value)
-
-            return obj
-
-        def define_properties(*args):
-            """Object.defineProperties(obj, props)."""
-            if len(args) < 2:
-                return UNDEFINED
-            obj, props = args[0], args[1]
-            if not isinstance(obj, JSObject) or not isinstance(props, JSObject):
-                return obj
-
-            for key in props.keys():
-                descriptor = props.get(key)
-                define_property(obj, key, descriptor)
-
-            return obj
-
-        def create_fn(*args):
-            """Object.create(proto, properties)."""
-            proto = args[0] if args else NULL
-            properties = args[1] if len(args) > 1 else UNDEFINED
-
-            obj = JSObject()
-            if proto is NULL or proto is None:
-                obj._prototype = None
-            elif isinstance(proto, JSObject):
-                obj._prototype = proto
-
-            if properties is not UNDEFINED and isinstance(properties, JSObject):
-                define_properties(obj, properties)
-
-            return obj
-
-        def get_own_property_descriptor(*args):
-            """Object.getOwnPropertyDescriptor(obj, prop)."""
-            if len(args) < 2:
-                return UNDEFINED
-            obj, prop = args[0], args[1]
-            if not isinstance(obj, JSObject):
-                return UNDEFINED
-            prop_name = to_string(prop)
-
-            if (
-                not obj.has(prop_name)
-                and prop_name not in obj._getters
-                and prop_name not in obj._setters
-            ):
-                return UNDEFINED
-
-            descriptor = JSObject()
-
-            getter = obj._getters.get(prop_name)
-            setter = obj._setters.get(prop_name)
-
-            if getter or setter:
-                descriptor.set("get", getter if getter else UNDEFINED)
-                descriptor.set("set", setter if setter else UNDEFINED)
-            else:
-                descriptor.set("value", obj.get(prop_name))
-                descriptor.set("writable", True)
-
-            descriptor.set("enumerable", True)
-            descriptor.set("configurable", True)
-
-            return descriptor
-
-        obj_constructor.set("keys", keys_fn)
-        obj_constructor.set("values", values_fn)
-        obj_constructor.set("entries", entries_fn)
-        obj_constructor.set("assign", assign_fn)
-        obj_constructor.set("getPrototypeOf", get_prototype_of)
-        obj_constructor.set("setPrototypeOf", set_prototype_of)
-        obj_constructor.set("defineProperty", define_property)
-        obj_constructor.set("defineProperties", define_properties)
-        obj_constructor.set("create", create_fn)
-        obj_constructor.set("getOwnPropertyDescriptor", get_own_property_descriptor)
+        obj_constructor.set("keys", _object_keys)
+        obj_constructor.set("values", _object_values)
+        obj_constructor.set("entries", _object_entries)
+        obj_constructor.set("assign", _object_assign)
+        obj_constructor.set("getPrototypeOf", _object_get_prototype_of)
+        obj_constructor.set("setPrototypeOf", _object_set_prototype_of)
+        obj_constructor.set("defineProperty", _object_define_property)
+        obj_constructor.set("defineProperties", _object_define_properties)
+        obj_constructor.set("create", _object_create)
+        obj_constructor.set(
+            "getOwnPropertyDescriptor", _object_get_own_property_descriptor
+        )
         obj_constructor.set("prototype", object_prototype)
 
         return obj_constructor
@@ -384,7 +942,7 @@ class Context:
         array_prototype._prototype = self._object_prototype
 
         def array_constructor(*args):
-            if len(args) == 1 and isinstance(args[0], (int, float)):
+            if len(args) == 1 and type(args[0]) in _NUMBER_TYPES:
                 arr = JSArray(int(args[0]))
             else:
                 arr = JSArray()
@@ -405,40 +963,31 @@ class Context:
             if not isinstance(this, JSArray):
                 return this
             comparator = args[0] if args else None
+            elements = this._elements
 
-            # Default string comparison
-            def default_compare(a, b):
-                # undefined values sort to the end
-                if a is UNDEFINED and b is UNDEFINED:
-                    return 0
-                if a is UNDEFINED:
-                    return 1
-                if b is UNDEFINED:
-                    return -1
-                # Convert to strings and compare
-                str_a = to_string(a)
-                str_b = to_string(b)
-                if str_a < str_b:
-                    return -1
-                if str_a > str_b:
-                    return 1
-                return 0
-
-            def compare_fn(a, b):
-                if comparator and callable(comparator):
+            if comparator and callable(comparator):
+                reverse = numeric_sort_order(comparator, elements)
+                if reverse is not None:
+                    elements.sort(reverse=reverse)
+                    return this
+
+                def compare_fn(a, b):
                     if isinstance(comparator, JSFunction):
                         result = self._call_function(comparator, [a, b])
                     else:
                         result = comparator(a, b)
-                    # Convert to integer for cmp_to_key
                     num = to_number(result) if result is not UNDEFINED else 0
-                    return int(num) if isinstance(num, (int, float)) else 0
-                return default_compare(a, b)
+                    # Only the sign matters; NaN compares as equal
+                    return -1 if num < 0 else (1 if num > 0 else 0)
 
-            # Sort using Python's sort with custom key
-            from functools import cmp_to_key
+                elements.sort(key=cmp_to_key(compare_fn))
+                return this
 
-            this._elements.sort(key=cmp_to_key(compare_fn))
+            # Default sort compares string forms, with undefined values last
+            defined = [e for e in elements if e is not UNDEFINED]
+            defined.sort(key=to_string)
+            defined.extend([UNDEFINED] * (len(elements) - len(defined)))
+            elements[:] = defined
             return this
 
         array_prototype.set("sort", JSBoundMethod(array_sort))
@@ -461,13 +1010,16 @@ class Context:
 
         def error_constructor(*args):
             message = args[0] if args else UNDEFINED
-            err = JSObject(error_prototype)  # Set prototype
-            err.set("message", to_string(message) if message is not UNDEFINED else "")
-            err.set("name", error_name)
-            err.set("stack", "")  # Stack trace placeholder
-            err.set("lineNumber", None)  # Will be set when error is thrown
-            err.set("columnNumber", None)  # Will be set when error is thrown
-            return err
+            return JSObject(
+                error_prototype,
+                {
+                    "message": to_string(message) if message is not UNDEFINED else "",
+                    "name": error_name,
+                    "stack": "",  # Stack trace placeholder
+                    "lineNumber": None,  # Will be set when error is thrown
+                    "columnNumber": None,  # Will be set when error is thrown
+                },
+            )
 
         constructor = JSCallableObject(error_constructor)
         constructor._name = error_name
@@ -479,435 +1031,36 @@ class Context:
 
     def _create_math_object(self) -> JSObject:
         """Create the Math global object."""
-        math_obj = JSObject()
-
-        # Constants
-        math_obj.set("PI", math.pi)
-        math_obj.set("E", math.e)
-        math_obj.set("LN2", math.log(2))
-        math_obj.set("LN10", math.log(10))
-        math_obj.set("LOG2E", 1 / math.log(2))
-        math_obj.set("LOG10E", 1 / math.log(10))
-        math_obj.set("SQRT2", math.sqrt(2))
-        math_obj.set("SQRT1_2", math.sqrt(0.5))
-
-        # Basic functions
-        def abs_fn(*args):
-            x = to_number(args[0]) if args else float("nan")
-            return abs(x)
-
-        def floor_fn(*args):
-            x = to_number(args[0]) if args else float("nan")
-            return math.floor(x)
-
-        def ceil_fn(*args):
-            x = to_number(args[0]) if args else float("nan")
-            return math.ceil(x)
-
-        def round_fn(*args):
-            x = to_number(args[0]) if args else float("nan")
-            # JavaScript-style round (round half towards positive infinity)
-            return math.floor(x + 0.5)
-
-        def trunc_fn(*args):
-            x = to_number(args[0]) if args else float("nan")
-            return math.trunc(x)
-
-        def min_fn(*args):
-            if not args:
-                return float("inf")
-            nums = [to_number(a) for a in args]
-            return min(nums)
-
-        def max_fn(*args):
-            if not args:
-                return float("-inf")
-            nums = [to_number(a) for a in args]
-            return max(nums)
-
-        def pow_fn(*args):
-            x = to_number(args[0]) if args else float("nan")
-            y = to_number(args[1]) if len(args) > 1 else float("nan")
-            return math.pow(x, y)
-
-        def sqrt_fn(*args):
-            x = to_number(args[0]) if args else float("nan")
-            if x < 0:
-                return float("nan")
-            return math.sqrt(x)
-
-        def sin_fn(*args):
-            x = to_number(args[0]) if args else float("nan")
-            return math.sin(x)
-
-        def cos_fn(*args):
-            x = to_number(args[0]) if args else float("nan")
-            return math.cos(x)
-
-        def tan_fn(*args):
-            x = to_number(args[0]) if args else float("nan")
-            return math.tan(x)
-
-        def asin_fn(*args):
-            x = to_number(args[0]) if args else float("nan")
-            if x < -1 or x > 1:
-                return float("nan")
-            return math.asin(x)
-
-        def acos_fn(*args):
-            x = to_number(args[0]) if args else float("nan")
-            if x < -1 or x > 1:
-                return float("nan")
-            return math.acos(x)
-
-        def atan_fn(*args):
-            x = to_number(args[0]) if args else float("nan")
-            return math.atan(x)
-
-        def atan2_fn(*args):
-            y = to_number(args[0]) if args else float("nan")
-            x = to_number(args[1]) if len(args) > 1 else float("nan")
-            return math.atan2(y, x)
-
-        def log_fn(*args):
-            x = to_number(args[0]) if args else float("nan")
-            if x <= 0:
-                return float("-inf") if x == 0 else float("nan")
-            return math.log(x)
-
-        def exp_fn(*args):
-            x = to_number(args[0]) if args else float("nan")
-            return math.exp(x)
-
-        def random_fn(*args):
-            return random.random()
-
-        def sign_fn(*args):
-            x = to_number(args[0]) if args else float("nan")
-            if math.isnan(x):
-                return float("nan")
-            if x > 0:
-                return 1
-            if x < 0:
-                return -1
-            return 0
-
-        def imul_fn(*args):
-            # 32-bit integer multiplication
-            a = int(to_number(args[0])) if args else 0
-            b = int(to_number(args[1])) if len(args) > 1 else 0
-            # Convert to 32-bit signed integers
-            a = a & 0xFFFFFFFF
-            b = b & 0xFFFFFFFF
-            if a >= 0x80000000:
-                a -= 0x100000000
-            if b >= 0x80000000:
-                b -= 0x100000000
-            result = (a * b) & 0xFFFFFFFF
-            if result >= 0x80000000:
-                result -= 0x100000000
-            return result
-
-        def fround_fn(*args):
-            # Convert to 32-bit float
-            import struct
-
-            x = to_number(args[0]) if args else float("nan")
-            # Pack as 32-bit float and unpack as 64-bit
-            packed = struct.pack("f", x)
-            return struct.unpack("f", packed)[0]
-
-        def clz32_fn(*args):
-            # Count leading zeros in 32-bit integer
-            x = int(to_number(args[0])) if args else 0
-            x = x & 0xFFFFFFFF
-            if x == 0:
-                return 32
-            count = 0
-            while (x & 0x80000000) == 0:
-                count += 1
-                x <<= 1
-            return count
-
-        def hypot_fn(*args):
-            if not args:
-                return 0
-            nums = [to_number(a) for a in args]
-            return math.hypot(*nums)
-
-        def cbrt_fn(*args):
-            x = to_number(args[0]) if args else float("nan")
-            if x < 0:
-                return -((-x) ** (1 / 3))
-            return x ** (1 / 3)
-
-        def log2_fn(*args):
-            x = to_number(args[0]) if args else float("nan")
-            return math.log2(x) if x > 0 else float("nan")
-
-        def log10_fn(*args):
-            x = to_number(args[0]) if args else float("nan")
-            return math.log10(x) if x > 0 else float("nan")
-
-        def expm1_fn(*args):
-            x = to_number(args[0]) if args else float("nan")
-            return math.expm1(x)
-
-        def log1p_fn(*args):
-            x = to_number(args[0]) if args else float("nan")
-            return math.log1p(x) if x > -1 else float("nan")
-
-        # Set all methods
-        math_obj.set("abs", abs_fn)
-        math_obj.set("floor", floor_fn)
-        math_obj.set("ceil", ceil_fn)
-        math_obj.set("round", round_fn)
-        math_obj.set("trunc", trunc_fn)
-        math_obj.set("min", min_fn)
-        math_obj.set("max", max_fn)
-        math_obj.set("pow", pow_fn)
-        math_obj.set("sqrt", sqrt_fn)
-        math_obj.set("sin", sin_fn)
-        math_obj.set("cos", cos_fn)
-        math_obj.set("tan", tan_fn)
-        math_obj.set("asin", asin_fn)
-        math_obj.set("acos", acos_fn)
-        math_obj.set("atan", atan_fn)
-        math_obj.set("atan2", atan2_fn)
-        math_obj.set("log", log_fn)
-        math_obj.set("exp", exp_fn)
-        math_obj.set("random", random_fn)
-        math_obj.set("sign", sign_fn)
-        math_obj.set("imul", imul_fn)
-        math_obj.set("fround", fround_fn)
-        math_obj.set("clz32", clz32_fn)
-        math_obj.set("hypot", hypot_fn)
-        math_obj.set("cbrt", cbrt_fn)
-        math_obj.set("log2", log2_fn)
-        math_obj.set("log10", log10_fn)
-        math_obj.set("expm1", expm1_fn)
-        math_obj.set("log1p", log1p_fn)
+        math_obj = JSObject(None, _MATH_PROPERTIES)
 
         return math_obj
 
     def _create_json_object(self) -> JSObject:
         """Create the JSON global object."""
-        json_obj = JSObject()
-        ctx = self  # Reference for closures
-
-        def parse_fn(*args):
-            text = to_string(args[0]) if args else ""
-            try:
-                py_value = json.loads(text)
-                return ctx._to_js(py_value)
-            except json.JSONDecodeError as e:
-                from .errors import JSSyntaxError
-
-                raise JSSyntaxError(f"JSON.parse: {e}")
-
-        def stringify_fn(*args):
-            value = args[0] if args else UNDEFINED
-
-            # Convert JS value to Python for json.dumps, handling undefined specially
-            def to_json_value(v):
-                if v is UNDEFINED:
-                    return None  # Will be filtered out for object properties
-                if v is NULL:
-                    return None
-                if isinstance(v, bool):
-                    return v
-                if isinstance(v, (int, float)):
-                    return v
-                if isinstance(v, str):
-                    return v
-                if isinstance(v, JSArray):
-                    # For arrays, undefined becomes null
-                    return [
-                        None if elem is UNDEFINED else to_json_value(elem)
-                        for elem in v._elements
-                    ]
-                if isinstance(v, JSObject):
-                    # For objects, skip undefined values
-                    result = {}
-                    for k, val in v._properties.items():
-                        if val is not UNDEFINED:
-                            result[k] = to_json_value(val)
-                    return result
-                return None
-
-            py_value = to_json_value(value)
-            try:
-                return json.dumps(py_value, separators=(",", ":"))
-            except (TypeError, ValueError) as e:
-                from .errors import JSTypeError
-
-                raise JSTypeError(f"JSON.stringify: {e}")
-
-        json_obj.set("parse", parse_fn)
-        json_obj.set("stringify", stringify_fn)
+        json_obj = JSObject(None, _JSON_PROPERTIES)
 
         return json_obj
 
     def _create_number_constructor(self) -> JSCallableObject:
         """Create the Number constructor with static methods."""
-
-        def number_call(*args):
-            """Convert argument to a number."""
-            if not args:
-                return 0
-            return to_number(args[0])
-
-        num_constructor = JSCallableObject(number_call)
-
-        def isNaN_fn(*args):
-            x = args[0] if args else UNDEFINED
-            # Number.isNaN only returns true for actual NaN
-            if not isinstance(x, (int, float)):
-                return False
-            return math.isnan(x)
-
-        def isFinite_fn(*args):
-            x = args[0] if args else UNDEFINED
-            if not isinstance(x, (int, float)):
-                return False
-            return not (math.isnan(x) or math.isinf(x))
-
-        def isInteger_fn(*args):
-            x = args[0] if args else UNDEFINED
-            if not isinstance(x, (int, float)):
-                return False
-            if math.isnan(x) or math.isinf(x):
-                return False
-            return x == int(x)
-
-        def parseInt_fn(*args):
-            s = to_string(args[0]) if args else ""
-            radix = int(to_number(args[1])) if len(args) > 1 else 10
-            if radix == 0:
-                radix = 10
-            s = s.strip()
-            if not s:
-                return float("nan")
-            # Handle leading sign
-            sign = 1
-            if s.startswith("-"):
-                sign = -1
-                s = s[1:]
-            elif s.startswith("+"):
-                s = s[1:]
-            # Handle 0x prefix for hex
-            if s.startswith("0x") or s.startswith("0X"):
-                radix = 16
-                s = s[2:]
-            # Parse digits
-            result = 0
-            found = False
-            for ch in s:
-                if ch.isdigit():
-                    digit = ord(ch) - ord("0")
-                elif ch.isalpha():
-                    digit = ord(ch.lower()) - ord("a") + 10
-                else:
-                    break
-                if digit >= radix:
-                    break
-                result = result * radix + digit
-                found = True
-            if not found:
-                return float("nan")
-            return sign * result
-
-        def parseFloat_fn(*args):
-            s = to_string(args[0]) if args else ""
-            s = s.strip()
-            if not s:
-                return float("nan")
-            # Find the longest valid float prefix
-            i = 0
-            has_dot = False
-            has_exp = False
-            if s[i] in "+-":
-                i += 1
-            while i < len(s):
-                if s[i].isdigit():
-                    i += 1
-                elif s[i] == "." and not has_dot:
-                    has_dot = True
-                    i += 1
-                elif s[i] in "eE" and not has_exp:
-                    has_exp = True
-                    i += 1
-                    if i < len(s) and s[i] in "+-":
-                        i += 1
-                else:
-                    break
-            if i == 0:
-                return float("nan")
-            try:
-                return float(s[:i])
-            except ValueError:
-                return float("nan")
-
-        num_constructor.set("isNaN", isNaN_fn)
-        num_constructor.set("isFinite", isFinite_fn)
-        num_constructor.set("isInteger", isInteger_fn)
-        num_constructor.set("parseInt", parseInt_fn)
-        num_constructor.set("parseFloat", parseFloat_fn)
+        num_constructor = JSCallableObject(_number_call, None, _NUMBER_PROPERTIES)
 
         return num_constructor
 
     def _create_string_constructor(self) -> JSCallableObject:
         """Create the String constructor with static methods."""
-
-        def string_call(*args):
-            """Convert argument to a string."""
-            if not args:
-                return ""
-            return to_string(args[0])
-
-        string_constructor = JSCallableObject(string_call)
-
-        def fromCharCode_fn(*args):
-            """String.fromCharCode - create string from char codes."""
-            return "".join(chr(int(to_number(arg))) for arg in args)
-
-        string_constructor.set("fromCharCode", fromCharCode_fn)
+        string_constructor = JSCallableObject(_string_call, None, _STRING_PROPERTIES)
 
         return string_constructor
 
     def _create_boolean_constructor(self) -> JSCallableObject:
         """Create the Boolean constructor."""
-
-        def boolean_call(*args):
-            """Convert argument to a boolean."""
-            if not args:
-                return False
-            val = args[0]
-            # JavaScript truthiness rules
-            if val is UNDEFINED or val is NULL:
-                return False
-            if isinstance(val, bool):
-                return val
-            if isinstance(val, (int, float)):
-                if math.isnan(val):
-                    return False
-                return val != 0
-            if isinstance(val, str):
-                return len(val) > 0
-            # Objects are always truthy
-            return True
-
-        boolean_constructor = JSCallableObject(boolean_call)
+        boolean_constructor = JSCallableObject(_boolean_call)
         return boolean_constructor
 
     def _create_date_constructor(self) -> JSObject:
         """Create the Date constructor with static methods."""
-        date_constructor = JSObject()
-
-        def now_fn(*args):
-            return int(time.time() * 1000)
-
-        date_constructor.set("now", now_fn)
+        date_constructor = JSObject(None, _DATE_PROPERTIES)
 
         return date_constructor
 
@@ -916,8 +1069,8 @@ class Context:
         ctx = self  # Capture self for closure
 
         def regexp_constructor_fn(*args):
-            pattern = to_string(args[0]) if args else ""
-            flags = to_string(args[1]) if len(args) > 1 else ""
+            pattern = _fast_str(args[0]) if args else ""
+            flags = _fast_str(args[1]) if len(args) > 1 else ""
             # Create timeout callback if we have a current VM with time_limit
             poll_callback = None
             if ctx._current_vm and ctx._current_vm.time_limit is not None:
@@ -934,7 +1087,6 @@ class Context:
 
     def _create_function_constructor(self) -> JSCallableObject:
         """Create the Function constructor for dynamic function creation."""
-        from .values import JSFunction
 
         def function_constructor_fn(*args):
             if not args:
@@ -943,7 +1095,7 @@ class Context:
                 params = []
             else:
                 # All args are strings
-                str_args = [to_string(arg) for arg in args]
+                str_args = [_fast_str(arg) for arg in args]
                 # Last argument is the body, rest are parameter names
                 body = str_args[-1]
                 params = str_args[:-1]
@@ -954,27 +1106,23 @@ class Context:
 
             # Parse and compile
             try:
-                parser = Parser(source)
-                ast = parser.parse()
-                compiler = Compiler()
-                bytecode_module = compiler.compile(ast)
+                bytecode_module = self._compile(source)
 
                 # The result should be a function expression wrapped in a program
                 # We need to extract the function from the bytecode
                 # Execute the expression to get the function object
-                vm = VM(self.memory_limit, self.time_limit)
-                vm.globals = self._globals
-                result = vm.run(bytecode_module)
+                result = self._run(bytecode_module)
 
                 if isinstance(result, JSFunction):
                     return result
                 else:
                     # Fallback: return a simple empty function
                     return JSFunction("anonymous", params, bytes(), {})
+            except JSError:
+                # Includes syntax errors and limit errors, which keep their type
+                raise
             except Exception as e:
-                from .errors import JSError
-
-                raise JSError(f"SyntaxError: {str(e)}")
+                raise JSError(f"SyntaxError: {e}") from e
 
         fn_constructor = JSCallableObject(function_constructor_fn)
 
@@ -989,33 +1137,10 @@ class Context:
 
     def _create_typed_array_constructor(self, name: str) -> JSCallableObject:
         """Create a typed array constructor (Int32Array, Uint8Array, etc.)."""
-        from .values import (
-            JSInt32Array,
-            JSUint32Array,
-            JSFloat64Array,
-            JSFloat32Array,
-            JSUint8Array,
-            JSInt8Array,
-            JSInt16Array,
-            JSUint16Array,
-            JSUint8ClampedArray,
-            JSArrayBuffer,
-            JSArray,
-        )
-
-        type_classes = {
-            "Int32Array": JSInt32Array,
-            "Uint32Array": JSUint32Array,
-            "Float64Array": JSFloat64Array,
-            "Float32Array": JSFloat32Array,
-            "Uint8Array": JSUint8Array,
-            "Int8Array": JSInt8Array,
-            "Int16Array": JSInt16Array,
-            "Uint16Array": JSUint16Array,
-            "Uint8ClampedArray": JSUint8ClampedArray,
-        }
-
-        array_class = type_classes[name]
+        array_class = _TYPED_ARRAY_CLASSES[name]
+        # Fixed for this constructor, so looked up once rather than per call
+        element_size = array_class._element_size
+        code = array_class._struct_code
 
         def constructor_fn(*args):
             if not args:
@@ -1028,42 +1153,31 @@ class Context:
                 # new Int32Array(buffer, byteOffset?, length?)
                 buffer = arg
                 byte_offset = int(args[1]) if len(args) > 1 else 0
-                element_size = array_class._element_size
 
                 if len(args) > 2:
                     length = int(args[2])
                 else:
                     length = (buffer.byteLength - byte_offset) // element_size
 
+                end = byte_offset + length * element_size
+                if byte_offset < 0 or length < 0 or end > buffer.byteLength:
+                    raise JSRangeError(f"Invalid typed array length: {length}")
+
                 result = array_class(length)
                 result._buffer = buffer
                 result._byte_offset = byte_offset
 
-                # Read values from buffer
-                import struct
-
-                for i in range(length):
-                    offset = byte_offset + i * element_size
-                    if name in ("Float32Array", "Float64Array"):
-                        fmt = "f" if element_size == 4 else "d"
-                        val = struct.unpack(
-                            fmt, bytes(buffer._data[offset : offset + element_size])
-                        )[0]
-                    else:
-                        val = int.from_bytes(
-                            buffer._data[offset : offset + element_size],
-                            "little",
-                            signed="Int" in name,
-                        )
-                    result._data[i] = result._coerce_value(val)
+                # Decode every element from the buffer in one struct call
+                result._data[:] = struct.unpack_from(
+                    f"<{length}{code}", buffer._data, byte_offset
+                )
 
                 return result
             elif isinstance(arg, JSArray):
                 # new Int32Array([1, 2, 3])
-                length = arg.length
-                result = array_class(length)
-                for i in range(length):
-                    result.set_index(i, arg.get_index(i))
+                result = array_class(0)
+                coerce = result._coerce_value
+                result._data = [coerce(elem) for elem in arg._elements]
                 return result
             return array_class(0)
 
@@ -1073,13 +1187,7 @@ class Context:
 
     def _create_arraybuffer_constructor(self) -> JSCallableObject:
         """Create the ArrayBuffer constructor."""
-        from .values import JSArrayBuffer
-
-        def constructor_fn(*args):
-            length = int(args[0]) if args else 0
-            return JSArrayBuffer(length)
-
-        constructor = JSCallableObject(constructor_fn)
+        constructor = JSCallableObject(_arraybuffer_call)
         constructor._name = "ArrayBuffer"
         return constructor
 
@@ -1096,105 +1204,25 @@ class Context:
                 return code
 
             try:
-                parser = Parser(code)
-                ast = parser.parse()
-                compiler = Compiler()
-                bytecode_module = compiler.compile(ast)
-
-                vm = VM(ctx.memory_limit, ctx.time_limit)
-                vm.globals = ctx._globals
-                return vm.run(bytecode_module)
+                bytecode_module = ctx._compile(code)
+                return ctx._run(bytecode_module)
+            except JSError:
+                raise
             except Exception as e:
-                from .errors import JSError
-
-                raise JSError(f"EvalError: {str(e)}")
+                raise JSError(f"EvalError: {e}") from e
 
         return eval_fn
 
     def _global_isnan(self, *args) -> bool:
         """Global isNaN - converts argument to number first."""
-        x = to_number(args[0]) if args else float("nan")
-        return math.isnan(x)
+        x = _fast_num(args[0]) if args else _NAN
+        return x != x
 
     def _global_isfinite(self, *args) -> bool:
         """Global isFinite - converts argument to number first."""
-        x = to_number(args[0]) if args else float("nan")
-        return not (math.isnan(x) or math.isinf(x))
-
-    def _global_parseint(self, *args):
-        """Global parseInt."""
-        s = to_string(args[0]) if args else ""
-        radix = int(to_number(args[1])) if len(args) > 1 else 10
-        if radix == 0:
-            radix = 10
-        s = s.strip()
-        if not s:
-            return float("nan")
-        sign = 1
-        if s.startswith("-"):
-            sign = -1
-            s = s[1:]
-        elif s.startswith("+"):
-            s = s[1:]
-        if s.startswith("0x") or s.startswith("0X"):
-            radix = 16
-            s = s[2:]
-        result = 0
-        found = False
-        for ch in s:
-            if ch.isdigit():
-                digit = ord(ch) - ord("0")
-            elif ch.isalpha():
-                digit = ord(ch.lower()) - ord("a") + 10
-            else:
-                break
-            if digit >= radix:
-                break
-            result = result * radix + digit
-            found = True
-        if not found:
-            return float("nan")
-        return sign * result
-
-    def _global_parsefloat(self, *args):
-        """Global parseFloat."""
-        s = to_string(args[0]) if args else ""
-        s = s.strip()
-        if not s:
-            return float("nan")
-
-        # Handle Infinity
-        if s.startswith("Infinity"):
-            return float("inf")
-        if s.startswith("-Infinity"):
-            return float("-inf")
-        if s.startswith("+Infinity"):
-            return float("inf")
-
-        i = 0
-        has_dot = False
-        has_exp = False
-        if s[i] in "+-":
-            i += 1
-        while i < len(s):
-            if s[i].isdigit():
-                i += 1
-            elif s[i] == "." and not has_dot:
-                has_dot = True
-                i += 1
-            elif s[i] in "eE" and not has_exp:
-                has_exp = True
-                i += 1
-                if i < len(s) and s[i] in "+-":
-                    i += 1
-            else:
-                break
-        if i == 0:
-            return float("nan")
-        try:
-            return float(s[:i])
-        except ValueError:
-            return float("nan")
+        x = _fast_num(args[0]) if args else _NAN
+        # Only finite numbers give a finite difference
+        return x - x == 0
 
     def eval(self, code: str) -> Any:
         """Evaluate JavaScript code and return the result.
@@ -1211,39 +1239,76 @@ class Context:
             MemoryLimitError: If memory limit is exceeded
             TimeLimitError: If time limit is exceeded
         """
-        # Parse the code
-        parser = Parser(code)
-        ast = parser.parse()
-
-        # Compile to bytecode
-        compiler = Compiler()
-        compiled = compiler.compile(ast)
+        compiled = self._compile(code)
+        return self._to_python(self._run(compiled))
 
-        # Execute
-        vm = VM(memory_limit=self.memory_limit, time_limit=self.time_limit)
+    def _compile(self, code: str) -> CompiledFunction:
+        """Parse and compile code, reusing the result for repeated sources.
 
+        Compiled programs are never modified by the VM, so the same one can be
+        run any number of times.
+        """
+        compiled = self._compile_cache.get(code)
+        if compiled is not None:
+            self._compile_cache.move_to_end(code)
+            return compiled
+
+        ast = Parser(code).parse()
+        compiled = self._compiler.compile(ast)
+
+        if len(code) <= _COMPILE_CACHE_MAX_SOURCE:
+            self._compile_cache[code] = compiled
+            if len(self._compile_cache) > _COMPILE_CACHE_SIZE:
+                self._compile_cache.popitem(last=False)
+        return compiled
+
+    def _acquire_vm(self) -> VM:
+        """Return an idle VM, set up with this context's limits and globals."""
+        vm = self._vm
+        if vm.call_stack:
+            # The shared VM is mid-run, e.g. this run comes from a Python
+            # function called by JavaScript, so use a spare one
+            vm = self._spare_vms.pop() if self._spare_vms else VM()
+        vm.memory_limit = self.memory_limit
+        vm.time_limit = self.time_limit
         # Share globals with VM (don't copy - allows nested eval to modify globals)
         vm.globals = self._globals
+        return vm
+
+    def _release_vm(self, vm: VM) -> None:
+        """Clear a VM after a run and make it available again."""
+        vm.reset()
+        if vm is not self._vm:
+            self._spare_vms.append(vm)
 
+    def _run(self, compiled: CompiledFunction) -> JSValue:
+        """Run a compiled program on an idle VM and return its result."""
+        vm = self._acquire_vm()
         # Store current VM for timeout checking in RegExp constructor
+        outer_vm = self._current_vm
         self._current_vm = vm
         try:
-            result = vm.run(compiled)
+            return vm.run(compiled)
         finally:
-            self._current_vm = None
-
-        return self._to_python(result)
+            self._current_vm = outer_vm
+            self._release_vm(vm)
 
     def _call_function(self, func: JSFunction, args: list) -> Any:
         """Call a JavaScript function with the given arguments.
 
         This is used internally to invoke JSFunction objects from Python code.
         """
-        vm = VM(memory_limit=self.memory_limit, time_limit=self.time_limit)
-        vm.globals.update(self._globals)
-        result = vm._call_callback(func, args, UNDEFINED)
-        self._globals.update(vm.globals)
-        return result
+        vm = self._current_vm
+        if vm is not None:
+            # Called back from a running script, e.g. a sort comparator, so
+            # run the function on top of that script's VM
+            return vm._call_callback(func, args, UNDEFINED)
+        vm = self._acquire_vm()
+        vm.start_time = time.monotonic()
+        try:
+            return vm._call_callback(func, args, UNDEFINED)
+        finally:
+            self._release_vm(vm)
 
     def get(self, name: str) -> Any:
         """Get a global variable.
@@ -1254,7 +1319,12 @@ class Context:
         Returns:
             The value of the variable, converted to Python types
         """
-        value = self._globals.get(name, UNDEFINED)
+        try:
+            value = self._globals[name]
+        except KeyError:
+            return None
+        if type(value) in _PRIMITIVE_TYPES:
+            return value
         return self._to_python(value)
 
     def set(self, name: str, value: Any) -> None:
@@ -1264,55 +1334,226 @@ class Context:
             name: Variable name
             value: Value to set (Python value, will be converted)
         """
-        self._globals[name] = self._to_js(value)
+        if type(value) not in _JS_VALUE_TYPES:
+            value = self._to_js(value)
+        self._globals[name] = value
 
     def _to_python(self, value: JSValue) -> Any:
         """Convert a JavaScript value to Python."""
-        if value is UNDEFINED:
-            return None
-        if value is NULL:
-            return None
-        if isinstance(value, bool):
-            return value
-        if isinstance(value, (int, float)):
-            return value
-        if isinstance(value, str):
-            return value
-        if isinstance(value, JSArray):
-            return [self._to_python(elem) for elem in value._elements]
-        if isinstance(value, JSObject):
-            return {k: self._to_python(v) for k, v in value._properties.items()}
-        return value
+        return _to_python(value)
 
     def _to_js(self, value: Any) -> JSValue:
         """Convert a Python value to JavaScript."""
-        if value is None:
-            return NULL
-        if isinstance(value, bool):
-            return value
-        if isinstance(value, (int, float)):
-            return value
-        if isinstance(value, str):
-            return value
-        # Already JS values - pass through
-        if isinstance(value, (JSObject, JSFunction, JSCallableObject)):
-            return value
-        if value is UNDEFINED:
-            return value
-        if isinstance(value, list):
-            arr = JSArray()
-            for elem in value:
-                arr.push(self._to_js(elem))
-            return arr
-        if isinstance(value, dict):
-            obj = JSObject()
-            for k, v in value.items():
-                obj.set(str(k), self._to_js(v))
-            return obj
-        # Python callables become JS functions
-        if callable(value):
-            return value
-        return UNDEFINED
+        return _to_js(value)
+
+
+def _to_python(value: JSValue) -> Any:
+    """Convert a JavaScript value to Python."""
+    if type(value) in _PRIMITIVE_TYPES:
+        return value
+    # Nested arrays and objects are filled in from an explicit stack
+    # rather than by recursion, so deep structures can't overflow it.
+    # memo maps id() of each container to its copy, so a container that is
+    # reached twice (or contains itself) is only converted once
+    stack: List[Tuple[Any, Any]] = []
+    memo: Dict[int, Any] = {}
+    result = _to_python_item(value, stack, memo)
+    while stack:
+        js_value, py_value = stack.pop()
+        if type(py_value) is list:
+            elements = js_value._elements
+            # Arrays of primitives (the common case) are copied in one go
+            if all(type(elem) in _PRIMITIVE_TYPES for elem in elements):
+                py_value += elements
+            else:
+                # Mixed containers still pass primitives straight through
+                # and only call out for the values that need converting
+                py_value += [
+                    (
+                        elem
+                        if type(elem) in _PRIMITIVE_TYPES
+                        else _to_python_item(elem, stack, memo)
+                    )
+                    for elem in elements
+                ]
+        else:
+            properties = js_value._properties
+            if all(type(v) in _PRIMITIVE_TYPES for v in properties.values()):
+                py_value.update(properties)
+            else:
+                for k, v in properties.items():
+                    py_value[k] = (
+                        v
+                        if type(v) in _PRIMITIVE_TYPES
+                        else _to_python_item(v, stack, memo)
+                    )
+    return result
+
+
+def _to_js(value: Any) -> JSValue:
+    """Convert a Python value to JavaScript."""
+    if type(value) in _PRIMITIVE_TYPES:
+        return value
+    # Same explicit-stack and memo approach as _to_python
+    stack: List[Tuple[Any, Any]] = []
+    memo: Dict[int, Any] = {}
+    result = _to_js_item(value, stack, memo)
+    while stack:
+        py_value, js_value = stack.pop()
+        if isinstance(js_value, JSArray):
+            if all(type(elem) in _PRIMITIVE_TYPES for elem in py_value):
+                js_value._elements += py_value
+            else:
+                js_value._elements += [
+                    (
+                        elem
+                        if type(elem) in _PRIMITIVE_TYPES
+                        else _to_js_item(elem, stack, memo)
+                    )
+                    for elem in py_value
+                ]
+        elif all(
+            type(k) is str and type(v) in _PRIMITIVE_TYPES for k, v in py_value.items()
+        ):
+            js_value._properties.update(py_value)
+        else:
+            for k, v in py_value.items():
+                js_value._properties[str(k)] = (
+                    v if type(v) in _PRIMITIVE_TYPES else _to_js_item(v, stack, memo)
+                )
+    return result
+
+
+_Stack = List[Tuple[Any, Any]]
+
+
+def _to_python_item(value: JSValue, stack: _Stack, memo: Dict[int, Any]) -> Any:
+    """Convert one JavaScript value to Python without descending into it.
+
+    Arrays and objects are returned as empty containers, and pushed onto
+    stack with the value they are to be filled from.
+    """
+    convert = _TO_PYTHON_CONVERTERS.get(type(value))
+    if convert is not None:
+        return convert(value, stack, memo)
+    # Subclasses of JSObject fall through to here
+    if isinstance(value, JSArray):
+        return _empty_list_for(value, stack, memo)
+    if isinstance(value, JSObject):
+        return _empty_dict_for(value, stack, memo)
+    return value
+
+
+def _to_js_item(value: Any, stack: _Stack, memo: Dict[int, Any]) -> JSValue:
+    """Convert one Python value to JavaScript without descending into it.
+
+    Lists and dicts are returned as empty JSArray/JSObject instances, and
+    pushed onto stack with the value they are to be filled from.
+    """
+    convert = _TO_JS_CONVERTERS.get(type(value))
+    if convert is not None:
+        return convert(value, stack, memo)
+    # Subclasses of the built-in types fall through to here
+    if isinstance(value, (bool, int, float, str)):
+        return value
+    # Already JS values - pass through
+    if isinstance(value, (JSObject, JSFunction, JSCallableObject)):
+        return value
+    if isinstance(value, list):
+        return _empty_array_for(value, stack, memo)
+    if isinstance(value, dict):
+        return _empty_object_for(value, stack, memo)
+    # Python callables become JS functions
+    if callable(value):
+        return value
+    return UNDEFINED
+
+
+def _same_value(value: Any, stack: _Stack, memo: Dict[int, Any]) -> Any:
+    return value
+
+
+def _to_none(value: Any, stack: _Stack, memo: Dict[int, Any]) -> None:
+    return None
+
+
+def _to_null(value: Any, stack: _Stack, memo: Dict[int, Any]) -> JSValue:
+    return NULL
+
+
+def _empty_list_for(value: Any, stack: _Stack, memo: Dict[int, Any]) -> list:
+    container = memo.get(id(value))
+    if container is None:
+        container = memo[id(value)] = []
+        stack.append((value, container))
+    return container
+
+
+def _empty_dict_for(value: Any, stack: _Stack, memo: Dict[int, Any]) -> dict:
+    container = memo.get(id(value))
+    if container is None:
+        container = memo[id(value)] = {}
+        stack.append((value, container))
+    return container
+
+
+def _empty_array_for(value: Any, stack: _Stack, memo: Dict[int, Any]) -> JSArray:
+    arr = memo.get(id(value))
+    if arr is None:
+        arr = memo[id(value)] = JSArray()
+        stack.append((value, arr))
+    return arr
+
+
+def _empty_object_for(value: Any, stack: _Stack, memo: Dict[int, Any]) -> JSObject:
+    obj = memo.get(id(value))
+    if obj is None:
+        obj = memo[id(value)] = JSObject()
+        stack.append((value, obj))
+    return obj
+
+
+# Values of these exact types need no conversion on their way into a context
+_JS_VALUE_TYPES = _PRIMITIVE_TYPES | {
+    type(UNDEFINED),
+    type(NULL),
+    JSObject,
+    JSArray,
+    JSFunction,
+    JSCallableObject,
+    JSBoundMethod,
+}
+
+# Converters for the common exact types, looked up with a single dict probe
+# before falling back to the isinstance checks
+_TO_PYTHON_CONVERTERS = {
+    bool: _same_value,
+    int: _same_value,
+    float: _same_value,
+    str: _same_value,
+    type(UNDEFINED): _to_none,
+    type(NULL): _to_none,
+    JSArray: _empty_list_for,
+    JSObject: _empty_dict_for,
+}
+
+_TO_JS_CONVERTERS = {
+    bool: _same_value,
+    int: _same_value,
+    float: _same_value,
+    str: _same_value,
+    type(None): _to_null,
+    list: _empty_array_for,
+    dict: _empty_object_for,
+    # Values that are already JavaScript pass through unchanged
+    type(UNDEFINED): _same_value,
+    type(NULL): _same_value,
+    JSObject: _same_value,
+    JSArray: _same_value,
+    JSFunction: _same_value,
+    JSCallableObject: _same_value,
+    JSBoundMethod: _same_value,
+}
 
 
 # Backwards-compatible alias: JSContext was the original name and may be used
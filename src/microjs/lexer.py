@@ -1,9 +1,125 @@
 """JavaScript lexer (tokenizer)."""
 
-from typing import Iterator, Optional
+import re
+from bisect import bisect_right
+from sys import intern
+from typing import Iterator, Optional, Tuple
 from .tokens import Token, TokenType, KEYWORDS
 from .errors import JSSyntaxError
 
+# A run of whitespace and comments. An unterminated /* comment runs to the
+# end of the source
+_SKIP_RE = re.compile(r"(?:[ \t\r\n]+|//[^\n]*|/\*[\s\S]*?(?:\*/|\Z))+")
+
+# A number literal. Groups 1-3 hold the digits of hexadecimal, octal and
+# binary literals. A decimal literal has its fraction in group 4 and its
+# exponent in group 5; a "." with no digit after it isn't part of the number
+_NUMBER_RE = re.compile(
+    r"0[xX]([0-9a-fA-F]*)|0[oO]([0-7]*)|0[bB]([01]*)"
+    r"|[0-9]*(\.[0-9]+)?([eE][+-]?[0-9]*)?"
+)
+
+# Radix and name of each of _NUMBER_RE's digit groups
+_RADIX_GROUPS = {1: (16, "hex"), 2: (8, "octal"), 3: (2, "binary")}
+
+_DIGITS = frozenset("0123456789")
+
+_QUOTES = frozenset("'\"")
+
+# The ASCII characters that can start an identifier. Other letters are
+# checked with str.isalpha
+_IDENTIFIER_START = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_$")
+
+_REGEX_FLAGS = frozenset("gimsuy")
+
+# The rest of an identifier, from its first character. \w covers letters,
+# digits and underscores, including non-ASCII letters
+_IDENTIFIER_RE = re.compile(r"[\w$]+")
+
+# Runs of characters that stand for themselves in a string literal
+_STRING_SPAN_RES = {
+    '"': re.compile(r'[^"\\\n]+'),
+    "'": re.compile(r"[^'\\\n]+"),
+}
+
+# Values of the escape sequences with a fixed meaning
+_ESCAPES = {
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+    "0": "\0",
+    "b": "\x08",  # Backspace
+    "f": "\x0c",  # Form feed
+    "v": "\x0b",  # Vertical tab
+}
+
+_HEX_RE = re.compile(r"[0-9a-fA-F]+")
+
+_NEWLINE_RE = re.compile("\n")
+
+# The characters _SKIP_RE can start with
+_SKIP_START = frozenset(" \t\r\n/")
+
+# Operator and punctuation tokens
+_OPERATORS = {
+    "(": TokenType.LPAREN,
+    ")": TokenType.RPAREN,
+    "{": TokenType.LBRACE,
+    "}": TokenType.RBRACE,
+    "[": TokenType.LBRACKET,
+    "]": TokenType.RBRACKET,
+    ";": TokenType.SEMICOLON,
+    ",": TokenType.COMMA,
+    ".": TokenType.DOT,
+    ":": TokenType.COLON,
+    "?": TokenType.QUESTION,
+    "~": TokenType.TILDE,
+    "!": TokenType.NOT,
+    "!=": TokenType.NE,
+    "!==": TokenType.NENE,
+    "=": TokenType.ASSIGN,
+    "==": TokenType.EQ,
+    "===": TokenType.EQEQ,
+    "=>": TokenType.ARROW,
+    "<": TokenType.LT,
+    "<=": TokenType.LE,
+    "<<": TokenType.LSHIFT,
+    "<<=": TokenType.LSHIFT_ASSIGN,
+    ">": TokenType.GT,
+    ">=": TokenType.GE,
+    ">>": TokenType.RSHIFT,
+    ">>=": TokenType.RSHIFT_ASSIGN,
+    ">>>": TokenType.URSHIFT,
+    ">>>=": TokenType.URSHIFT_ASSIGN,
+    "&": TokenType.AMPERSAND,
+    "&&": TokenType.AND,
+    "&=": TokenType.AND_ASSIGN,
+    "|": TokenType.PIPE,
+    "||": TokenType.OR,
+    "|=": TokenType.OR_ASSIGN,
+    "+": TokenType.PLUS,
+    "++": TokenType.PLUSPLUS,
+    "+=": TokenType.PLUS_ASSIGN,
+    "-": TokenType.MINUS,
+    "--": TokenType.MINUSMINUS,
+    "-=": TokenType.MINUS_ASSIGN,
+    "*": TokenType.STAR,
+    "**": TokenType.STARSTAR,
+    "*=": TokenType.STAR_ASSIGN,
+    "/": TokenType.SLASH,
+    "/=": TokenType.SLASH_ASSIGN,
+    "%": TokenType.PERCENT,
+    "%=": TokenType.PERCENT_ASSIGN,
+    "^": TokenType.CARET,
+    "^=": TokenType.XOR_ASSIGN,
+}
+
+# Any operator, generated from _OPERATORS. Alternatives are tried longest
+# first, so ">>>=" wins over ">>=" and ">>"
+_OPERATOR_RE = re.compile(
+    "|".join(re.escape(text) for text in sorted(_OPERATORS, key=len, reverse=True))
+)
+
 
 class Lexer:
     """Tokenizes JavaScript source code."""
@@ -11,9 +127,36 @@ class Lexer:
     def __init__(self, source: str):
         self.source = source
         self.pos = 0
-        self.line = 1
-        self.column = 1
         self.length = len(source)
+        # Offset of the first character of each line, and one past the end
+        # so the last line has an end too. Positions are only turned into
+        # lines and columns where they're reported
+        self._line_starts = [0] + [m.end() for m in _NEWLINE_RE.finditer(source)]
+        self._line_starts.append(self.length + 1)
+        # The last line looked up and where it and the next line start.
+        # Tokens are mostly read in order, so most lookups stay on it
+        self._line = 1
+        self._line_start = 0
+        self._next_line_start = self._line_starts[1]
+
+    def _locate(self, pos: int) -> Tuple[int, int]:
+        """Get the 1-based line and column of a position in the source."""
+        if not self._line_start <= pos < self._next_line_start:
+            line = bisect_right(self._line_starts, pos)
+            self._line = line
+            self._line_start = self._line_starts[line - 1]
+            self._next_line_start = self._line_starts[line]
+        return self._line, pos - self._line_start + 1
+
+    @property
+    def line(self) -> int:
+        """Line of the current position."""
+        return self._locate(self.pos)[0]
+
+    @property
+    def column(self) -> int:
+        """Column of the current position."""
+        return self._locate(self.pos)[1]
 
     def _current(self) -> str:
         """Get current character or empty string if at end."""
@@ -34,207 +177,130 @@ class Lexer:
             return ""
         ch = self.source[self.pos]
         self.pos += 1
-        if ch == "\n":
-            self.line += 1
-            self.column = 1
-        else:
-            self.column += 1
         return ch
 
     def _skip_whitespace(self) -> None:
         """Skip whitespace and comments."""
-        while self.pos < self.length:
-            ch = self._current()
-
-            # Whitespace
-            if ch in " \t\r\n":
-                self._advance()
-                continue
-
-            # Single-line comment
-            if ch == "/" and self._peek() == "/":
-                self._advance()  # /
-                self._advance()  # /
-                while self._current() and self._current() != "\n":
-                    self._advance()
-                continue
-
-            # Multi-line comment
-            if ch == "/" and self._peek() == "*":
-                self._advance()  # /
-                self._advance()  # *
-                while self.pos < self.length:
-                    if self._current() == "*" and self._peek() == "/":
-                        self._advance()  # *
-                        self._advance()  # /
-                        break
-                    self._advance()
-                continue
-
-            break
+        start = self.pos
+        # Most tokens follow another directly or after a single space
+        if self.source[start : start + 1] not in _SKIP_START:
+            return
+        m = _SKIP_RE.match(self.source, start)
+        if m is not None:
+            self.pos = m.end()
 
     def _read_string(self, quote: str) -> str:
-        """Read a string literal."""
-        result = []
-        self._advance()  # Skip opening quote
-
-        while self._current() and self._current() != quote:
-            ch = self._advance()
-
-            if ch == "\\":
-                # Escape sequence
-                escape = self._advance()
-                if escape == "n":
-                    result.append("\n")
-                elif escape == "r":
-                    result.append("\r")
-                elif escape == "t":
-                    result.append("\t")
-                elif escape == "\\":
-                    result.append("\\")
-                elif escape == "'":
-                    result.append("'")
-                elif escape == '"':
-                    result.append('"')
-                elif escape == "0":
-                    result.append("\0")
-                elif escape == "b":
-                    result.append("\x08")  # Backspace
-                elif escape == "f":
-                    result.append("\x0c")  # Form feed
-                elif escape == "v":
-                    result.append("\x0b")  # Vertical tab
-                elif escape == "x":
-                    # Hex escape \xNN
-                    hex_chars = self._advance() + self._advance()
-                    try:
-                        result.append(chr(int(hex_chars, 16)))
-                    except ValueError:
-                        raise JSSyntaxError(
-                            f"Invalid hex escape: \\x{hex_chars}",
-                            self.line,
-                            self.column,
-                        )
-                elif escape == "u":
-                    # Unicode escape \uNNNN or \u{N...}
-                    if self._current() == "{":
-                        self._advance()  # {
-                        hex_chars = ""
-                        while self._current() and self._current() != "}":
-                            hex_chars += self._advance()
-                        self._advance()  # }
-                    else:
-                        hex_chars = ""
-                        for _ in range(4):
-                            hex_chars += self._advance()
-                    try:
-                        result.append(chr(int(hex_chars, 16)))
-                    except ValueError:
-                        raise JSSyntaxError(
-                            f"Invalid unicode escape: \\u{hex_chars}",
-                            self.line,
-                            self.column,
-                        )
-                else:
-                    # Unknown escape - just use the character
-                    result.append(escape)
-            elif ch == "\n":
+        """Read a string literal.
+
+        Runs of plain characters are copied as whole slices, so only
+        escape sequences are handled one at a time.
+        """
+        source = self.source
+        span_re = _STRING_SPAN_RES[quote]
+        parts = []
+        pos = self.pos + 1  # Skip opening quote
+
+        while True:
+            m = span_re.match(source, pos)
+            if m is not None:
+                parts.append(m.group())
+                pos = m.end()
+            ch = source[pos : pos + 1]
+            if ch == quote:
+                break
+            if ch != "\\":
+                # A newline, or the end of the source
+                self.pos = pos
                 raise JSSyntaxError(
                     "Unterminated string literal", self.line, self.column
                 )
-            else:
-                result.append(ch)
 
-        if not self._current():
-            raise JSSyntaxError("Unterminated string literal", self.line, self.column)
+            escape = source[pos + 1 : pos + 2]
+            pos += 1 + len(escape)
+            if escape == "x":
+                # Hex escape \xNN
+                hex_chars = source[pos : pos + 2]
+                pos += len(hex_chars)
+                if len(hex_chars) != 2 or not _HEX_RE.fullmatch(hex_chars):
+                    self.pos = pos
+                    raise JSSyntaxError(
+                        f"Invalid hex escape: \\x{hex_chars}", self.line, self.column
+                    )
+                parts.append(chr(int(hex_chars, 16)))
+            elif escape == "u":
+                # Unicode escape \uNNNN or \u{N...}
+                if source[pos : pos + 1] == "{":
+                    end = source.find("}", pos)
+                    if end == -1:
+                        end = len(source)
+                    hex_chars = source[pos + 1 : end]
+                    valid = end < len(source)
+                    pos = end + 1
+                else:
+                    hex_chars = source[pos : pos + 4]
+                    valid = len(hex_chars) == 4
+                    pos += len(hex_chars)
+                if (
+                    not valid
+                    or not _HEX_RE.fullmatch(hex_chars)
+                    or int(hex_chars, 16) > 0x10FFFF
+                ):
+                    self.pos = min(pos, len(source))
+                    raise JSSyntaxError(
+                        f"Invalid unicode escape: \\u{hex_chars}",
+                        self.line,
+                        self.column,
+                    )
+                parts.append(chr(int(hex_chars, 16)))
+            else:
+                # Single-character escapes; unknown ones are the character
+                parts.append(_ESCAPES.get(escape, escape))
 
-        self._advance()  # Skip closing quote
-        return "".join(result)
+        self.pos = pos + 1  # Skip closing quote
+        return "".join(parts)
 
     def _read_number(self) -> float | int:
         """Read a number literal."""
         start = self.pos
-        line = self.line
-        col = self.column
-
-        # Check for hex, octal, or binary
-        if self._current() == "0":
-            next_ch = self._peek()
-            if next_ch and next_ch in "xX":
-                # Hexadecimal
-                self._advance()  # 0
-                self._advance()  # x
-                hex_str = ""
-                while self._current() and self._current() in "0123456789abcdefABCDEF":
-                    hex_str += self._advance()
-                if not hex_str:
-                    raise JSSyntaxError("Invalid hex literal", line, col)
-                return int(hex_str, 16)
-            elif next_ch and next_ch in "oO":
-                # Octal
-                self._advance()  # 0
-                self._advance()  # o
-                oct_str = ""
-                while self._current() and self._current() in "01234567":
-                    oct_str += self._advance()
-                if not oct_str:
-                    raise JSSyntaxError("Invalid octal literal", line, col)
-                return int(oct_str, 8)
-            elif next_ch and next_ch in "bB":
-                # Binary
-                self._advance()  # 0
-                self._advance()  # b
-                bin_str = ""
-                while self._current() and self._current() in "01":
-                    bin_str += self._advance()
-                if not bin_str:
-                    raise JSSyntaxError("Invalid binary literal", line, col)
-                return int(bin_str, 2)
-            # Could be 0, 0.xxx, or 0e... - fall through to decimal handling
-
-        # Decimal number (integer part)
-        while self._current() and self._current().isdigit():
-            self._advance()
-
-        # Decimal point
-        is_float = False
-        if self._current() == "." and self._peek().isdigit():
-            is_float = True
-            self._advance()  # .
-            while self._current() and self._current().isdigit():
-                self._advance()
-
-        # Exponent
-        if self._current() and self._current() in "eE":
-            is_float = True
-            self._advance()
-            if self._current() in "+-":
-                self._advance()
-            if not self._current() or not self._current().isdigit():
-                raise JSSyntaxError("Invalid number literal", line, col)
-            while self._current() and self._current().isdigit():
-                self._advance()
-
-        num_str = self.source[start : self.pos]
-        if is_float:
+        m = _NUMBER_RE.match(self.source, start)
+        num_str = m.group()
+        self.pos = m.end()
+
+        group = m.lastindex
+        if group is not None and group <= 3:
+            # Hexadecimal, octal or binary, with a group for the digits
+            digits = m.group(group)
+            radix, kind = _RADIX_GROUPS[group]
+            if not digits:
+                raise JSSyntaxError(f"Invalid {kind} literal", *self._locate(start))
+            return int(digits, radix)
+
+        exponent = m.group(5)
+        if exponent is not None:
+            if exponent[-1] not in _DIGITS:
+                raise JSSyntaxError("Invalid number literal", *self._locate(start))
+            return float(num_str)
+        if m.group(4) is not None:
             return float(num_str)
         return int(num_str)
 
     def _read_identifier(self) -> str:
-        """Read an identifier."""
-        start = self.pos
-        while self._current() and (
-            self._current().isalnum() or self._current() in "_$"
-        ):
-            self._advance()
-        return self.source[start : self.pos]
+        """Read an identifier.
+
+        Names are interned, so each one is stored once however often it
+        appears, and the dict lookups for it in the compiler and VM can
+        match keys by identity.
+        """
+        m = _IDENTIFIER_RE.match(self.source, self.pos)
+        value = intern(m.group())
+        self.pos = m.end()
+        return value
 
     def next_token(self) -> Token:
         """Get the next token."""
         self._skip_whitespace()
 
-        line = self.line
-        column = self.column
+        line, column = self._locate(self.pos)
 
         if self.pos >= self.length:
             return Token(TokenType.EOF, None, line, column)
@@ -242,156 +308,27 @@ class Lexer:
         ch = self._current()
 
         # String literals
-        if ch in "'\"":
+        if ch in _QUOTES:
             value = self._read_string(ch)
             return Token(TokenType.STRING, value, line, column)
 
         # Number literals
-        if ch.isdigit() or (ch == "." and self._peek().isdigit()):
+        if ch in _DIGITS or (ch == "." and self._peek() in _DIGITS):
             value = self._read_number()
             return Token(TokenType.NUMBER, value, line, column)
 
         # Identifiers and keywords
-        if ch.isalpha() or ch in "_$":
+        if ch in _IDENTIFIER_START or (ch >= "\x80" and ch.isalpha()):
             value = self._read_identifier()
             token_type = KEYWORDS.get(value, TokenType.IDENTIFIER)
             return Token(token_type, value, line, column)
 
         # Operators and punctuation
-        self._advance()
-
-        # Two or three character operators
-        if ch == "=" and self._current() == "=":
-            self._advance()
-            if self._current() == "=":
-                self._advance()
-                return Token(TokenType.EQEQ, "===", line, column)
-            return Token(TokenType.EQ, "==", line, column)
-
-        if ch == "=" and self._current() == ">":
-            self._advance()
-            return Token(TokenType.ARROW, "=>", line, column)
-
-        if ch == "!" and self._current() == "=":
-            self._advance()
-            if self._current() == "=":
-                self._advance()
-                return Token(TokenType.NENE, "!==", line, column)
-            return Token(TokenType.NE, "!=", line, column)
-
-        if ch == "<":
-            if self._current() == "=":
-                self._advance()
-                return Token(TokenType.LE, "<=", line, column)
-            if self._current() == "<":
-                self._advance()
-                if self._current() == "=":
-                    self._advance()
-                    return Token(TokenType.LSHIFT_ASSIGN, "<<=", line, column)
-                return Token(TokenType.LSHIFT, "<<", line, column)
-            return Token(TokenType.LT, "<", line, column)
-
-        if ch == ">":
-            if self._current() == "=":
-                self._advance()
-                return Token(TokenType.GE, ">=", line, column)
-            if self._current() == ">":
-                self._advance()
-                if self._current() == ">":
-                    self._advance()
-                    if self._current() == "=":
-                        self._advance()
-                        return Token(TokenType.URSHIFT_ASSIGN, ">>>=", line, column)
-                    return Token(TokenType.URSHIFT, ">>>", line, column)
-                if self._current() == "=":
-                    self._advance()
-                    return Token(TokenType.RSHIFT_ASSIGN, ">>=", line, column)
-                return Token(TokenType.RSHIFT, ">>", line, column)
-            return Token(TokenType.GT, ">", line, column)
-
-        if ch == "&":
-            if self._current() == "&":
-                self._advance()
-                return Token(TokenType.AND, "&&", line, column)
-            if self._current() == "=":
-                self._advance()
-                return Token(TokenType.AND_ASSIGN, "&=", line, column)
-            return Token(TokenType.AMPERSAND, "&", line, column)
-
-        if ch == "|":
-            if self._current() == "|":
-                self._advance()
-                return Token(TokenType.OR, "||", line, column)
-            if self._current() == "=":
-                self._advance()
-                return Token(TokenType.OR_ASSIGN, "|=", line, column)
-            return Token(TokenType.PIPE, "|", line, column)
-
-        if ch == "+":
-            if self._current() == "+":
-                self._advance()
-                return Token(TokenType.PLUSPLUS, "++", line, column)
-            if self._current() == "=":
-                self._advance()
-                return Token(TokenType.PLUS_ASSIGN, "+=", line, column)
-            return Token(TokenType.PLUS, "+", line, column)
-
-        if ch == "-":
-            if self._current() == "-":
-                self._advance()
-                return Token(TokenType.MINUSMINUS, "--", line, column)
-            if self._current() == "=":
-                self._advance()
-                return Token(TokenType.MINUS_ASSIGN, "-=", line, column)
-            return Token(TokenType.MINUS, "-", line, column)
-
-        if ch == "*":
-            if self._current() == "*":
-                self._advance()
-                return Token(TokenType.STARSTAR, "**", line, column)
-            if self._current() == "=":
-                self._advance()
-                return Token(TokenType.STAR_ASSIGN, "*=", line, column)
-            return Token(TokenType.STAR, "*", line, column)
-
-        if ch == "/":
-            if self._current() == "=":
-                self._advance()
-                return Token(TokenType.SLASH_ASSIGN, "/=", line, column)
-            return Token(TokenType.SLASH, "/", line, column)
-
-        if ch == "%":
-            if self._current() == "=":
-                self._advance()
-                return Token(TokenType.PERCENT_ASSIGN, "%=", line, column)
-            return Token(TokenType.PERCENT, "%", line, column)
-
-        if ch == "^":
-            if self._current() == "=":
-                self._advance()
-                return Token(TokenType.XOR_ASSIGN, "^=", line, column)
-            return Token(TokenType.CARET, "^", line, column)
-
-        # Single character tokens
-        single_char_tokens = {
-            "(": TokenType.LPAREN,
-            ")": TokenType.RPAREN,
-            "{": TokenType.LBRACE,
-            "}": TokenType.RBRACE,
-            "[": TokenType.LBRACKET,
-            "]": TokenType.RBRACKET,
-            ";": TokenType.SEMICOLON,
-            ",": TokenType.COMMA,
-            ".": TokenType.DOT,
-            ":": TokenType.COLON,
-            "?": TokenType.QUESTION,
-            "~": TokenType.TILDE,
-            "!": TokenType.NOT,
-            "=": TokenType.ASSIGN,
-        }
-
-        if ch in single_char_tokens:
-            return Token(single_char_tokens[ch], ch, line, column)
+        m = _OPERATOR_RE.match(self.source, self.pos)
+        if m is not None:
+            text = m.group()
+            self.pos = m.end()
+            return Token(_OPERATORS[text], text, line, column)
 
         raise JSSyntaxError(f"Unexpected character: {ch!r}", line, column)
 
@@ -401,12 +338,9 @@ class Lexer:
         This is called by the parser when it knows a regex is expected.
         The opening / has already been consumed.
         """
-        line = self.line
-        column = self.column - 1  # Account for the / we already consumed
-
         # Go back one position to re-read from /
         self.pos -= 1
-        self.column -= 1
+        line, column = self._locate(self.pos)
 
         if self._current() != "/":
             raise JSSyntaxError("Expected regex literal", line, column)
@@ -441,7 +375,7 @@ class Lexer:
 
         # Read flags
         flags = []
-        while self._current() and self._current() in "gimsuy":
+        while self._current() in _REGEX_FLAGS:
             flags.append(self._advance())
 
         return Token(TokenType.REGEX, ("".join(pattern), "".join(flags)), line, column)
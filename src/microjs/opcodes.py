@@ -20,6 +20,7 @@ class OpCode(IntEnum):
     LOAD_NULL = auto()
     LOAD_TRUE = auto()
     LOAD_FALSE = auto()
+    LOAD_SMALL_INT = auto()  # Load int -128..127: arg = value as a signed byte
 
     # Variables
     LOAD_NAME = auto()  # Load variable by name: arg = name index
@@ -121,43 +122,57 @@ class OpCode(IntEnum):
     STORE_CELL = auto()  # Store to cell: arg = cell slot (for outer function)
 
 
+# Opcode names by value, for disassemble
+_OPCODE_NAMES = {int(op): op.name for op in OpCode}
+
+# Opcodes that disassemble shows with the byte after them as an argument
+_OPCODES_WITH_ARG = frozenset(
+    int(op)
+    for op in (
+        OpCode.LOAD_CONST,
+        OpCode.LOAD_SMALL_INT,
+        OpCode.LOAD_NAME,
+        OpCode.STORE_NAME,
+        OpCode.LOAD_LOCAL,
+        OpCode.STORE_LOCAL,
+        OpCode.JUMP,
+        OpCode.JUMP_IF_FALSE,
+        OpCode.JUMP_IF_TRUE,
+        OpCode.CALL,
+        OpCode.CALL_METHOD,
+        OpCode.NEW,
+        OpCode.BUILD_ARRAY,
+        OpCode.BUILD_OBJECT,
+        OpCode.BUILD_REGEX,
+        OpCode.TRY_START,
+        OpCode.MAKE_CLOSURE,
+        OpCode.TYPEOF_NAME,
+    )
+)
+
+
 def disassemble(bytecode: bytes, constants: list) -> str:
     """Disassemble bytecode for debugging."""
     lines = []
     i = 0
-    while i < len(bytecode):
-        op = OpCode(bytecode[i])
-        line = f"{i:4d}: {op.name}"
-
-        if op in (
-            OpCode.LOAD_CONST,
-            OpCode.LOAD_NAME,
-            OpCode.STORE_NAME,
-            OpCode.LOAD_LOCAL,
-            OpCode.STORE_LOCAL,
-            OpCode.JUMP,
-            OpCode.JUMP_IF_FALSE,
-            OpCode.JUMP_IF_TRUE,
-            OpCode.CALL,
-            OpCode.CALL_METHOD,
-            OpCode.NEW,
-            OpCode.BUILD_ARRAY,
-            OpCode.BUILD_OBJECT,
-            OpCode.BUILD_REGEX,
-            OpCode.TRY_START,
-            OpCode.MAKE_CLOSURE,
-            OpCode.TYPEOF_NAME,
-        ):
-            # Has argument
-            if i + 1 < len(bytecode):
-                arg = bytecode[i + 1]
-                if op == OpCode.LOAD_CONST and arg < len(constants):
-                    line += f" {arg} ({constants[arg]!r})"
-                else:
-                    line += f" {arg}"
-                i += 2
+    length = len(bytecode)
+    while i < length:
+        op = bytecode[i]
+        name = _OPCODE_NAMES.get(op)
+        if name is None:
+            # Raises ValueError for the unknown opcode
+            name = OpCode(op).name
+        line = f"{i:4d}: {name}"
+
+        if op in _OPCODES_WITH_ARG and i + 1 < length:
+            arg = bytecode[i + 1]
+            if op == OpCode.LOAD_CONST and arg < len(constants):
+                line += f" {arg} ({constants[arg]!r})"
+            elif op == OpCode.LOAD_SMALL_INT:
+                line += f" {arg - 256 if arg > 127 else arg}"
             else:
-                i += 1
+                line += f" {arg}"
+            i += 2
         else:
             i += 1
 
@@ -171,8 +171,6 @@ class Parser:
         """Peek at the next token without consuming it."""
         # Save current state
         saved_pos = self.lexer.pos
-        saved_line = self.lexer.line
-        saved_column = self.lexer.column
         saved_current = self.current
 
         # Get next token
@@ -180,8 +178,6 @@ class Parser:
 
         # Restore state
         self.lexer.pos = saved_pos
-        self.lexer.line = saved_line
-        self.lexer.column = saved_column
 
         return next_token
 
@@ -661,8 +657,6 @@ class Parser:
         """Check if this is a single-param arrow function: x => ..."""
         # Save state
         saved_pos = self.lexer.pos
-        saved_line = self.lexer.line
-        saved_column = self.lexer.column
         saved_current = self.current
 
         # Try to advance past identifier and check for =>
@@ -671,8 +665,6 @@ class Parser:
 
         # Restore state
         self.lexer.pos = saved_pos
-        self.lexer.line = saved_line
-        self.lexer.column = saved_column
         self.current = saved_current
 
         return is_arrow
@@ -681,8 +673,6 @@ class Parser:
         """Check if this is a parenthesized arrow function: () => or (a, b) => ..."""
         # Save state
         saved_pos = self.lexer.pos
-        saved_line = self.lexer.line
-        saved_column = self.lexer.column
         saved_current = self.current
 
         is_arrow = False
@@ -704,8 +694,6 @@ class Parser:
 
         # Restore state
         self.lexer.pos = saved_pos
-        self.lexer.line = saved_line
-        self.lexer.column = saved_column
         self.current = saved_current
 
         return is_arrow
@@ -4,7 +4,8 @@ Main regex module - public interface.
 Provides JavaScript-compatible RegExp with ReDoS protection.
 """
 
-from typing import Optional, Callable, List
+from functools import lru_cache
+from typing import Optional, Callable, List, Tuple
 from .parser import RegexParser, RegExpError
 from .compiler import RegexCompiler
 from .vm import RegexVM, MatchResult, RegexTimeoutError, RegexStackOverflow
@@ -75,6 +76,25 @@ def _codepoint_to_utf16_index(s: str, cp_idx: int) -> int:
     return utf16_pos
 
 
+@lru_cache(maxsize=256)
+def _compile_pattern(pattern: str, flags: str) -> Tuple[List[Tuple], int]:
+    """Parse and compile a pattern, returning its bytecode and capture count.
+
+    Compiled bytecode is only ever read by RegexVM, so RegExp objects with
+    the same pattern and flags share it. Errors are raised, not cached.
+    """
+    try:
+        parser = RegexParser(pattern, flags)
+        ast, capture_count = parser.parse()
+
+        compiler = RegexCompiler(flags)
+        return compiler.compile(ast, capture_count), capture_count
+    except Exception as e:
+        if isinstance(e, RegExpError):
+            raise
+        raise RegExpError(f"Failed to compile regex: {e}")
+
+
 class RegExp:
     """
     JavaScript-compatible regular expression object.
@@ -114,18 +134,9 @@ class RegExp:
         self._stack_limit = stack_limit
         self._poll_interval = poll_interval
 
-        # Parse and compile
-        try:
-            parser = RegexParser(pattern, flags)
-            self._ast, self._capture_count = parser.parse()
-
-            compiler = RegexCompiler(flags)
-            self._bytecode = compiler.compile(self._ast, self._capture_count)
-            self._compiled = True
-        except Exception as e:
-            if isinstance(e, RegExpError):
-                raise
-            raise RegExpError(f"Failed to compile regex: {e}")
+        # Parse and compile, reusing earlier work for a repeated pattern
+        self._bytecode, self._capture_count = _compile_pattern(pattern, flags)
+        self._compiled = True
 
     @property
     def global_(self):
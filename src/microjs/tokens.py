@@ -147,9 +147,13 @@ KEYWORDS = {
 }
 
 
-@dataclass
+@dataclass(slots=True)
 class Token:
-    """A token from the JavaScript source."""
+    """A token from the JavaScript source.
+
+    Tokens use slots, as one is made for every lexeme and they are never
+    given extra attributes.
+    """
 
     type: TokenType
     value: Any
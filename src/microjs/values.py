@@ -2,6 +2,7 @@
 
 from typing import Any, Dict, List, Optional, Union, TYPE_CHECKING
 import math
+import struct
 
 if TYPE_CHECKING:
     from .context import Context
@@ -51,6 +52,14 @@ class JSNull:
 UNDEFINED = JSUndefined()
 NULL = JSNull()
 
+# Shared special float values, so hot conversions don't build new ones
+_NAN = math.nan
+_INF = math.inf
+_NEG_INF = -math.inf
+
+# JavaScript numbers; checked by exact type, so booleans are excluded
+_NUMBER_TYPES = frozenset([int, float])
+
 
 # Type alias for JavaScript values
 JSValue = Union[
@@ -84,7 +93,7 @@ def js_typeof(value: JSValue) -> str:
         return "object"  # JavaScript quirk
     if isinstance(value, bool):
         return "boolean"
-    if isinstance(value, (int, float)):
+    if type(value) in _NUMBER_TYPES:
         return "number"
     if isinstance(value, str):
         return "string"
@@ -107,7 +116,7 @@ def to_boolean(value: JSValue) -> bool:
         return False
     if isinstance(value, bool):
         return value
-    if isinstance(value, (int, float)):
+    if type(value) in _NUMBER_TYPES:
         if is_nan(value) or value == 0:
             return False
         return True
@@ -120,12 +129,12 @@ def to_boolean(value: JSValue) -> bool:
 def to_number(value: JSValue) -> Union[int, float]:
     """Convert a JavaScript value to number."""
     if value is UNDEFINED:
-        return float("nan")
+        return _NAN
     if value is NULL:
         return 0
     if isinstance(value, bool):
         return 1 if value else 0
-    if isinstance(value, (int, float)):
+    if type(value) in _NUMBER_TYPES:
         return value
     if isinstance(value, str):
         s = value.strip()
@@ -142,9 +151,28 @@ def to_number(value: JSValue) -> Union[int, float]:
                 return int(s, 2)
             return int(s)
         except ValueError:
-            return float("nan")
+            return _NAN
     # TODO: Handle objects with valueOf
-    return float("nan")
+    return _NAN
+
+
+def to_int32(value: JSValue) -> int:
+    """Convert a JavaScript value to a 32-bit signed integer."""
+    n = to_number(value)
+    if math.isnan(n) or math.isinf(n) or n == 0:
+        return 0
+    n = int(n) & 0xFFFFFFFF
+    if n >= 0x80000000:
+        n -= 0x100000000
+    return n
+
+
+def to_uint32(value: JSValue) -> int:
+    """Convert a JavaScript value to a 32-bit unsigned integer."""
+    n = to_number(value)
+    if math.isnan(n) or math.isinf(n) or n == 0:
+        return 0
+    return int(n) & 0xFFFFFFFF
 
 
 def to_string(value: JSValue) -> str:
@@ -160,9 +188,9 @@ def to_string(value: JSValue) -> str:
     if isinstance(value, float):
         if is_nan(value):
             return "NaN"
-        if value == float("inf"):
+        if value == _INF:
             return "Infinity"
-        if value == float("-inf"):
+        if value == _NEG_INF:
             return "-Infinity"
         # Handle -0
         if value == 0 and math.copysign(1, value) < 0:
@@ -181,8 +209,14 @@ def to_string(value: JSValue) -> str:
 class JSObject:
     """JavaScript object."""
 
-    def __init__(self, prototype: Optional["JSObject"] = None):
-        self._properties: Dict[str, JSValue] = {}
+    def __init__(
+        self,
+        prototype: Optional["JSObject"] = None,
+        properties: Optional[Dict[str, JSValue]] = None,
+    ):
+        self._properties: Dict[str, JSValue] = (
+            {} if properties is None else dict(properties)
+        )
         self._getters: Dict[str, Any] = {}  # property name -> getter function
         self._setters: Dict[str, Any] = {}  # property name -> setter function
         self._prototype = prototype
@@ -245,8 +279,13 @@ class JSObject:
 class JSCallableObject(JSObject):
     """JavaScript object that is also callable (for constructors like Number, String, Boolean)."""
 
-    def __init__(self, call_fn, prototype: Optional["JSObject"] = None):
-        super().__init__(prototype)
+    def __init__(
+        self,
+        call_fn,
+        prototype: Optional["JSObject"] = None,
+        properties: Optional[Dict[str, JSValue]] = None,
+    ):
+        super().__init__(prototype, properties)
         self._call_fn = call_fn
 
     def __call__(self, *args):
@@ -404,6 +443,7 @@ class JSTypedArray(JSObject):
 
     # Subclasses override these
     _element_size = 1  # bytes per element
+    _struct_code = "B"  # struct format character for one element
     _type_name = "TypedArray"
     _signed = False
 
@@ -435,8 +475,6 @@ class JSTypedArray(JSObject):
 
     def _read_from_buffer(self, index: int):
         """Read a value from the underlying buffer."""
-        import struct
-
         offset = self._byte_offset + index * self._element_size
         data = bytes(self._buffer._data[offset : offset + self._element_size])
         if len(data) < self._element_size:
@@ -445,8 +483,6 @@ class JSTypedArray(JSObject):
 
     def _write_to_buffer(self, index: int, value) -> None:
         """Write a value to the underlying buffer."""
-        import struct
-
         offset = self._byte_offset + index * self._element_size
         packed = self._pack_value(value)
         for i, b in enumerate(packed):
@@ -472,6 +508,7 @@ class JSInt32Array(JSTypedArray):
     """JavaScript Int32Array."""
 
     _element_size = 4
+    _struct_code = "i"
     _type_name = "Int32Array"
     _signed = True
 
@@ -491,6 +528,7 @@ class JSUint32Array(JSTypedArray):
     """JavaScript Uint32Array."""
 
     _element_size = 4
+    _struct_code = "I"
     _type_name = "Uint32Array"
     _signed = False
 
@@ -505,6 +543,7 @@ class JSFloat64Array(JSTypedArray):
     """JavaScript Float64Array."""
 
     _element_size = 8
+    _struct_code = "d"
     _type_name = "Float64Array"
     _signed = False
 
@@ -516,14 +555,10 @@ class JSFloat64Array(JSTypedArray):
 
     def _unpack_value(self, data: bytes):
         """Unpack bytes to float64."""
-        import struct
-
         return struct.unpack("<d", data)[0]
 
     def _pack_value(self, value) -> bytes:
         """Pack float64 to bytes."""
-        import struct
-
         return struct.pack("<d", float(value))
 
 
@@ -531,6 +566,7 @@ class JSUint8Array(JSTypedArray):
     """JavaScript Uint8Array."""
 
     _element_size = 1
+    _struct_code = "B"
     _type_name = "Uint8Array"
     _signed = False
 
@@ -545,6 +581,7 @@ class JSInt8Array(JSTypedArray):
     """JavaScript Int8Array."""
 
     _element_size = 1
+    _struct_code = "b"
     _type_name = "Int8Array"
     _signed = True
 
@@ -562,6 +599,7 @@ class JSInt16Array(JSTypedArray):
     """JavaScript Int16Array."""
 
     _element_size = 2
+    _struct_code = "h"
     _type_name = "Int16Array"
     _signed = True
 
@@ -579,6 +617,7 @@ class JSUint16Array(JSTypedArray):
     """JavaScript Uint16Array."""
 
     _element_size = 2
+    _struct_code = "H"
     _type_name = "Uint16Array"
     _signed = False
 
@@ -593,6 +632,7 @@ class JSUint8ClampedArray(JSTypedArray):
     """JavaScript Uint8ClampedArray."""
 
     _element_size = 1
+    _struct_code = "B"
     _type_name = "Uint8ClampedArray"
 
     def _coerce_value(self, value):
@@ -613,13 +653,12 @@ class JSFloat32Array(JSTypedArray):
     """JavaScript Float32Array."""
 
     _element_size = 4
+    _struct_code = "f"
     _type_name = "Float32Array"
     _signed = False
 
     def _coerce_value(self, value):
         """Coerce to 32-bit float."""
-        import struct
-
         if isinstance(value, (int, float)):
             # Convert to float32 and back to simulate precision loss
             packed = struct.pack("<f", float(value))
@@ -628,14 +667,10 @@ class JSFloat32Array(JSTypedArray):
 
     def _unpack_value(self, data: bytes):
         """Unpack bytes to float32."""
-        import struct
-
         return struct.unpack("<f", data)[0]
 
     def _pack_value(self, value) -> bytes:
         """Pack float32 to bytes."""
-        import struct
-
         return struct.pack("<f", float(value))
 
 
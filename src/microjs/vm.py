@@ -2,6 +2,7 @@
 
 import math
 import time
+from functools import cmp_to_key
 from typing import Any, Dict, List, Optional, Tuple, Union
 from dataclasses import dataclass
 
@@ -19,10 +20,14 @@ from .values import (
     JSRegExp,
     JSTypedArray,
     JSArrayBuffer,
+    JSBoundMethod,
     to_boolean,
     to_number,
     to_string,
+    to_int32,
+    to_uint32,
     js_typeof,
+    _NUMBER_TYPES,
 )
 from .errors import (
     JSError,
@@ -31,7 +36,11 @@ from .errors import (
     MemoryLimitError,
     TimeLimitError,
 )
-from .regex import RegexTimeoutError
+from .regex import RegExp as InternalRegExp, RegexTimeoutError
+
+_NAN = math.nan
+_INF = math.inf
+_NEG_INF = -math.inf
 
 
 def js_round(x: float, ndigits: int = 0) -> float:
@@ -49,6 +58,37 @@ def js_round(x: float, ndigits: int = 0) -> float:
             return math.ceil(x * multiplier - 0.5) / multiplier
 
 
+# Bytecode of the comparators (a, b) => a - b and (a, b) => b - a
+_ASCENDING_COMPARATOR = bytes(
+    [OpCode.LOAD_LOCAL, 0, OpCode.LOAD_LOCAL, 1, OpCode.SUB, OpCode.RETURN]
+)
+_DESCENDING_COMPARATOR = bytes(
+    [OpCode.LOAD_LOCAL, 1, OpCode.LOAD_LOCAL, 0, OpCode.SUB, OpCode.RETURN]
+)
+
+
+def numeric_sort_order(comparator: Any, elements: List[JSValue]) -> Optional[bool]:
+    """Check whether a sort is a plain numeric sort Python can do natively.
+
+    Returns the reverse flag for list.sort() if comparator is a - b or
+    b - a and every element is a number other than NaN, otherwise None.
+    """
+    if not isinstance(comparator, JSFunction):
+        return None
+    bytecode = comparator.bytecode
+    if bytecode.startswith(_ASCENDING_COMPARATOR):
+        reverse = False
+    elif bytecode.startswith(_DESCENDING_COMPARATOR):
+        reverse = True
+    else:
+        return None
+    for e in elements:
+        # e != e is only true for NaN
+        if type(e) not in _NUMBER_TYPES or e != e:
+            return None
+    return reverse
+
+
 @dataclass
 class ClosureCell:
     """A cell for closure variable - allows sharing between scopes."""
@@ -129,6 +169,17 @@ class VM:
         self.exception: Optional[JSValue] = None
         self.exception_handlers: List[Tuple[int, int]] = []  # (frame_idx, catch_ip)
 
+    def reset(self) -> None:
+        """Clear the state left by a run, so the VM can run another program.
+
+        Globals and limits are kept.
+        """
+        self.stack.clear()
+        self.call_stack.clear()
+        self.instruction_count = 0
+        self.exception = None
+        self.exception_handlers.clear()
+
     def run(self, compiled: CompiledFunction) -> JSValue:
         """Run compiled bytecode and return result."""
         self.start_time = time.monotonic()
@@ -195,6 +246,7 @@ class VM:
                 frame.ip += 2
             elif op in (
                 OpCode.LOAD_CONST,
+                OpCode.LOAD_SMALL_INT,
                 OpCode.LOAD_NAME,
                 OpCode.STORE_NAME,
                 OpCode.LOAD_LOCAL,
@@ -274,6 +326,10 @@ class VM:
         elif op == OpCode.LOAD_CONST:
             self.stack.append(frame.func.constants[arg])
 
+        elif op == OpCode.LOAD_SMALL_INT:
+            # Argument byte is the value as a signed 8-bit integer
+            self.stack.append(arg - 256 if arg > 127 else arg)
+
         elif op == OpCode.LOAD_UNDEFINED:
             self.stack.append(UNDEFINED)
 
@@ -295,10 +351,11 @@ class VM:
 
         elif op == OpCode.LOAD_NAME:
             name = frame.func.constants[arg]
-            if name in self.globals:
+            # Subscript rather than "in", so lazily built globals are found
+            try:
                 self.stack.append(self.globals[name])
-            else:
-                raise JSReferenceError(f"{name} is not defined")
+            except KeyError:
+                raise JSReferenceError(f"{name} is not defined") from None
 
         elif op == OpCode.STORE_NAME:
             name = frame.func.constants[arg]
@@ -429,11 +486,11 @@ class VM:
                 # Check sign of zero using copysign
                 b_sign = math.copysign(1, b_num)
                 if a_num == 0:
-                    self.stack.append(float("nan"))
+                    self.stack.append(_NAN)
                 elif (a_num > 0) == (b_sign > 0):  # Same sign
-                    self.stack.append(float("inf"))
+                    self.stack.append(_INF)
                 else:  # Different signs
-                    self.stack.append(float("-inf"))
+                    self.stack.append(_NEG_INF)
             else:
                 self.stack.append(a_num / b_num)
 
@@ -443,7 +500,7 @@ class VM:
             b_num = to_number(b)
             a_num = to_number(a)
             if b_num == 0:
-                self.stack.append(float("nan"))
+                self.stack.append(_NAN)
             else:
                 self.stack.append(a_num % b_num)
 
@@ -563,9 +620,9 @@ class VM:
         elif op == OpCode.TYPEOF_NAME:
             # Special typeof that returns "undefined" for undeclared variables
             name = frame.func.constants[arg]
-            if name in self.globals:
+            try:
                 self.stack.append(js_typeof(self.globals[name]))
-            else:
+            except KeyError:
                 self.stack.append("undefined")
 
         elif op == OpCode.INSTANCEOF:
@@ -860,22 +917,11 @@ class VM:
 
     def _to_int32(self, value: JSValue) -> int:
         """Convert to 32-bit signed integer."""
-        n = to_number(value)
-        if math.isnan(n) or math.isinf(n) or n == 0:
-            return 0
-        n = int(n)
-        n = n & 0xFFFFFFFF
-        if n >= 0x80000000:
-            n -= 0x100000000
-        return n
+        return to_int32(value)
 
     def _to_uint32(self, value: JSValue) -> int:
         """Convert to 32-bit unsigned integer."""
-        n = to_number(value)
-        if math.isnan(n) or math.isinf(n) or n == 0:
-            return 0
-        n = int(n)
-        return n & 0xFFFFFFFF
+        return to_uint32(value)
 
     def _compare(self, a: JSValue, b: JSValue) -> int:
         """Compare two values. Returns -1, 0, or 1."""
@@ -903,8 +949,8 @@ class VM:
         """JavaScript === operator."""
         # Different types are never equal
         if type(a) != type(b):
-            # Special case: int and float
-            if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+            # Special case: int and float (but not bool, which is an int)
+            if type(a) in _NUMBER_TYPES and type(b) in _NUMBER_TYPES:
                 return a == b
             return False
         # NaN is not equal to itself
@@ -926,13 +972,13 @@ class VM:
             return True
 
         # Number comparisons
-        if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        if type(a) in _NUMBER_TYPES and type(b) in _NUMBER_TYPES:
             return a == b
 
         # String to number
-        if isinstance(a, str) and isinstance(b, (int, float)):
+        if isinstance(a, str) and type(b) in _NUMBER_TYPES:
             return to_number(a) == b
-        if isinstance(a, (int, float)) and isinstance(b, str):
+        if type(a) in _NUMBER_TYPES and isinstance(b, str):
             return a == to_number(b)
 
         # Boolean to number
@@ -1349,40 +1395,39 @@ class VM:
 
         def sort_fn(*args):
             comparator = args[0] if args else None
+            elements = arr._elements
 
-            # Default string comparison
-            def default_compare(a, b):
-                # Convert to strings and compare
-                str_a = to_string(a)
-                str_b = to_string(b)
-                if str_a < str_b:
-                    return -1
-                if str_a > str_b:
-                    return 1
-                return 0
-
-            def compare_fn(a, b):
-                # undefined values always sort to the end per JS spec
-                if a is UNDEFINED and b is UNDEFINED:
-                    return 0
-                if a is UNDEFINED:
-                    return 1
-                if b is UNDEFINED:
-                    return -1
-                # Use comparator if provided
-                if comparator and (
-                    callable(comparator) or isinstance(comparator, JSFunction)
-                ):
+            if comparator and (
+                callable(comparator) or isinstance(comparator, JSFunction)
+            ):
+                reverse = numeric_sort_order(comparator, elements)
+                if reverse is not None:
+                    elements.sort(reverse=reverse)
+                    return arr
+
+                def compare_fn(a, b):
+                    # undefined values always sort to the end per JS spec
+                    if a is UNDEFINED and b is UNDEFINED:
+                        return 0
+                    if a is UNDEFINED:
+                        return 1
+                    if b is UNDEFINED:
+                        return -1
                     result = vm._call_callback(comparator, [a, b])
-                    # Convert to integer for cmp_to_key
                     num = to_number(result) if result is not UNDEFINED else 0
-                    return int(num) if isinstance(num, (int, float)) else 0
-                return default_compare(a, b)
+                    # Only the sign matters; NaN compares as equal
+                    return -1 if num < 0 else (1 if num > 0 else 0)
 
-            # Sort using Python's sort with custom key
-            from functools import cmp_to_key
+                elements.sort(key=cmp_to_key(compare_fn))
+                return arr
 
-            arr._elements.sort(key=cmp_to_key(compare_fn))
+            # Default sort compares string forms, with undefined values last.
+            # A plain key sort converts each element once instead of twice
+            # per comparison.
+            defined = [e for e in elements if e is not UNDEFINED]
+            defined.sort(key=to_string)
+            defined.extend([UNDEFINED] * (len(elements) - len(defined)))
+            elements[:] = defined
             return arr
 
         methods = {
@@ -1495,7 +1540,6 @@ class VM:
 
     def _make_callable_method(self, fn: Any, method: str) -> Any:
         """Create a method for Python callables (including JSBoundMethod)."""
-        from .values import JSBoundMethod
 
         def call_fn(*args):
             """Call with explicit this and individual arguments."""
@@ -1671,8 +1715,6 @@ class VM:
             return self._number_to_base(n, radix)
 
         def toExponential(*args):
-            import math
-
             if args and args[0] is not UNDEFINED:
                 digits = int(to_number(args[0]))
             else:
@@ -1719,8 +1761,6 @@ class VM:
                 return f"{sign}{mantissa_str}e{exp_sign}{exp}"
 
         def toPrecision(*args):
-            import math
-
             if not args or args[0] is UNDEFINED:
                 if isinstance(n, float) and n.is_integer():
                     return str(int(n))
@@ -1810,7 +1850,7 @@ class VM:
             idx = int(to_number(args[0])) if args else 0
             if 0 <= idx < len(s):
                 return ord(s[idx])
-            return float("nan")
+            return _NAN
 
         def indexOf(*args):
             search = to_string(args[0]) if args else ""
@@ -2047,8 +2087,6 @@ class VM:
                 arr.set("input", s)
                 return arr
 
-            from .regex import RegExp as InternalRegExp
-
             if isinstance(pattern, JSRegExp):
                 regex_internal = pattern._internal
                 is_global = "g" in pattern._flags
@@ -2115,8 +2153,6 @@ class VM:
             if pattern is None:
                 return 0  # Match empty string at start
 
-            from .regex import RegExp as InternalRegExp
-
             if isinstance(pattern, JSRegExp):
                 regex_internal = pattern._internal
             else:
@@ -2266,8 +2302,6 @@ class VM:
         self, method: JSValue, this_val: JSValue, args: List[JSValue]
     ) -> None:
         """Call a method."""
-        from .values import JSBoundMethod
-
         if isinstance(method, JSFunction):
             self._invoke_js_function(method, args, this_val)
         elif isinstance(method, JSBoundMethod):
@@ -2324,6 +2358,7 @@ class VM:
                     frame.ip += 2
                 elif op in (
                     OpCode.LOAD_CONST,
+                    OpCode.LOAD_SMALL_INT,
                     OpCode.LOAD_NAME,
                     OpCode.STORE_NAME,
                     OpCode.LOAD_LOCAL,
@@ -2512,7 +2547,5 @@ class VM:
             self._throw(error_obj)
         else:
             # Fall back to a plain object with message property
-            error_obj = JSObject()
-            error_obj.set("name", error_type)
-            error_obj.set("message", message)
+            error_obj = JSObject(None, {"name": error_type, "message": message})
             self._throw(error_obj)
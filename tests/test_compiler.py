@@ -0,0 +1,414 @@
+"""Tests for the bytecode compiler."""
+
+import math
+
+import pytest
+from microjs import Context
+from microjs.compiler import Compiler
+from microjs.opcodes import OpCode, disassemble
+from microjs.parser import Parser
+
+
+def compile_js(code):
+    """Compile a program and return the CompiledFunction."""
+    return Compiler().compile(Parser(code).parse())
+
+
+def opcodes(compiled):
+    """Return the opcodes in a compiled function, skipping arguments."""
+    ops = []
+    i = 0
+    bytecode = compiled.bytecode
+    while i < len(bytecode):
+        op = OpCode(bytecode[i])
+        ops.append(op)
+        if op in (
+            OpCode.JUMP,
+            OpCode.JUMP_IF_FALSE,
+            OpCode.JUMP_IF_TRUE,
+            OpCode.TRY_START,
+        ):
+            i += 3
+        elif op in (
+            OpCode.LOAD_CONST,
+            OpCode.LOAD_SMALL_INT,
+            OpCode.LOAD_NAME,
+            OpCode.STORE_NAME,
+            OpCode.LOAD_LOCAL,
+            OpCode.STORE_LOCAL,
+            OpCode.LOAD_CLOSURE,
+            OpCode.STORE_CLOSURE,
+            OpCode.LOAD_CELL,
+            OpCode.STORE_CELL,
+            OpCode.CALL,
+            OpCode.CALL_METHOD,
+            OpCode.NEW,
+            OpCode.BUILD_ARRAY,
+            OpCode.BUILD_OBJECT,
+            OpCode.BUILD_REGEX,
+            OpCode.MAKE_CLOSURE,
+            OpCode.TYPEOF_NAME,
+        ):
+            i += 2
+        else:
+            i += 1
+    return ops
+
+
+class TestConstantFolding:
+    """Test compile-time evaluation of constant expressions."""
+
+    def test_arithmetic_is_folded(self):
+        """Literal-only arithmetic compiles to a single constant."""
+        compiled = compile_js("24 * 60 * 60")
+        assert opcodes(compiled) == [OpCode.LOAD_CONST, OpCode.RETURN]
+        assert compiled.constants == [86400.0]
+
+    def test_string_concatenation_is_folded(self):
+        """String + number concatenation is folded."""
+        compiled = compile_js('"a" + 1 + 2')
+        assert compiled.constants == ["a12"]
+
+    def test_unary_is_folded(self):
+        """Unary operators on literals are folded."""
+        assert compile_js("-1000").constants == [-1000]
+        assert opcodes(compile_js("!0")) == [OpCode.LOAD_TRUE, OpCode.RETURN]
+        assert compile_js("typeof 1").constants == ["number"]
+
+    def test_non_constant_operand_not_folded(self):
+        """Expressions involving variables are left alone."""
+        ops = opcodes(compile_js("x + 1"))
+        assert OpCode.ADD in ops
+
+    def test_logical_with_constant_left_drops_branch(self):
+        """`0 || f()` compiles to just the call."""
+        ops = opcodes(compile_js("0 || f()"))
+        assert ops == [OpCode.LOAD_NAME, OpCode.CALL, OpCode.RETURN]
+
+    def test_conditional_with_constant_test_drops_branch(self):
+        """`true ? a : b` compiles to just `a`."""
+        ops = opcodes(compile_js("true ? a : b"))
+        assert ops == [OpCode.LOAD_NAME, OpCode.RETURN]
+
+    def test_negative_zero_not_folded(self):
+        """-0 keeps its sign even though the constant pool can't store it."""
+        ctx = Context()
+        assert math.copysign(1, ctx.eval("-0")) == -1
+        assert ctx.eval("1 / -0") == float("-inf")
+
+    def test_int_and_float_constants_stay_distinct(self):
+        """A folded float doesn't replace a later integer literal."""
+        ctx = Context()
+        result = ctx.eval("var a = 2 * 3; var b = 6; b")
+        assert result == 6
+        assert isinstance(result, int)
+
+    @pytest.mark.parametrize(
+        "a,op,b",
+        [
+            ("1", "/", "0"),
+            ("-1", "/", "0"),
+            ("7", "/", "2"),
+            ("5.5", "%", "2"),
+            ("2", "**", "10"),
+            ("2", "**", "-1"),
+            ("1", "<<", "31"),
+            ("-1", ">>>", "0"),
+            ("'5'", "*", "'2'"),
+            ("'1'", "==", "1"),
+            ("null", "==", "0"),
+            ("'a'", "<", "'b'"),
+            ("1", "&&", "'x'"),
+            ("''", "||", "0"),
+        ],
+    )
+    def test_folding_matches_runtime(self, a, op, b):
+        """Folded results match what the VM computes for the same values."""
+        ctx = Context()
+        folded = ctx.eval(f"{a} {op} {b}")
+        runtime = ctx.eval(f"var a = {a}, b = {b}; a {op} b")
+        assert folded == runtime
+        assert type(folded) is type(runtime)
+
+
+class TestScopeAnalysis:
+    """Test detection of captured and free variables."""
+
+    def test_closure_in_if_test_shares_variable(self):
+        """A function created in an if condition sees later assignments."""
+        ctx = Context()
+        result = ctx.eval("""
+            function f() {
+                var x = 1;
+                var get;
+                if ((get = function() { return x; })) {}
+                x = 2;
+                return get();
+            }
+            f()
+            """)
+        assert result == 2
+
+    def test_pass_through_free_variable(self):
+        """A variable used only by a nested-nested function is passed through."""
+        ctx = Context()
+        result = ctx.eval("""
+            function outer() {
+                var x = 5;
+                return function middle() {
+                    return function inner() { return x; };
+                };
+            }
+            outer()()()
+            """)
+        assert result == 5
+
+    def test_analysis_is_cached_per_body(self):
+        """Each function body is analysed once per compile."""
+        compiler = Compiler()
+        compiler.compile(
+            Parser(
+                "function a() { function b() { function c() { return 1; } } }"
+            ).parse()
+        )
+        assert len(compiler._analysis_cache) == 3
+
+
+class TestVariableAccess:
+    """Test loads and stores of variables in their different slots."""
+
+    def test_typeof_captured_local_reads_cell(self):
+        """typeof sees a value assigned to a captured local by a closure."""
+        ctx = Context()
+        result = ctx.eval("""
+            function f() {
+                var x;
+                var set = function() { x = 1; };
+                set();
+                return typeof x;
+            }
+            f()
+            """)
+        assert result == "number"
+
+    def test_for_in_variable_captured_by_closure(self):
+        """A captured for-in variable is stored in its cell."""
+        ctx = Context()
+        result = ctx.eval("""
+            function f() {
+                var get;
+                for (var k in {a: 1, b: 2}) {
+                    get = function() { return k; };
+                }
+                return get();
+            }
+            f()
+            """)
+        assert result == "b"
+
+    def test_for_of_assigns_outer_variable(self):
+        """for-of with a bare identifier can assign a closure variable."""
+        ctx = Context()
+        result = ctx.eval("""
+            function f() {
+                var last;
+                (function() { for (last of [1, 2, 3]) {} })();
+                return last;
+            }
+            f()
+            """)
+        assert result == 3
+
+    def test_update_and_compound_assignment_on_closure(self):
+        """++ and += on a captured variable update the shared cell."""
+        ctx = Context()
+        result = ctx.eval("""
+            function counter() {
+                var n = 0;
+                return function() { n++; n += 10; return n; };
+            }
+            var c = counter();
+            c();
+            c()
+            """)
+        assert result == 22
+
+
+class TestPeephole:
+    """Test the peephole pass over emitted bytecode."""
+
+    def test_assignment_drops_dup_and_pop(self):
+        """`x = 1;` stores without duplicating and popping the value."""
+        ops = opcodes(compile_js("x = 1; 0"))
+        assert ops == [
+            OpCode.LOAD_SMALL_INT,
+            OpCode.STORE_NAME,
+            OpCode.POP,
+            OpCode.LOAD_SMALL_INT,
+            OpCode.RETURN,
+        ]
+
+    def test_constant_loop_condition_removed(self):
+        """`while (true)` doesn't test its condition at runtime."""
+        ops = opcodes(compile_js("while (true) { break; }"))
+        assert OpCode.LOAD_TRUE not in ops
+        assert OpCode.JUMP_IF_FALSE not in ops
+
+    def test_jumps_retargeted(self):
+        """Loops still run correctly after instructions are removed."""
+        ctx = Context()
+        result = ctx.eval("""
+            var total = 0, i = 0;
+            while (true) {
+                i = i + 1;
+                if (i > 10) break;
+                if (i % 2) continue;
+                total += i;
+            }
+            do { total = total * 2; } while (false);
+            total
+            """)
+        assert result == 60
+
+
+class TestExpressionWorklist:
+    """Test that operator expressions compile without deep recursion."""
+
+    def test_long_binary_chain(self):
+        """A chain longer than the recursion limit compiles and runs."""
+        ctx = Context()
+        assert ctx.eval("var x = 1; " + "x + " * 5000 + "x") == 5001
+
+    def test_operand_order(self):
+        """Operands are still evaluated left to right."""
+        ctx = Context()
+        result = ctx.eval("""
+            var log = [];
+            function f(v) { log.push(v); return v; }
+            var r = f(1) - -f(2) * f(3) + !f(0);
+            [r, log.join(",")]
+            """)
+        assert result == [8, "1,2,3,0"]
+
+
+class TestConstantPool:
+    """Test constant deduplication and interning."""
+
+    def test_constants_deduplicated(self):
+        """Repeated constants share one slot per function."""
+        compiled = compile_js("var a = 'x' + y; var b = 'x' + y; 1.5 + z + 1.5")
+        assert compiled.constants.count("x") == 1
+        assert compiled.constants.count(1.5) == 1
+
+    def test_constants_interned_across_functions(self):
+        """Functions share the same object for an equal constant."""
+        compiled = compile_js(
+            "function f() { return 'some key' + x; }"
+            "function g() { return 'some key' + y; }"
+        )
+        f, g = [c for c in compiled.constants if hasattr(c, "bytecode")]
+        (f_key,) = [c for c in f.constants if c == "some key"]
+        (g_key,) = [c for c in g.constants if c == "some key"]
+        assert f_key is g_key
+
+
+class TestSmallIntegers:
+    """Test the LOAD_SMALL_INT instruction."""
+
+    def test_small_ints_skip_constant_pool(self):
+        """Ints from -128 to 127 are encoded in the instruction."""
+        compiled = compile_js("[0, 127, -128, 128, -129, 1.5]")
+        assert compiled.constants == [128, -129, 1.5]
+        assert opcodes(compiled).count(OpCode.LOAD_SMALL_INT) == 3
+
+    @pytest.mark.parametrize("value", [0, 1, 127, -1, -128])
+    def test_small_int_values(self, value):
+        """Small ints keep their value and type at runtime."""
+        result = Context().eval(f"{value}")
+        assert result == value
+        assert type(result) is int
+
+
+class TestVariableResolutionCache:
+    """Test the per-function cache of variable resolutions."""
+
+    def test_cache_invalidated_when_local_added(self):
+        """A name resolved as global is re-resolved once it becomes local."""
+        ctx = Context()
+        result = ctx.eval("""
+            function f() {
+                var r = typeof e;
+                try { throw 1; } catch (e) { r += e; }
+                return r;
+            }
+            f()
+            """)
+        assert result == "undefined1"
+
+    def test_cache_is_per_function(self):
+        """The same name resolves differently in nested functions."""
+        ctx = Context()
+        result = ctx.eval("""
+            var x = "global";
+            function outer() {
+                var x = "outer";
+                function inner() { return x; }
+                return [x, inner()];
+            }
+            outer().concat([x])
+            """)
+        assert result == ["outer", "outer", "global"]
+
+
+class TestCompilerReuse:
+    """Test compiling several programs with one Compiler."""
+
+    def test_programs_do_not_share_state(self):
+        """Each compile starts with empty constants, locals and bytecode."""
+        compiler = Compiler()
+        first = compiler.compile(Parser('var a = "one"; a').parse())
+        second = compiler.compile(Parser('"two"').parse())
+        assert first.constants == ["one", "a"]
+        assert second.constants == ["two"]
+        assert second.locals == []
+        assert opcodes(second) == [OpCode.LOAD_CONST, OpCode.RETURN]
+
+    def test_reuse_after_syntax_error(self):
+        """A failed eval leaves the context's compiler usable."""
+        ctx = Context()
+        with pytest.raises(Exception):
+            ctx.eval("function (")
+        assert ctx.eval("function f(x) { return x * 2; } f(21)") == 42
+
+    def test_eval_during_run(self):
+        """JS eval() compiles while a compiled program is running."""
+        ctx = Context()
+        result = ctx.eval("""
+            var f = function() { return 1; };
+            eval("var g = function() { return 2; }");
+            f() + g()
+            """)
+        assert result == 3
+
+
+class TestDisassemble:
+    """Test the bytecode disassembler."""
+
+    def test_listing(self):
+        """Each instruction is shown with its offset and argument."""
+        compiled = compile_js('var x = 5; x + "a"')
+        listing = disassemble(compiled.bytecode, compiled.constants)
+        assert listing.splitlines() == [
+            "   0: LOAD_SMALL_INT 5",
+            "   2: STORE_NAME 0",
+            "   4: POP",
+            "   5: LOAD_NAME 0",
+            "   7: LOAD_CONST 1 ('a')",
+            "   9: ADD",
+            "  10: RETURN",
+        ]
+
+    def test_unknown_opcode(self):
+        """Bytes that aren't opcodes raise ValueError."""
+        with pytest.raises(ValueError):
+            disassemble(bytes([255]), [])
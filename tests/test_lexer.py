@@ -40,6 +40,23 @@ class TestLexerBasics:
         assert token.type == TokenType.NUMBER
         assert token.value == 42
 
+    def test_position_after_comments(self):
+        """Lines and columns count the whitespace and comments skipped."""
+        lexer = Lexer("  /* a\n b */ x // c\n\t/* d */  y /**/z")
+        tokens = [(t.value, t.line, t.column) for t in lexer.tokenize()]
+        assert tokens == [
+            ("x", 2, 7),
+            ("y", 3, 11),
+            ("z", 3, 17),
+            (None, 3, 18),
+        ]
+
+    def test_unterminated_block_comment(self):
+        """An unterminated block comment runs to the end of the source."""
+        lexer = Lexer("x /* never closed\n y")
+        tokens = list(lexer.tokenize())
+        assert [t.type for t in tokens] == [TokenType.IDENTIFIER, TokenType.EOF]
+
 
 class TestLexerNumbers:
     """Number literal tests."""
@@ -109,6 +126,18 @@ class TestLexerNumbers:
         assert token.type == TokenType.NUMBER
         assert token.value == 10
 
+    @pytest.mark.parametrize("source", ["0x", "0o9", "0b", "1e", "1e+", "2.5E-x"])
+    def test_invalid_number(self, source):
+        """A prefix or exponent with no digits after it is an error."""
+        with pytest.raises(JSSyntaxError):
+            list(Lexer(source).tokenize())
+
+    def test_number_stops_at_invalid_digit(self):
+        """Digits outside the radix, or a bare dot, end the number."""
+        tokens = [t.value for t in Lexer("0b102 0o78 1.x 12.5.6").tokenize()]
+        assert tokens == [2, 2, 7, 8, 1, ".", "x", 12.5, 0.6, None]
+        assert isinstance(tokens[-2], float)
+
 
 class TestLexerStrings:
     """String literal tests."""
@@ -189,6 +218,32 @@ class TestLexerStrings:
         with pytest.raises(JSSyntaxError):
             lexer.next_token()
 
+    def test_newline_in_string(self):
+        """A raw newline ends a string with an error at the newline."""
+        lexer = Lexer('x = "ab\ncd"')
+        with pytest.raises(JSSyntaxError) as excinfo:
+            list(lexer.tokenize())
+        assert (excinfo.value.line, excinfo.value.column) == (1, 8)
+
+    def test_mixed_spans_and_escapes(self):
+        """Plain text between escapes is kept in order."""
+        lexer = Lexer(r"'a\tb\'c\x41\u{1F600}d\qe\u0042'")
+        assert lexer.next_token().value == "a\tb'cA\U0001f600dqeB"
+
+    def test_escaped_newline_counts_lines(self):
+        """Tokens after an escaped newline in a string are on the next line."""
+        tokens = list(Lexer('"a\\\nb" c').tokenize())
+        assert tokens[0].value == "a\nb"
+        assert (tokens[1].line, tokens[1].column) == (2, 4)
+
+    @pytest.mark.parametrize(
+        "source", [r'"\x4"', r'"\xZZ"', r'"\u12"', r'"\u{}"', r'"\u{110000}"']
+    )
+    def test_invalid_escapes(self, source):
+        """Malformed hex and unicode escapes are syntax errors."""
+        with pytest.raises(JSSyntaxError):
+            Lexer(source).next_token()
+
 
 class TestLexerIdentifiersAndKeywords:
     """Identifier and keyword tests."""
@@ -214,6 +269,25 @@ class TestLexerIdentifiersAndKeywords:
         assert token.type == TokenType.IDENTIFIER
         assert token.value == "_private"
 
+    def test_identifier_non_ascii(self):
+        """Identifiers may contain non-ASCII letters and digits."""
+        tokens = [t.value for t in Lexer("ñame café2 $_x9").tokenize()]
+        assert tokens == ["ñame", "café2", "$_x9", None]
+
+    def test_identifier_non_ascii_start(self):
+        """Only letters start an identifier, whatever the script."""
+        assert Lexer("élan").next_token().value == "élan"
+        with pytest.raises(JSSyntaxError):
+            Lexer("€").next_token()
+
+    def test_identifiers_are_interned(self):
+        """Repeated names come back as the same string object."""
+        source = "total = total + " + "".join(["tot", "al"])
+        tokens = Lexer(source).tokenize()
+        names = [t.value for t in tokens if t.type == TokenType.IDENTIFIER]
+        assert len(names) == 3
+        assert names[0] is names[1] is names[2]
+
     def test_identifier_dollar(self):
         """Identifier starting with dollar sign."""
         lexer = Lexer("$jquery")
@@ -395,6 +469,31 @@ class TestLexerOperators:
             token = lexer.next_token()
             assert token.type == expected_type, f"Failed for {op}"
 
+    def test_longest_operator_wins(self):
+        """Adjacent operator characters are split by longest match."""
+        lexer = Lexer("a>>>=b>>c!===d=>e<<=-f")
+        tokens = [(t.value, t.column) for t in lexer.tokenize()][:-1]
+        assert tokens == [
+            ("a", 1),
+            (">>>=", 2),
+            ("b", 6),
+            (">>", 7),
+            ("c", 9),
+            ("!==", 10),
+            ("=", 13),
+            ("d", 14),
+            ("=>", 15),
+            ("e", 17),
+            ("<<=", 18),
+            ("-", 21),
+            ("f", 22),
+        ]
+
+    def test_unexpected_character(self):
+        """Characters that start no token are a syntax error."""
+        with pytest.raises(JSSyntaxError):
+            list(Lexer("a # b").tokenize())
+
 
 class TestLexerPunctuation:
     """Punctuation tests."""
@@ -477,3 +576,14 @@ class TestLexerMultipleTokens:
         assert tokens[0].column == 1
         assert tokens[1].column == 4
         assert tokens[2].column == 7
+
+    def test_position_after_rewind(self):
+        """Line and column follow pos when it is moved back for lookahead."""
+        lexer = Lexer("a\n  b\nc\n")
+        lexer.next_token()
+        saved_pos = lexer.pos
+        assert [lexer.next_token().line for _ in range(3)] == [2, 3, 4]
+        lexer.pos = saved_pos
+        token = lexer.next_token()
+        assert (token.value, token.line, token.column) == ("b", 2, 3)
+        assert (lexer.line, lexer.column) == (2, 4)
@@ -550,6 +550,31 @@ class TestEdgeCases:
         assert re.test("]") is True
 
 
+class TestCompileCache:
+    """Test that RegExp objects with the same pattern share compiled code."""
+
+    def test_same_pattern_shares_bytecode(self):
+        """Only the compiled bytecode is shared, not the match state."""
+        first = RegExp("a+", "g")
+        second = RegExp("a+", "g")
+        assert first._bytecode is second._bytecode
+        assert first is not second
+        assert first.test("xaa")
+        assert first.lastIndex == 3
+        assert second.lastIndex == 0
+
+    def test_flags_are_part_of_key(self):
+        """Different flags compile separately."""
+        assert RegExp("a").test("A") is False
+        assert RegExp("a", "i").test("A") is True
+
+    def test_errors_not_cached(self):
+        """An invalid pattern raises every time."""
+        for _ in range(2):
+            with pytest.raises(RegExpError):
+                RegExp("(abc")
+
+
 class TestErrorHandling:
     """Test error handling for invalid patterns."""
 
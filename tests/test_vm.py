@@ -585,3 +585,946 @@ class TestBackwardsCompatibleAlias:
         ctx = JSContext()
         result = ctx.eval("1 + 2")
         assert result == 3
+
+
+class TestCompileCache:
+    """Test that eval() reuses compiled code for repeated sources."""
+
+    def test_repeated_eval_reuses_compiled_code(self):
+        """Evaluating the same source twice compiles it once."""
+        ctx = Context()
+        ctx.eval("var n = 0")
+        assert ctx.eval("n = n + 1") == 1
+        compiled = ctx._compile_cache["n = n + 1"]
+        assert ctx.eval("n = n + 1") == 2
+        assert ctx._compile_cache["n = n + 1"] is compiled
+
+    def test_cache_is_bounded(self, monkeypatch):
+        """The least recently used source is evicted once the cache is full."""
+        monkeypatch.setattr("microjs.context._COMPILE_CACHE_SIZE", 2)
+        ctx = Context()
+        ctx.eval("1")
+        ctx.eval("2")
+        ctx.eval("1")
+        ctx.eval("3")
+        assert list(ctx._compile_cache) == ["1", "3"]
+
+    def test_syntax_error_not_cached(self):
+        """Code that fails to parse raises every time."""
+        ctx = Context()
+        for _ in range(2):
+            with pytest.raises(JSSyntaxError):
+                ctx.eval("var = ;")
+        assert not ctx._compile_cache
+
+
+class TestValueConversion:
+    """Test conversion of values between Python and JavaScript."""
+
+    def test_deeply_nested_array_round_trip(self):
+        """Nesting deeper than the recursion limit converts both ways."""
+        ctx = Context()
+        value = []
+        for _ in range(5000):
+            value = [value]
+        ctx.set("deep", value)
+        result = ctx.get("deep")
+        for _ in range(5000):
+            assert len(result) == 1
+            result = result[0]
+        assert result == []
+
+    def test_nested_values_keep_order(self):
+        """Mixed lists and dicts keep their element and key order."""
+        ctx = Context()
+        value = {"b": [1, None, {"c": "x"}], "a": {"d": [True, 2.5]}}
+        ctx.set("v", value)
+        result = ctx.eval("v")
+        assert result == value
+        assert list(result) == ["b", "a"]
+        assert ctx.eval("v.b[1] === null") is True
+
+    def test_primitive_array_is_copied(self):
+        """A converted array of primitives doesn't alias the JS array."""
+        ctx = Context()
+        ctx.eval("var a = [1, 'two', 3.5, true]; var o = {x: 1, y: 'y'}")
+        result = ctx.get("a")
+        assert result == [1, "two", 3.5, True]
+        result.append(5)
+        assert ctx.eval("a.length") == 4
+        obj = ctx.get("o")
+        obj["z"] = 1
+        assert ctx.eval("Object.keys(o).length") == 2
+
+    def test_array_with_undefined_uses_slow_path(self):
+        """null and undefined elements still convert to None."""
+        ctx = Context()
+        assert ctx.eval("[1, null, undefined, {a: undefined}]") == [
+            1,
+            None,
+            None,
+            {"a": None},
+        ]
+
+    def test_primitive_list_is_copied_into_js(self):
+        """A Python list of primitives doesn't alias the new JS array."""
+        ctx = Context()
+        items = [1, "two", 3.5, False]
+        point = {"x": 1, "y": "y"}
+        ctx.set("items", items)
+        ctx.set("point", point)
+        items.append(5)
+        point["z"] = 1
+        assert ctx.eval("items.length") == 4
+        assert ctx.eval("Object.keys(point).length") == 2
+
+    def test_dict_with_non_string_keys_uses_slow_path(self):
+        """Non-string keys are still converted to strings."""
+        ctx = Context()
+        ctx.set("d", {1: "one", "two": None})
+        assert ctx.eval("d['1']") == "one"
+        assert ctx.eval("d.two === null") is True
+
+    def test_container_subclasses_convert(self):
+        """Subclasses of list and dict convert like their base types."""
+        from collections import OrderedDict
+
+        class Items(list):
+            pass
+
+        ctx = Context()
+        ctx.set("v", OrderedDict(items=Items([1, None])))
+        assert ctx.eval("v.items.length") == 2
+        assert ctx.eval("v.items[1] === null") is True
+        assert ctx.get("v") == {"items": [1, None]}
+
+    def test_shared_and_cyclic_values(self):
+        """Shared containers convert once and cycles don't loop forever."""
+        ctx = Context()
+        result = ctx.eval("var a = [1]; var o = {a: a, b: a}; o")
+        assert result["a"] is result["b"]
+        ctx.eval("var x = []; x.push(x)")
+        x = ctx.get("x")
+        assert x[0] is x
+        items = [1]
+        items.append(items)
+        ctx.set("items", items)
+        assert ctx.eval("items[1] === items") is True
+
+    def test_js_values_pass_through(self):
+        """JS values given back to set() keep their identity and type."""
+        from microjs.values import NULL, UNDEFINED, JSArray, JSObject
+
+        ctx = Context()
+        ctx.set("n", NULL)
+        ctx.set("u", UNDEFINED)
+        assert ctx.eval("n === null && u === undefined") is True
+        arr = JSArray()
+        obj = JSObject()
+        ctx.set("arr", arr)
+        ctx.set("obj", obj)
+        assert ctx._globals["arr"] is arr
+        assert ctx._globals["obj"] is obj
+
+
+class TestConsoleLog:
+    """Test console.log output formatting."""
+
+    def test_log_formats_values_like_js(self, capsys):
+        """Values are joined with spaces using JavaScript string conversion."""
+        ctx = Context()
+        ctx.eval('console.log("a", 1, 1.5, 2.0, true, null, undefined, NaN)')
+        assert capsys.readouterr().out == "a 1 1.5 2 true null undefined NaN\n"
+
+
+class TestCallbackGlobals:
+    """Test globals seen by JS functions called back from Python."""
+
+    def test_callback_shares_context_globals(self):
+        """A sort comparator reads and writes the context's globals directly."""
+        ctx = Context()
+        ctx.eval("var calls = 0; var order = [3, 1, 2]")
+        ctx.eval("order.sort(function(a, b) { calls++; return a - b; })")
+        assert ctx.get("calls") > 0
+        assert ctx.get("order") == [1, 2, 3]
+
+
+class TestBuiltinIsolation:
+    """Test that builtin objects aren't shared between contexts."""
+
+    def test_math_changes_stay_in_context(self):
+        """Replacing a Math method in one context doesn't affect another."""
+        first = Context()
+        second = Context()
+        first.eval("Math.abs = function(x) { return 42; }; Math.extra = 1")
+        assert first.eval("Math.abs(-1)") == 42
+        assert second.eval("Math.abs(-1)") == 1
+        assert second.eval("typeof Math.extra") == "undefined"
+
+    def test_json_and_number_work_in_each_context(self):
+        """JSON and Number methods work in every context."""
+        for ctx in (Context(), Context()):
+            assert ctx.eval("JSON.parse('[1, {\"a\": 2}]')") == [1, {"a": 2}]
+            assert ctx.eval("Number.parseInt('42px')") == 42
+
+    def test_json_and_number_changes_stay_in_context(self):
+        """JSON and Number copy their shared methods instead of aliasing them."""
+        first = Context()
+        first.eval("JSON.extra = 1; Number.isNaN = function() { return 'mine'; }")
+        second = Context()
+        assert second.eval("typeof JSON.extra") == "undefined"
+        assert second.eval("Number.isNaN(1)") is False
+
+    def test_constructor_changes_stay_in_context(self):
+        """String, Boolean and Date share functions but not objects."""
+        first = Context()
+        first.eval("String.extra = 1; Boolean.extra = 2; Date.now = 3")
+        second = Context()
+        assert second.eval("typeof String.extra") == "undefined"
+        assert second.eval("typeof Boolean.extra") == "undefined"
+        assert second.eval("typeof Date.now") == "function"
+        assert second.eval("String.fromCharCode(65) + String(1)") == "A1"
+
+    def test_object_prototype_changes_stay_in_context(self):
+        """Object and its prototype are per context, though methods are shared."""
+        first = Context()
+        second = Context()
+        first.eval(
+            "Object.prototype.toString = function() { return 'mine'; };"
+            "Object.keys = function() { return []; }"
+        )
+        assert first.eval("({}).toString()") == "mine"
+        assert second.eval("({}).toString()") == "[object Object]"
+        assert second.eval("Object.keys({a: 1})") == ["a"]
+
+
+class TestParseInt:
+    """Test the global and Number parseInt functions."""
+
+    @pytest.mark.parametrize(
+        "call,expected",
+        [
+            ("parseInt('123abc')", 123),
+            ("parseInt('  -42')", -42),
+            ("parseInt('+7')", 7),
+            ("parseInt('ff', 16)", 255),
+            ("parseInt('0x1F')", 31),
+            ("parseInt('Zz', 36)", 1295),
+            ("parseInt('1012', 2)", 5),
+            ("parseInt('12345678901234567890')", 12345678901234567890),
+            ("parseInt('777.5', 8)", 511),
+            ("parseInt('DEADbeefg', 16)", 0xDEADBEEF),
+            ("parseInt('12.5px')", 12),
+            ("parseInt('12349', 5)", 194),
+        ],
+    )
+    def test_parse_int(self, call, expected):
+        """Both versions parse the longest valid digit prefix."""
+        ctx = Context()
+        assert ctx.eval(call) == expected
+        assert ctx.eval("Number." + call) == expected
+
+    @pytest.mark.parametrize(
+        "call",
+        ["parseInt('')", "parseInt('xyz')", "parseInt('10', 1)", "parseInt('10', 37)"],
+    )
+    def test_parse_int_nan(self, call):
+        """Invalid input or radix gives NaN."""
+        ctx = Context()
+        assert ctx.eval(f"isNaN({call})") is True
+        assert ctx.eval(f"isNaN(Number.{call})") is True
+
+    @pytest.mark.parametrize(
+        "call,expected",
+        [
+            ("parseInt('0x10', 10)", 0),
+            ("parseInt('0x10', 16)", 16),
+            ("parseInt('12', undefined)", 12),
+            ("parseInt('12', NaN)", 12),
+            ("parseInt('z', 36.9)", 35),
+        ],
+    )
+    def test_radix_conversion(self, call, expected):
+        """The radix is converted to an integer and only 16 allows 0x."""
+        ctx = Context()
+        assert ctx.eval(call) == expected
+
+    @pytest.mark.parametrize(
+        "call,expected",
+        [
+            ("parseInt('0x0x1')", 0),
+            ("parseInt('0b1', 2)", 0),
+            ("parseInt('0o7', 8)", 0),
+            ("parseInt('0b1', 16)", 177),
+            ("parseInt('1_000')", 1),
+        ],
+    )
+    def test_int_literal_syntax_not_accepted(self, call, expected):
+        """Python-only integer syntax stops parsing like any other character."""
+        ctx = Context()
+        assert ctx.eval(call) == expected
+
+    def test_global_is_number_method(self):
+        """parseInt and parseFloat are the same functions as on Number."""
+        ctx = Context()
+        assert ctx.eval("parseInt === Number.parseInt") is True
+        assert ctx.eval("parseFloat === Number.parseFloat") is True
+
+    def test_non_ascii_digits_stop_parsing(self):
+        """Only ASCII digits count, as in JavaScript."""
+        ctx = Context()
+        assert ctx.eval("parseInt('12²')") == 12
+        assert ctx.eval("isNaN(parseInt('٣'))") is True
+
+
+class TestParseFloat:
+    """Test the global and Number parseFloat functions."""
+
+    @pytest.mark.parametrize(
+        "call,expected",
+        [
+            ("parseFloat('3.14abc')", 3.14),
+            ("parseFloat('  -1.5e3x')", -1500.0),
+            ("parseFloat('.5')", 0.5),
+            ("parseFloat('1.2.3')", 1.2),
+            ("parseFloat('1e')", 1.0),
+            ("parseFloat('-Infinity!')", float("-inf")),
+        ],
+    )
+    def test_parse_float(self, call, expected):
+        """Both versions parse the longest valid decimal prefix."""
+        ctx = Context()
+        assert ctx.eval(call) == expected
+        assert ctx.eval("Number." + call) == expected
+
+    @pytest.mark.parametrize(
+        "call", ["parseFloat('')", "parseFloat('.')", "parseFloat('+.e1')"]
+    )
+    def test_parse_float_nan(self, call):
+        """Strings without a decimal prefix give NaN."""
+        ctx = Context()
+        assert ctx.eval(f"isNaN({call})") is True
+        assert ctx.eval(f"isNaN(Number.{call})") is True
+
+
+class TestVMReuse:
+    """Test that eval() reuses one VM per context safely."""
+
+    def test_state_cleared_after_error(self):
+        """A run that throws leaves nothing behind for the next one."""
+        ctx = Context()
+        with pytest.raises(JSError):
+            ctx.eval("function f(n) { if (n) return f(n - 1); throw 1; } f(5)")
+        assert ctx._vm.stack == []
+        assert ctx._vm.call_stack == []
+        assert ctx.eval("1 + 1") == 2
+
+    def test_nested_eval_from_python(self):
+        """eval() called while the shared VM is running gets its own VM."""
+        ctx = Context()
+        ctx.set("inner", lambda: ctx.eval("var y = 40; y + 1"))
+        assert ctx.eval("var x = 1; inner() + x") == 42
+        assert ctx.eval("y") == 40
+
+    def test_changed_time_limit_applies(self):
+        """Limits set on the context after creation are used by later runs."""
+        from microjs import TimeLimitError
+
+        ctx = Context()
+        ctx.eval("1")
+        ctx.time_limit = 0.05
+        with pytest.raises(TimeLimitError):
+            ctx.eval("while (true) {}")
+
+    def test_global_eval_reuses_spare_vm(self):
+        """Nested runs from eval() and Function() share one spare VM."""
+        ctx = Context()
+        result = ctx.eval(
+            "var t = 0;"
+            "for (var i = 0; i < 5; i++) { t += eval('i * 2'); }"
+            "t + new Function('a', 'return a + 1')(1)"
+        )
+        assert result == 22
+        assert len(ctx._spare_vms) == 1
+        assert ctx._spare_vms[0].call_stack == []
+
+    def test_nested_errors_keep_their_type(self):
+        """Errors from eval() and Function() code aren't rewrapped."""
+        from microjs import TimeLimitError
+
+        ctx = Context(time_limit=0.05)
+        with pytest.raises(TimeLimitError):
+            ctx.eval("eval('while (true) {}')")
+        with pytest.raises(JSSyntaxError):
+            ctx.eval("eval('1 +')")
+        with pytest.raises(JSSyntaxError):
+            ctx.eval("new Function('return +')")
+
+    def test_sort_comparator_with_time_limit(self):
+        """JS comparators run on the calling script's VM, under its limits."""
+        ctx = Context(time_limit=5.0)
+        result = ctx.eval(
+            "var a = []; for (var i = 0; i < 500; i++) a.push((i * 7) % 500);"
+            "a.sort(function(x, y) { return x % 10 - y % 10 || x - y; });"
+            "a[0] + ',' + a[499]"
+        )
+        assert result == "0,499"
+        assert ctx._spare_vms == []
+
+
+class TestNumberTypeChecks:
+    """Test that number checks don't treat booleans as numbers."""
+
+    @pytest.mark.parametrize(
+        "code,expected",
+        [
+            ("Number.isInteger(true)", False),
+            ("Number.isFinite(false)", False),
+            ("Number.isNaN(true)", False),
+            ("Number.isInteger(5)", True),
+            ("Number.isFinite(1.5)", True),
+            ("Number.isNaN(NaN)", True),
+        ],
+    )
+    def test_number_predicates(self, code, expected):
+        """Number.isInteger/isFinite/isNaN accept only numbers."""
+        ctx = Context()
+        assert ctx.eval(code) is expected
+
+    @pytest.mark.parametrize(
+        "code,expected",
+        [
+            ("isNaN('abc')", True),
+            ("isNaN('12')", False),
+            ("isNaN(true)", False),
+            ("isNaN()", True),
+            ("isFinite('12')", True),
+            ("isFinite(Infinity)", False),
+            ("isFinite(-Infinity)", False),
+            ("isFinite(NaN)", False),
+            ("isFinite(null)", True),
+            ("isFinite(1e308 * 10)", False),
+        ],
+    )
+    def test_global_predicates(self, code, expected):
+        """The global isNaN/isFinite convert their argument to a number."""
+        ctx = Context()
+        assert ctx.eval(code) is expected
+
+    def test_array_of_boolean(self):
+        """Array(true) makes a one-element array rather than a length."""
+        ctx = Context()
+        assert ctx.eval("Array(true)") == [True]
+
+
+class TestLazyGlobals:
+    """Test builtins that are only created when first used."""
+
+    def test_lazy_builtin_built_on_first_use(self):
+        """Math isn't created until a script refers to it."""
+        ctx = Context()
+        assert "Math" not in ctx._globals
+        assert ctx.eval("Math.max(1, 2)") == 2
+        assert "Math" in ctx._globals
+
+    def test_typeof_and_get_see_lazy_builtins(self):
+        """typeof and Context.get() find builtins that aren't built yet."""
+        ctx = Context()
+        assert ctx.eval("typeof Math") == "object"
+        assert sorted(ctx.get("JSON")) == ["parse", "stringify"]
+        assert ctx.eval("typeof notDefined") == "undefined"
+
+    def test_assignment_replaces_lazy_builtin(self):
+        """Assigning to a builtin before use means it is never built."""
+        ctx = Context()
+        ctx.set("RegExp", 5)
+        assert ctx.eval("RegExp + 1") == 6
+
+    def test_eval_built_on_first_use(self):
+        """The global eval function is lazy too."""
+        ctx = Context()
+        assert "eval" not in ctx._globals
+        assert ctx.eval("eval('1 + 2')") == 3
+
+    def test_unknown_name_still_raises(self):
+        """Names with no builtin behind them are still reference errors."""
+        ctx = Context()
+        with pytest.raises(JSError):
+            ctx.eval("notDefined")
+
+
+class TestMathMinMax:
+    """Test Math.min and Math.max."""
+
+    @pytest.mark.parametrize(
+        "code,expected",
+        [
+            ("Math.max(1, 3, 2)", 3),
+            ("Math.min(3, 1, 2)", 1),
+            ("Math.max('5', 2)", 5),
+            ("Math.max()", float("-inf")),
+            ("Math.min()", float("inf")),
+            ("Math.max.apply(null, [4, 9, 1])", 9),
+        ],
+    )
+    def test_min_max(self, code, expected):
+        """Arguments are converted to numbers and compared."""
+        ctx = Context()
+        assert ctx.eval(code) == expected
+
+    @pytest.mark.parametrize(
+        "code", ["Math.max(1, NaN, 3)", "Math.min(NaN, 1)", "Math.max(1, 'x')"]
+    )
+    def test_nan_argument(self, code):
+        """Any NaN argument makes the result NaN."""
+        ctx = Context()
+        assert ctx.eval(f"isNaN({code})") is True
+
+
+class TestUnaryMath:
+    """Test the one-argument Math methods."""
+
+    @pytest.mark.parametrize(
+        "code,expected",
+        [
+            ("Math.floor(2.5)", 2),
+            ("Math.round(-2.5)", -2),
+            ("Math.abs('-3')", 3),
+            ("Math.floor(-Infinity)", float("-inf")),
+            ("Math.trunc(Infinity)", float("inf")),
+            ("Math.exp(1000)", float("inf")),
+        ],
+    )
+    def test_unary_math(self, code, expected):
+        """Arguments are converted to numbers, and infinities survive."""
+        ctx = Context()
+        assert ctx.eval(code) == expected
+
+    @pytest.mark.parametrize(
+        "code",
+        [
+            "Math.floor(NaN)",
+            "Math.ceil(undefined)",
+            "Math.round()",
+            "Math.sqrt(-1)",
+            "Math.sin(Infinity)",
+            "Math.asin(2)",
+        ],
+    )
+    def test_nan_results(self, code):
+        """Inputs Python's math module rejects give NaN."""
+        ctx = Context()
+        assert ctx.eval(f"isNaN({code})") is True
+
+
+class TestMathClz32:
+    """Test Math.clz32."""
+
+    @pytest.mark.parametrize(
+        "code,expected",
+        [
+            ("Math.clz32(1)", 31),
+            ("Math.clz32(0)", 32),
+            ("Math.clz32(-1)", 0),
+            ("Math.clz32(0x80000000)", 0),
+            ("Math.clz32(3.7)", 30),
+            ("Math.clz32(NaN)", 32),
+            ("Math.clz32(Infinity)", 32),
+            ("Math.clz32()", 32),
+        ],
+    )
+    def test_clz32(self, code, expected):
+        """Leading zeros of the argument as a 32-bit unsigned integer."""
+        ctx = Context()
+        assert ctx.eval(code) == expected
+
+
+class TestMathHypot:
+    """Test Math.hypot."""
+
+    @pytest.mark.parametrize(
+        "code,expected",
+        [
+            ("Math.hypot(3, 4)", 5),
+            ("Math.hypot('3', 4)", 5),
+            ("Math.hypot()", 0),
+            ("Math.hypot(1e200, 1e200)", 1.414213562373095e200),
+            ("Math.hypot(NaN, Infinity)", float("inf")),
+        ],
+    )
+    def test_hypot(self, code, expected):
+        """hypot converts its arguments and doesn't overflow."""
+        ctx = Context()
+        assert ctx.eval(code) == expected
+
+
+class TestMathImul:
+    """Test Math.imul."""
+
+    @pytest.mark.parametrize(
+        "code,expected",
+        [
+            ("Math.imul(2, 4)", 8),
+            ("Math.imul(-1, 8)", -8),
+            ("Math.imul(0xffffffff, 5)", -5),
+            ("Math.imul(0x7fffffff, 2)", -2),
+            ("Math.imul(65536, 65536)", 0),
+            ("Math.imul(NaN, 3)", 0),
+            ("Math.imul(3)", 0),
+        ],
+    )
+    def test_imul(self, code, expected):
+        """The product wraps to a signed 32-bit integer."""
+        ctx = Context()
+        assert ctx.eval(code) == expected
+
+
+class TestMathFround:
+    """Test Math.fround."""
+
+    @pytest.mark.parametrize(
+        "code,expected",
+        [
+            ("Math.fround(5.5)", 5.5),
+            ("Math.fround(5.05)", 5.050000190734863),
+            ("Math.fround(1e300)", float("inf")),
+            ("Math.fround(-1e300)", float("-inf")),
+        ],
+    )
+    def test_fround(self, code, expected):
+        """Values round to the nearest 32-bit float."""
+        ctx = Context()
+        assert ctx.eval(code) == expected
+
+
+class TestArraySort:
+    """Test Array.prototype.sort."""
+
+    def test_default_sort_compares_strings(self):
+        """Without a comparator elements sort by their string form."""
+        ctx = Context()
+        assert ctx.eval("[10, 9, 1, 100].sort()") == [1, 10, 100, 9]
+
+    def test_default_sort_puts_undefined_last(self):
+        """undefined values sort after everything else."""
+        ctx = Context()
+        result = ctx.eval("[3, undefined, 'b', 1, undefined].sort()")
+        assert result == [1, 3, "b", None, None]
+
+    def test_fractional_comparator_result(self):
+        """Only the sign of the comparator result matters."""
+        ctx = Context()
+        result = ctx.eval("[0.3, 0.1, 0.2].sort(function(a, b) { return a - b; })")
+        assert result == [0.1, 0.2, 0.3]
+
+    @pytest.mark.parametrize(
+        "comparator,expected",
+        [
+            ("(a, b) => a - b", [-1, 0.5, 2, 2, 10]),
+            ("function(a, b) { return a - b; }", [-1, 0.5, 2, 2, 10]),
+            ("(a, b) => b - a", [10, 2, 2, 0.5, -1]),
+        ],
+    )
+    def test_numeric_comparators(self, comparator, expected):
+        """a - b and b - a comparators sort numbers numerically."""
+        ctx = Context()
+        assert ctx.eval(f"[2, 10, -1, 2, 0.5].sort({comparator})") == expected
+
+    def test_numeric_comparator_with_non_numbers(self):
+        """Arrays with non-numbers still go through the comparator."""
+        ctx = Context()
+        result = ctx.eval("[3, '10', 2].sort((a, b) => a - b)")
+        assert result == [2, 3, "10"]
+
+    def test_numeric_comparator_with_nan(self):
+        """NaN elements still go through the comparator."""
+        ctx = Context()
+        assert ctx.eval("[2, 1].sort((a, b) => a - b)") == [1, 2]
+        assert ctx.eval("[2, NaN, 1].sort((a, b) => a - b).length") == 3
+
+    def test_nan_comparator_result(self):
+        """A NaN comparator result treats the elements as equal."""
+        ctx = Context()
+        result = ctx.eval("[2, 1, 3].sort(function(a, b) { return NaN; })")
+        assert result == [2, 1, 3]
+
+
+class TestErrorConstructors:
+    """Test objects built by the Error constructors."""
+
+    def test_error_properties(self):
+        """A new error carries its own message and name."""
+        ctx = Context()
+        result = ctx.eval(
+            "var e = new TypeError('bad'); [e.message, e.name, e.stack, e.lineNumber]"
+        )
+        assert result == ["bad", "TypeError", "", None]
+
+    def test_error_without_message(self):
+        """Omitting the message gives an empty string."""
+        ctx = Context()
+        assert ctx.eval("new RangeError().message") == ""
+
+    def test_errors_do_not_share_properties(self):
+        """Each error gets a separate property table."""
+        ctx = Context()
+        result = ctx.eval(
+            "var a = new Error('a'); var b = new Error('b');"
+            "a.extra = 1; [a.message, b.message, b.extra === undefined]"
+        )
+        assert result == ["a", "b", True]
+
+    def test_prototype_chain(self):
+        """Errors still inherit from the constructor's prototype."""
+        ctx = Context()
+        assert ctx.eval("new SyntaxError('x') instanceof SyntaxError") is True
+
+
+class TestMathConstants:
+    """Test the Math constants."""
+
+    def test_constants(self):
+        """The constants have their usual values."""
+        ctx = Context()
+        assert ctx.eval("Math.PI") == 3.141592653589793
+        assert ctx.eval("Math.SQRT1_2") == 0.7071067811865476
+        assert ctx.eval("Math.LOG2E") == 1.4426950408889634
+
+    def test_constants_isolated_between_contexts(self):
+        """Changing a constant in one context doesn't affect another."""
+        first = Context()
+        first.eval("Math.PI = 3")
+        assert Context().eval("Math.PI") == 3.141592653589793
+
+
+class TestMathLogarithms:
+    """Test the Math logarithm functions."""
+
+    @pytest.mark.parametrize(
+        "code,expected",
+        [
+            ("Math.log2(8)", 3.0),
+            ("Math.log10(1000)", 3.0),
+            ("Math.log2(0)", float("-inf")),
+            ("Math.log10(0)", float("-inf")),
+            ("Math.log1p(-1)", float("-inf")),
+            ("Math.log2('8')", 3.0),
+            ("Math.log10(true)", 0.0),
+        ],
+    )
+    def test_logarithms(self, code, expected):
+        """Logarithms accept any value and return -Infinity at their pole."""
+        ctx = Context()
+        assert ctx.eval(code) == expected
+
+    @pytest.mark.parametrize(
+        "code", ["Math.log2(-1)", "Math.log10(-1)", "Math.log1p(-2)", "Math.log2()"]
+    )
+    def test_out_of_domain_is_nan(self, code):
+        """Arguments outside the domain give NaN."""
+        ctx = Context()
+        assert ctx.eval(f"isNaN({code})") is True
+
+
+class TestMathCbrt:
+    """Test Math.cbrt."""
+
+    @pytest.mark.parametrize(
+        "code,expected",
+        [
+            ("Math.cbrt(1000)", 10),
+            ("Math.cbrt(-8)", -2),
+            ("Math.cbrt(27)", 3),
+            ("Math.cbrt(-27)", -3),
+            ("Math.cbrt(0)", 0),
+            ("Math.cbrt(Infinity)", float("inf")),
+            ("Math.cbrt(-Infinity)", float("-inf")),
+            ("Math.cbrt('64')", 4),
+        ],
+    )
+    def test_cbrt(self, code, expected):
+        """Cube roots keep the sign of their argument."""
+        ctx = Context()
+        assert ctx.eval(code) == expected
+
+    def test_cbrt_nan(self):
+        """The cube root of NaN is NaN."""
+        ctx = Context()
+        assert ctx.eval("isNaN(Math.cbrt(NaN))") is True
+
+
+class TestJSONStringify:
+    """Test JSON.stringify."""
+
+    def test_nested_values(self):
+        """Nested arrays and objects encode compactly."""
+        ctx = Context()
+        result = ctx.eval("JSON.stringify({a: [1, 'x', true, null], b: {c: 1.5}})")
+        assert result == '{"a":[1,"x",true,null],"b":{"c":1.5}}'
+
+    def test_undefined_values(self):
+        """undefined becomes null in arrays and is skipped in objects."""
+        ctx = Context()
+        result = ctx.eval("JSON.stringify([undefined, {a: undefined, b: 1}])")
+        assert result == '[null,{"b":1}]'
+
+    def test_stringify_undefined(self):
+        """Stringifying undefined itself gives undefined."""
+        ctx = Context()
+        assert ctx.eval("JSON.stringify(undefined) === undefined") is True
+
+    def test_circular_reference(self):
+        """A circular structure raises an error instead of recursing forever."""
+        ctx = Context()
+        with pytest.raises(JSError):
+            ctx.eval("var a = {}; a.self = a; JSON.stringify(a)")
+
+
+class TestObjectAssign:
+    """Test Object.assign."""
+
+    def test_copies_own_properties_in_order(self):
+        """Later sources overwrite earlier ones."""
+        ctx = Context()
+        result = ctx.eval("Object.assign({a: 1}, {b: 2}, null, {a: 3, c: 4})")
+        assert result == {"a": 3, "b": 2, "c": 4}
+
+    def test_returns_target(self):
+        """The target object itself is modified and returned."""
+        ctx = Context()
+        assert ctx.eval("var t = {}; Object.assign(t, {x: 1}) === t && t.x") == 1
+
+    def test_sources_are_not_aliased(self):
+        """Changing the target afterwards leaves the source alone."""
+        ctx = Context()
+        ctx.eval("var s = {x: 1}; var t = Object.assign({}, s); t.x = 2")
+        assert ctx.eval("s.x") == 1
+
+
+class TestBooleanNumberEquality:
+    """Test that booleans aren't treated as numbers by strict equality."""
+
+    @pytest.mark.parametrize(
+        "code,expected",
+        [
+            ("true === 1", False),
+            ("0 !== false", True),
+            ("1 === 1.0", True),
+            ("true == 1", True),
+            ("[true].indexOf(1)", -1),
+        ],
+    )
+    def test_equality(self, code, expected):
+        """=== compares booleans and numbers as different types."""
+        ctx = Context()
+        assert ctx.eval(code) == expected
+
+    def test_postfix_update_returns_number(self):
+        """x++ evaluates to the old value converted to a number."""
+        ctx = Context()
+        assert ctx.eval("var a = true; var r = a++; r === 1 && a === 2") is True
+        assert ctx.eval("var o = {x: '5'}; var r = o.x--; r === 5 && o.x === 4") is True
+
+
+class TestStringFromCharCode:
+    """Test String.fromCharCode."""
+
+    @pytest.mark.parametrize(
+        "code,expected",
+        [
+            ("String.fromCharCode(72, 105)", "Hi"),
+            ("String.fromCharCode()", ""),
+            ("String.fromCharCode(65.7)", "A"),
+            ("String.fromCharCode('66')", "B"),
+            ("String.fromCharCode(233, 8364)", "é€"),
+            ("String.fromCharCode(65536 + 65)", "A"),
+            ("String.fromCharCode(-1)", "￿"),
+            ("String.fromCharCode(NaN)", "\x00"),
+        ],
+    )
+    def test_from_char_code(self, code, expected):
+        """Codes are converted to 16-bit integers, as in JavaScript."""
+        ctx = Context()
+        assert ctx.eval(code) == expected
+
+
+class TestTypedArrayFromBuffer:
+    """Test typed arrays created over an ArrayBuffer."""
+
+    def test_views_share_buffer_bytes(self):
+        """A view decodes the little-endian bytes another view wrote."""
+        ctx = Context()
+        ctx.eval(
+            "var buf = new ArrayBuffer(8);"
+            "var bytes = new Uint8Array(buf);"
+            "bytes[0] = 1; bytes[1] = 2; bytes[4] = 255; bytes[5] = 255;"
+            "bytes[6] = 255; bytes[7] = 255;"
+        )
+        assert ctx.eval("new Int32Array(buf)[0]") == 0x0201
+        assert ctx.eval("new Int32Array(buf)[1]") == -1
+        assert ctx.eval("new Uint32Array(buf, 4)[0]") == 0xFFFFFFFF
+        assert ctx.eval("new Int16Array(buf, 4, 1).length") == 1
+        assert ctx.eval("new Int8Array(buf, 4)[3]") == -1
+
+    def test_float_views(self):
+        """Float views decode IEEE 754 values."""
+        ctx = Context()
+        ctx.eval(
+            "var buf = new ArrayBuffer(8);"
+            "var f = new Float64Array(buf); f[0] = 1.5;"
+            "var buf32 = new ArrayBuffer(4);"
+            "var g = new Float32Array(buf32); g[0] = 0.1;"
+        )
+        assert ctx.eval("new Float64Array(buf)[0]") == 1.5
+        assert ctx.eval("new Float32Array(buf32)[0] === Math.fround(0.1)") is True
+
+    def test_from_array(self):
+        """Values copied from an array are coerced to the element type."""
+        ctx = Context()
+        assert ctx.eval("var a = new Int8Array([1, 200, 3.7]); [a[0], a[1], a[2]]") == [
+            1,
+            -56,
+            3,
+        ]
+        assert ctx.eval("new Uint8ClampedArray([300, -5])[0]") == 255
+        assert ctx.eval("new Float64Array([1, 2]).length") == 2
+
+    def test_out_of_range_length(self):
+        """A view that doesn't fit in the buffer is a RangeError."""
+        from microjs.errors import JSRangeError
+
+        ctx = Context()
+        with pytest.raises(JSRangeError):
+            ctx.eval("new Int32Array(new ArrayBuffer(4), 0, 2)")
+
+
+class TestBooleanConversion:
+    """Test the Boolean function."""
+
+    @pytest.mark.parametrize(
+        "code,expected",
+        [
+            ("Boolean()", False),
+            ("Boolean(undefined)", False),
+            ("Boolean(null)", False),
+            ("Boolean(false)", False),
+            ("Boolean(0)", False),
+            ("Boolean(-0)", False),
+            ("Boolean(0.0)", False),
+            ("Boolean(NaN)", False),
+            ("Boolean('')", False),
+            ("Boolean(true)", True),
+            ("Boolean(1)", True),
+            ("Boolean(0.5)", True),
+            ("Boolean(-Infinity)", True),
+            ("Boolean('0')", True),
+            ("Boolean('false')", True),
+            ("Boolean({})", True),
+            ("Boolean([])", True),
+            ("Boolean(function() {})", True),
+        ],
+    )
+    def test_truthiness(self, code, expected):
+        """Boolean() follows JavaScript truthiness rules."""
+        ctx = Context()
+        assert ctx.eval(code) is expected